@@ -0,0 +1,171 @@
+import collections
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncWriter(object):
+    """Writes items on a background thread.
+
+    Items are passed to the thread through a bounded queue, so that callers
+    do not wait for the disk unless the queue is full. The thread writes all
+    the queued items at once, which coalesces small writes.
+
+    Subclasses implement _write_batch, and optionally _sync and _close.
+
+    Attributes:
+        max_queue_size (int): Maximum number of queued items. write blocks
+            while the queue is full.
+        fsync_interval (float): Interval in seconds between two syncs of the
+            written data to disk. If None, the data is only synced on close.
+    """
+
+    def __init__(self, max_queue_size=1024, fsync_interval=None, name=None):
+        self.max_queue_size = max_queue_size
+        self.fsync_interval = fsync_interval
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        # Number of items queued or being written.
+        self._num_pending = 0
+        self._closing = False
+        self._error = None
+        self._max_depth = 0
+        self._num_written = 0
+        self._num_batches = 0
+        self._num_syncs = 0
+        self._thread = threading.Thread(target=self._run,
+                                        name=name or 'erdos-writer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def write(self, item):
+        """Queues an item. Blocks while the queue is full."""
+        with self._cond:
+            if self._closing:
+                raise Exception('Cannot write to a closed writer')
+            while len(self._queue) >= self.max_queue_size:
+                self._cond.wait()
+            self._queue.append(item)
+            self._num_pending += 1
+            self._max_depth = max(self._max_depth, len(self._queue))
+            self._cond.notify_all()
+
+    def flush(self):
+        """Waits until the queued items are written."""
+        with self._cond:
+            while self._num_pending > 0 and self._thread.is_alive():
+                self._cond.wait()
+        self._raise_error()
+
+    def close(self):
+        """Writes the queued items, syncs them to disk and closes the writer.
+
+        Can be called several times.
+        """
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._raise_error()
+
+    def get_metrics(self):
+        with self._cond:
+            return {
+                'depth': len(self._queue),
+                'max_depth': self._max_depth,
+                'num_written': self._num_written,
+                'num_batches': self._num_batches,
+                'num_syncs': self._num_syncs,
+            }
+
+    def _write_batch(self, items):
+        raise NotImplementedError('AsyncWriter must implement _write_batch')
+
+    def _sync(self):
+        """Syncs the written data to disk."""
+        pass
+
+    def _close(self):
+        pass
+
+    def _raise_error(self):
+        if self._error is not None:
+            error = self._error
+            self._error = None
+            raise error
+
+    def _run(self):
+        next_sync_time = None
+        if self.fsync_interval:
+            next_sync_time = time.time() + self.fsync_interval
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing:
+                    if next_sync_time is None:
+                        self._cond.wait()
+                    else:
+                        timeout = next_sync_time - time.time()
+                        if timeout <= 0:
+                            break
+                        self._cond.wait(timeout)
+                items = list(self._queue)
+                self._queue.clear()
+                closing = self._closing
+                # Wake up the blocked writers.
+                self._cond.notify_all()
+            try:
+                if items:
+                    self._write_batch(items)
+                if (next_sync_time is not None
+                        and time.time() >= next_sync_time):
+                    self._sync()
+                    self._num_syncs += 1
+                    next_sync_time = time.time() + self.fsync_interval
+            except Exception as e:
+                logger.exception('Error in writer {}'.format(
+                    self._thread.name))
+                self._error = e
+            with self._cond:
+                self._num_pending -= len(items)
+                if items:
+                    self._num_written += len(items)
+                    self._num_batches += 1
+                self._cond.notify_all()
+                if closing and not self._queue:
+                    break
+        try:
+            self._sync()
+            self._close()
+        except Exception as e:
+            logger.exception('Error closing writer {}'.format(
+                self._thread.name))
+            self._error = e
+
+
+class AsyncFileWriter(AsyncWriter):
+    """Writes strings or bytes to a file on a background thread.
+
+    Attributes:
+        filename (str): Path of the file.
+    """
+
+    def __init__(self, filename, mode='w', **kwargs):
+        self.filename = filename
+        self._file = open(filename, mode)
+        super(AsyncFileWriter, self).__init__(
+            name='erdos-writer-{}'.format(filename), **kwargs)
+
+    def _write_batch(self, items):
+        self._file.write(items[0][:0].join(items))
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _close(self):
+        self._file.close()
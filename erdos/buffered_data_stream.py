@@ -0,0 +1,226 @@
+import threading
+import time
+
+from erdos.data_stream import DataStream
+
+# Policies applied when a message is received while the buffer is full.
+BUFFER_REJECT = 'reject'  # Drop the received message.
+BUFFER_EVICT = 'evict'  # Drop the oldest buffered message.
+
+
+class RingBuffer(object):
+    """Fixed-capacity FIFO buffer which supports blocking reads.
+
+    Attributes:
+        capacity (int): Maximum number of items in the buffer.
+        policy (str): BUFFER_REJECT or BUFFER_EVICT.
+        num_dropped (int): Number of items rejected or evicted.
+    """
+
+    def __init__(self, capacity, policy=BUFFER_REJECT):
+        if capacity <= 0:
+            raise ValueError('Buffer capacity must be positive')
+        if policy not in (BUFFER_REJECT, BUFFER_EVICT):
+            raise ValueError('Unknown buffer policy {}'.format(policy))
+        self.capacity = capacity
+        self.policy = policy
+        self.num_dropped = 0
+        self._items = [None] * capacity
+        self._head = 0
+        self._size = 0
+        self._closed = False
+        self._not_empty = threading.Condition()
+
+    def __len__(self):
+        return self._size
+
+    def put(self, item):
+        """Adds an item. Returns False if the item was rejected."""
+        with self._not_empty:
+            if self._size == self.capacity:
+                self.num_dropped += 1
+                if self.policy == BUFFER_REJECT:
+                    return False
+                self._pop()
+            self._items[(self._head + self._size) % self.capacity] = item
+            self._size += 1
+            self._not_empty.notify()
+            return True
+
+    def get(self, block=True, timeout=None):
+        """Removes and returns the oldest item.
+
+        Returns None if the buffer is empty and block is False, the timeout
+        expired, or the buffer is closed.
+        """
+        with self._not_empty:
+            if not self._wait(block, timeout):
+                return None
+            return self._pop()
+
+    def get_many(self, n, block=True, timeout=None):
+        """Removes and returns up to n of the oldest items.
+
+        If block is True, waits until at least one item is available.
+        """
+        with self._not_empty:
+            if not self._wait(block, timeout):
+                return []
+            return [self._pop() for _ in range(min(n, self._size))]
+
+    def close(self):
+        """Wakes up the blocked readers. Buffered items can still be read."""
+        with self._not_empty:
+            self._closed = True
+            self._not_empty.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def _wait(self, block, timeout):
+        """Waits for an item. Returns False if the buffer remains empty."""
+        if block and timeout is not None:
+            end_time = time.time() + timeout
+        while self._size == 0:
+            if not block or self._closed:
+                return False
+            if timeout is None:
+                self._not_empty.wait()
+            else:
+                remaining = end_time - time.time()
+                if remaining <= 0:
+                    return False
+                self._not_empty.wait(remaining)
+        return True
+
+    def _pop(self):
+        item = self._items[self._head]
+        self._items[self._head] = None
+        self._head = (self._head + 1) % self.capacity
+        self._size -= 1
+        return item
+
+
+class BufferedDataStream(DataStream):
+    """Data stream that operators read from instead of receiving callbacks.
+
+    The messages received on the stream are stored in a bounded ring buffer,
+    and the receiving operator pulls them at its own rate (e.g., in a control
+    loop in `execute`). Watermarks are not buffered; they are handled as on
+    any other stream. The stream is closed when it receives the end-of-stream
+    watermark, after which `has_next` returns False once the buffer is
+    empty.
+
+    Attributes:
+        buffer_size (int): Maximum number of buffered messages.
+        buffer_policy (str): What to do with the messages received when the
+            buffer is full: BUFFER_REJECT drops them, BUFFER_EVICT drops the
+            oldest buffered message.
+    """
+
+    def __init__(self,
+                 data_type=None,
+                 name="",
+                 labels=None,
+                 callbacks=None,
+                 completion_callbacks=None,
+                 uid=None,
+                 buffer_size=100,
+                 buffer_policy=BUFFER_REJECT,
+                 **kwargs):
+        super(BufferedDataStream, self).__init__(
+            data_type=data_type,
+            name=name,
+            labels=labels,
+            callbacks=callbacks,
+            completion_callbacks=completion_callbacks,
+            uid=uid,
+            **kwargs)
+        if buffer_policy not in (BUFFER_REJECT, BUFFER_EVICT):
+            raise ValueError('Unknown buffer policy {}'.format(buffer_policy))
+        self.buffer_size = buffer_size
+        self.buffer_policy = buffer_policy
+        # The backend stream which delivers the messages.
+        self._input_stream = None
+        # Created in setup, because locks cannot be sent to Ray actors.
+        self._buffer = None
+
+    def size(self):
+        """Returns the number of buffered messages."""
+        if self._buffer is None:
+            return 0
+        return len(self._buffer)
+
+    def next(self, block=True, timeout=None):
+        """Returns the oldest buffered message.
+
+        Args:
+            block (bool): Wait for a message if the buffer is empty.
+            timeout (float): Maximum time to wait, in seconds.
+
+        Returns:
+            (Message): The message, or None if no message is available.
+        """
+        return self._buffer.get(block, timeout)
+
+    def next_many(self, n, block=True, timeout=None):
+        """Returns up to n of the oldest buffered messages.
+
+        If block is True, waits until at least one message is available.
+        """
+        return self._buffer.get_many(n, block, timeout)
+
+    def has_next(self):
+        """Returns False once the stream is closed and its buffer empty."""
+        return not self._buffer.closed or self.size() > 0
+
+    def close(self):
+        """Closes the stream, waking up the operator if it waits on next."""
+        self._buffer.close()
+
+    def put(self, msg):
+        """Buffers a received message. Returns False if it was rejected."""
+        return self._buffer.put(msg)
+
+    def bind(self, input_stream):
+        """Receives messages through a backend input stream.
+
+        Returns:
+            (BufferedDataStream): The stream the operator reads from.
+        """
+        self._input_stream = input_stream
+        return self
+
+    def setup(self):
+        self._buffer = RingBuffer(self.buffer_size, self.buffer_policy)
+        if self._input_stream is not None:
+            self._input_stream.setup()
+
+    def _copy_stream(self):
+        """Transforms the OutputStream into an InputStream"""
+        # Imported here because operators import streams.
+        from erdos.op import Op
+        callbacks = self.callbacks.copy()
+        callbacks.add(Op._buffer_msg)
+        return BufferedDataStream(
+            data_type=self.data_type,
+            name=self.name,
+            labels=self.labels.copy(),
+            callbacks=callbacks,
+            uid=self.uid,
+            buffer_size=self.buffer_size,
+            buffer_policy=self.buffer_policy,
+            batch_size=self.batch_size,
+            batch_timeout_ms=self.batch_timeout_ms,
+            zero_copy_threshold=self.zero_copy_threshold,
+            max_queue_size=self.max_queue_size,
+            overflow_policy=self.overflow_policy)
+
+
+def bind_input_stream(data_stream, input_stream):
+    """Returns the stream an operator uses to receive data_stream's messages
+    through the backend stream input_stream."""
+    if isinstance(data_stream, BufferedDataStream):
+        return data_stream.bind(input_stream)
+    return input_stream
@@ -1,3 +1,22 @@
+# Policies applied when a message is received on an input stream whose queue
+# is full.
+# Block the sender until the operator processes a message. Only the local
+# backend blocks, and only the threads that do not run operator callbacks
+# (e.g., the threads running Op.execute): callbacks add their messages
+# beyond the bound, which the queue's num_over_bound metric counts. Ray
+# actor calls never wait for the receiving actor, so the Ray backend does
+# not bound queues with this policy, and warns about them.
+OVERFLOW_BLOCK = 'block'
+OVERFLOW_DROP_OLDEST = 'drop_oldest'  # Drop the oldest queued message.
+OVERFLOW_DROP_NEWEST = 'drop_newest'  # Drop the received message.
+# Keep only the latest message of each timestamp. A message replaces the
+# queued message with the same timestamp, and the oldest message is dropped
+# if the queue is full.
+OVERFLOW_LATEST_PER_TIMESTAMP = 'latest_per_timestamp'
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST,
+                     OVERFLOW_DROP_NEWEST, OVERFLOW_LATEST_PER_TIMESTAMP)
+
+
 class DataStream(object):
     """Data stream base class.
 
@@ -6,6 +25,22 @@ class DataStream(object):
             ROS subscribers and publishers must specify a data type.
         name (str): A unique string naming the stream.
         labels (dict: str -> str): Describes properties of the data stream.
+        batch_size (int): Maximum number of messages the Ray backend groups
+            into a single actor call. 1 disables batching.
+        batch_timeout_ms (int): Maximum time in ms a message can wait in a
+            partial batch. If None, partial batches are only sent when a
+            watermark is sent or when the stream is flushed.
+        zero_copy_threshold (int): Size in bytes above which the Ray backend
+            puts NumPy message data in the object store once and sends only
+            its reference to the sink operators. None disables the transfer
+            through the object store.
+        max_queue_size (int): Maximum number of messages received on the
+            stream that can wait for the receiving operator's callbacks. If
+            None, the backend's default applies. 0 disables the bound. The
+            Ray backend has no default, and ignores the bound with the
+            OVERFLOW_BLOCK policy (see OVERFLOW_BLOCK).
+        overflow_policy (str): Policy applied to the messages received when
+            the queue is full. One of the OVERFLOW_* constants.
     """
 
     def __init__(self,
@@ -14,11 +49,20 @@ class DataStream(object):
                  labels=None,
                  callbacks=None,
                  completion_callbacks=None,
-                 uid=None):
+                 uid=None,
+                 batch_size=1,
+                 batch_timeout_ms=None,
+                 zero_copy_threshold=1024 * 1024,
+                 max_queue_size=None,
+                 overflow_policy=OVERFLOW_BLOCK):
         self.name = name if name else "{0}_{1}".format(self.__class__.__name__,
                                                        hash(self))
         self.data_type = data_type
         self._uid = uid
+        self.batch_size = batch_size
+        self.batch_timeout_ms = batch_timeout_ms
+        self.zero_copy_threshold = zero_copy_threshold
+        self.set_queue_policy(max_queue_size, overflow_policy)
 
         if labels:  # both keys and values in a label must be a single string
             for k, v in labels.items():
@@ -55,6 +99,23 @@ class DataStream(object):
         """
         self.completion_callbacks.add(on_watermark_cb)
 
+    def set_queue_policy(self, max_queue_size,
+                         overflow_policy=OVERFLOW_BLOCK):
+        """Bounds the queue of messages received on the stream.
+
+        Operators call it on their input streams in setup_streams.
+
+        Args:
+            max_queue_size (int): Maximum number of queued messages. None
+                applies the backend's default, and 0 disables the bound.
+            overflow_policy (str): One of the OVERFLOW_* constants.
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(
+                'Unknown overflow policy {}'.format(overflow_policy))
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+
     def send(self, msg):
         """Send a message on the stream.
 
@@ -63,6 +124,13 @@ class DataStream(object):
         """
         raise NotImplementedError("DataStream does not implement send.")
 
+    def flush(self):
+        """Sends the messages buffered by a batched stream.
+
+        No-op for streams that do not batch messages.
+        """
+        pass
+
     def setup(self):
         """Configures how this stream communicate with other streams"""
         raise NotImplementedError("DataStream does not implement setup.")
@@ -74,7 +142,12 @@ class DataStream(object):
             name=self.name,
             labels=self.labels.copy(),
             callbacks=self.callbacks.copy(),
-            uid=self.uid)
+            uid=self.uid,
+            batch_size=self.batch_size,
+            batch_timeout_ms=self.batch_timeout_ms,
+            zero_copy_threshold=self.zero_copy_threshold,
+            max_queue_size=self.max_queue_size,
+            overflow_policy=self.overflow_policy)
 
     def get_label(self, key):
         """
@@ -1,3 +1,6 @@
+from erdos.data_stream import OVERFLOW_BLOCK
+
+
 class DataStreams(object):
     def __init__(self, streams):
         self._streams = streams
@@ -78,6 +81,16 @@ class DataStreams(object):
             stream.add_completion_callback(callback_func)
         return self
 
+    def set_queue_policy(self, max_queue_size, overflow_policy=OVERFLOW_BLOCK):
+        """Bounds the queues of messages received on all data streams.
+
+        Returns:
+            (DataStreams): selected data streams.
+        """
+        for stream in self._streams:
+            stream.set_queue_policy(max_queue_size, overflow_policy)
+        return self
+
     def __len__(self):
         """ Returns the length of the DataStreams. """
         return len(self._streams)
@@ -0,0 +1,301 @@
+import csv
+import logging
+import struct
+import threading
+import time
+
+import numpy as np
+
+from erdos.timestamp import TOP_TIMESTAMP
+from erdos.timestamp import is_top_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Event kinds.
+EVENT_SEND = 0
+EVENT_RECEIVE = 1
+EVENT_WATERMARK_SEND = 2
+EVENT_WATERMARK_RECEIVE = 3
+# Events logged by operators.
+EVENT_CUSTOM = 4
+
+EVENT_NAMES = {
+    EVENT_SEND: 'send',
+    EVENT_RECEIVE: 'receive',
+    EVENT_WATERMARK_SEND: 'watermark send',
+    EVENT_WATERMARK_RECEIVE: 'receive watermark',
+    EVENT_CUSTOM: 'custom',
+}
+
+# Number of timestamp coordinates stored in a record. Extra coordinates are
+# truncated.
+MAX_COORDINATES = 2
+
+# Record flags.
+# The timestamp is the end-of-stream timestamp, which has no coordinates in
+# the record.
+TOP_TIMESTAMP_FLAG = 1
+
+# Fixed-width trace record. The operator and stream ids index the trace's
+# name table.
+TRACE_RECORD_DTYPE = np.dtype([
+    ('time_ns', '<u8'),
+    ('op_id', '<u2'),
+    ('stream_id', '<u2'),
+    ('kind', 'u1'),
+    ('num_coordinates', 'u1'),
+    ('flags', 'u1'),
+    ('padding', 'V1'),
+    ('coordinates', '<i8', (MAX_COORDINATES, )),
+])
+_RECORD = struct.Struct('<QHHBBBx{}q'.format(MAX_COORDINATES))
+_PADDING = (0, ) * MAX_COORDINATES
+
+# Trace layout:
+#   file header: magic, version, wall time and monotonic time in ns at
+#       which the trace started
+#   blocks: block header (kind, size), followed by its data. Name blocks
+#       contain newline-separated UTF-8 names, whose ids follow the ids of
+#       the previous names. Record blocks contain TRACE_RECORD_DTYPE records.
+_MAGIC = b'ERDOSTRC'
+_VERSION = 1
+_FILE_HEADER = struct.Struct('<8sBqQ')
+_BLOCK_HEADER = struct.Struct('<BI')
+_NAMES_BLOCK = 0
+_RECORDS_BLOCK = 1
+
+if hasattr(time, 'monotonic_ns'):
+    _monotonic_ns = time.monotonic_ns
+else:
+
+    def _monotonic_ns():
+        return int(time.time() * 1e9)
+
+
+class TraceWriter(object):
+    """Records events in a preallocated ring buffer, which a background
+    thread flushes to a trace file.
+
+    Events are dropped if the buffer is full, so that recording an event
+    never blocks.
+
+    Attributes:
+        filename (str): Path of the trace.
+        capacity (int): Number of records in the ring buffer.
+        flush_interval (float): Interval in seconds between two flushes. If
+            None, the buffer is flushed when it is half full and on close.
+        num_dropped (int): Number of events dropped because the buffer was
+            full.
+    """
+
+    def __init__(self, filename, capacity=65536, flush_interval=0.1):
+        self.filename = filename
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.num_dropped = 0
+        self._records = bytearray(capacity * _RECORD.size)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        # Total number of records written and flushed.
+        self._num_written = 0
+        self._num_flushed = 0
+        self._ids = {}
+        self._new_names = []
+        self._closed = False
+        self._file = open(filename, 'wb')
+        self._file.write(
+            _FILE_HEADER.pack(_MAGIC, _VERSION, int(time.time() * 1e9),
+                              _monotonic_ns()))
+        self._thread = threading.Thread(
+            target=self._run, name='erdos-trace-{}'.format(filename))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def record(self, op_name, kind, stream_name, timestamp):
+        """Records an event about a message with the given timestamp, which
+        happens now."""
+        time_ns = _monotonic_ns()
+        flags = 0
+        coordinates = timestamp.coordinates
+        if is_top_timestamp(timestamp):
+            flags = TOP_TIMESTAMP_FLAG
+            coordinates = ()
+        num_coordinates = min(len(coordinates), MAX_COORDINATES)
+        if len(coordinates) != MAX_COORDINATES:
+            coordinates = (coordinates[:MAX_COORDINATES] +
+                           _PADDING[len(coordinates):])
+        with self._lock:
+            num_buffered = self._num_written - self._num_flushed
+            if num_buffered >= self.capacity:
+                self.num_dropped += 1
+                return
+            op_id = self._ids.get(op_name)
+            if op_id is None:
+                op_id = self._add_name(op_name)
+            stream_id = self._ids.get(stream_name)
+            if stream_id is None:
+                stream_id = self._add_name(stream_name)
+            _RECORD.pack_into(
+                self._records,
+                (self._num_written % self.capacity) * _RECORD.size, time_ns,
+                op_id, stream_id, kind, num_coordinates, flags,
+                *coordinates)
+            self._num_written += 1
+        if (self.flush_interval is None
+                and num_buffered + 1 == self.capacity // 2):
+            self._wakeup.set()
+
+    def flush(self):
+        """Writes the buffered records."""
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            num_written = self._num_written
+            names = self._new_names
+            self._new_names = []
+        # The records between the flushed and written counters are not
+        # modified until they are flushed.
+        blocks = []
+        if names:
+            data = '\n'.join(names).encode('utf-8')
+            blocks += [_BLOCK_HEADER.pack(_NAMES_BLOCK, len(data)), data]
+        start = (self._num_flushed % self.capacity) * _RECORD.size
+        num_records = num_written - self._num_flushed
+        if num_records > 0:
+            end = start + num_records * _RECORD.size
+            if end <= len(self._records):
+                records = bytes(self._records[start:end])
+            else:
+                records = bytes(self._records[start:] +
+                                self._records[:end - len(self._records)])
+            blocks += [
+                _BLOCK_HEADER.pack(_RECORDS_BLOCK, len(records)), records
+            ]
+        if blocks:
+            self._file.write(b''.join(blocks))
+            self._file.flush()
+        with self._lock:
+            self._num_flushed = num_written
+
+    def close(self):
+        """Flushes the records and closes the trace. Can be called several
+        times."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+        self._file.close()
+        if self.num_dropped:
+            logger.warning('Dropped {} events from trace {}'.format(
+                self.num_dropped, self.filename))
+
+    def _add_name(self, name):
+        """Adds a name to the name table. Must hold the lock."""
+        name_id = len(self._ids)
+        self._ids[name] = name_id
+        self._new_names.append(name)
+        return name_id
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._closed:
+                return
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Error flushing trace {}'.format(
+                    self.filename))
+
+
+def read_trace(filename):
+    """Reads a trace.
+
+    Returns:
+        (list of str, numpy.ndarray, int): The name table, the records with
+        dtype TRACE_RECORD_DTYPE, and the offset in ns to add to the
+        records' times to get the wall time.
+    """
+    names = []
+    blocks = []
+    with open(filename, 'rb') as f:
+        data = f.read()
+    (magic, version, wall_time_ns,
+     monotonic_time_ns) = _FILE_HEADER.unpack_from(data, 0)
+    if magic != _MAGIC:
+        raise ValueError('{} is not an ERDOS trace'.format(filename))
+    if version != _VERSION:
+        raise ValueError('Unsupported trace version {}'.format(version))
+    offset = _FILE_HEADER.size
+    while offset + _BLOCK_HEADER.size <= len(data):
+        (kind, size) = _BLOCK_HEADER.unpack_from(data, offset)
+        offset += _BLOCK_HEADER.size
+        if offset + size > len(data):
+            # Truncated block.
+            break
+        if kind == _NAMES_BLOCK:
+            names.extend(
+                data[offset:offset + size].decode('utf-8').split('\n'))
+        else:
+            blocks.append(
+                np.frombuffer(data, dtype=TRACE_RECORD_DTYPE,
+                              count=size // TRACE_RECORD_DTYPE.itemsize,
+                              offset=offset))
+        offset += size
+    if blocks:
+        records = np.concatenate(blocks)
+    else:
+        records = np.zeros(0, dtype=TRACE_RECORD_DTYPE)
+    return (names, records, wall_time_ns - monotonic_time_ns)
+
+
+def _iter_rows(filename):
+    """Yields the (operator, time in seconds, coordinates, event) of the
+    events of a trace."""
+    (names, records, offset_ns) = read_trace(filename)
+    for record in records:
+        if record['flags'] & TOP_TIMESTAMP_FLAG:
+            coordinates = list(TOP_TIMESTAMP.coordinates)
+        else:
+            coordinates = [
+                int(c)
+                for c in record['coordinates'][:record['num_coordinates']]
+            ]
+        event = '{} {}'.format(EVENT_NAMES[record['kind']],
+                               names[record['stream_id']])
+        yield (names[record['op_id']],
+               (int(record['time_ns']) + offset_ns) / 1e9, coordinates, event)
+
+
+def trace_to_csv(filename, csv_filename):
+    """Converts a trace to the CSV format of the text event logs: operator,
+    wall time, timestamp, event."""
+    with open(csv_filename, 'w') as csv_file:
+        writer = csv.writer(csv_file)
+        for (op_name, event_time, coordinates, event) in _iter_rows(filename):
+            writer.writerow([op_name, event_time, coordinates, event])
+
+
+def trace_to_dataframe(filename):
+    """Returns a pandas DataFrame with a row per event."""
+    import pandas as pd
+    (names, records, offset_ns) = read_trace(filename)
+    names = np.array(names, dtype=object)
+    columns = {
+        'op': names[records['op_id']],
+        'stream': names[records['stream_id']],
+        'kind': [EVENT_NAMES[kind] for kind in records['kind']],
+        'time': (records['time_ns'].astype(np.int64) + offset_ns) / 1e9,
+        'top_timestamp': (records['flags'] & TOP_TIMESTAMP_FLAG) != 0,
+    }
+    for i in range(MAX_COORDINATES):
+        columns['coordinate_{}'.format(i)] = np.where(
+            records['num_coordinates'] > i, records['coordinates'][:, i], -1)
+    return pd.DataFrame(columns)
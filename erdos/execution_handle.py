@@ -0,0 +1,171 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Interval in seconds at which the handle checks whether the operators ended.
+_POLL_INTERVAL = 0.05
+# Maximum number of seconds to wait for the Ray operators to close.
+_RAY_CLOSE_TIMEOUT = 10
+
+
+class ExecutionHandle(object):
+    """Handle to a graph executing in the background. Returned by
+    `Graph.execute_async`.
+
+    The execution finishes once every operator sent the end-of-stream
+    watermark. Source operators send it by calling `Op.send_end_of_stream`
+    once they sent all their messages, and the other operators send it once
+    they processed all the messages of their input streams. Hence, finishing
+    drains the graph. Operators without input and output streams are
+    ignored. ROS operators cannot report when they end, so ROS executions
+    finish once the operators' processes exit.
+
+    Attributes:
+        graph (Graph): The executing graph.
+        start_time (float): Time at which the operators started executing.
+        end_time (float): Time at which the last operator ended, or None if
+            the execution did not finish.
+    """
+
+    def __init__(self, graph, start_time):
+        self.graph = graph
+        self.start_time = start_time
+        self.end_time = None
+        self._stopped = False
+        self._unfinished_op_ids = set(
+            op_id for (op_id, op_handle) in graph.op_handles.items()
+            if op_handle.input_streams or op_handle.output_streams)
+        self._last_end_time = self.start_time
+        # Pending Ray tasks that return the operators' end times.
+        self._pending_end_times = {}
+
+    @property
+    def duration(self):
+        """Seconds the execution took to finish, or has been running for."""
+        if self.end_time is None:
+            return time.time() - self.start_time
+        return self.end_time - self.start_time
+
+    def is_finished(self):
+        """Returns True if all the operators ended. Does not block."""
+        if self.end_time is None and self._poll():
+            self.end_time = self._last_end_time
+        return self.end_time is not None
+
+    def wait(self, timeout=None):
+        """Waits until the execution finishes.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait. None to wait
+                until the execution finishes.
+
+        Returns:
+            (bool): True if the execution finished, False if the timeout
+            expired.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while not self.is_finished():
+            if deadline is None:
+                time.sleep(_POLL_INTERVAL)
+                continue
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            time.sleep(min(_POLL_INTERVAL, remaining))
+        return True
+
+    def stop(self, drain_timeout=0):
+        """Stops the execution, and frees its resources.
+
+        The operators are closed (see `Op.close`) before Ray actors are
+        killed, ROS processes are terminated, and once the local worker
+        threads finished their current task. Ray operators which do not
+        close within 10 seconds (e.g., because `Op.execute` still runs) are
+        killed anyway.
+
+        Args:
+            drain_timeout (float): Maximum number of seconds to wait for the
+                execution to finish before stopping it. None to wait until it
+                finishes, 0 to stop it immediately.
+
+        Returns:
+            (bool): True if the execution finished before it was stopped.
+        """
+        finished = self.wait(drain_timeout)
+        if self._stopped:
+            return finished
+        self._stopped = True
+        if not finished:
+            logger.warning('Stopping the execution of graph {} before '
+                           'operators {} ended'.format(
+                               self.graph.graph_name,
+                               sorted(self._unfinished_op_ids)))
+        executor_handles = [
+            op_handle.executor_handle
+            for op_handle in self.graph.op_handles.values()
+            if op_handle.executor_handle is not None
+        ]
+        if self.graph.framework == 'ray':
+            import ray
+            close_ids = [ray_op.close.remote() for ray_op in executor_handles]
+            (_, unclosed_ids) = ray.wait(close_ids,
+                                         num_returns=len(close_ids),
+                                         timeout=_RAY_CLOSE_TIMEOUT)
+            if unclosed_ids:
+                logger.warning('{} operators of graph {} did not close before '
+                               'they were killed'.format(
+                                   len(unclosed_ids), self.graph.graph_name))
+            for ray_op in executor_handles:
+                ray.kill(ray_op)
+        elif self.graph.framework == 'ros':
+            for proc in executor_handles:
+                proc.terminate()
+            for proc in executor_handles:
+                proc.join()
+        elif self.graph.framework == 'local':
+            for local_op in executor_handles:
+                local_op.stop()
+            self.graph._local_scheduler.stop()
+            for local_op in executor_handles:
+                local_op.close()
+        return finished
+
+    def _poll(self):
+        """Collects the end times of the operators which ended. Returns True
+        if all the operators ended."""
+        if not self._unfinished_op_ids:
+            return True
+        framework = self.graph.framework
+        op_handles = self.graph.op_handles
+        end_times = []
+        if framework == 'ros':
+            for op_id in self._unfinished_op_ids:
+                if not op_handles[op_id].executor_handle.is_alive():
+                    end_times.append((op_id, time.time()))
+        elif framework == 'ray':
+            import ray
+            for op_id in self._unfinished_op_ids:
+                if op_id not in self._pending_end_times:
+                    self._pending_end_times[op_id] = op_handles[
+                        op_id].executor_handle.get_end_time.remote()
+            op_ids = dict((object_id, op_id) for (op_id, object_id) in
+                          self._pending_end_times.items())
+            (ready_ids, _) = ray.wait(list(op_ids),
+                                      num_returns=len(op_ids),
+                                      timeout=0)
+            for object_id in ready_ids:
+                op_id = op_ids[object_id]
+                del self._pending_end_times[op_id]
+                end_time = ray.get(object_id)
+                if end_time is not None:
+                    end_times.append((op_id, end_time))
+        else:
+            for op_id in self._unfinished_op_ids:
+                end_time = op_handles[op_id].executor_handle.get_end_time()
+                if end_time is not None:
+                    end_times.append((op_id, end_time))
+        for (op_id, end_time) in end_times:
+            self._unfinished_op_ids.discard(op_id)
+            self._last_end_time = max(self._last_end_time, end_time)
+        return not self._unfinished_op_ids
@@ -0,0 +1,149 @@
+import copy
+import time
+
+from erdos.data_stream import DataStream
+from erdos.message import WatermarkMessage
+from erdos.op import Op
+from erdos.timestamp import is_top_timestamp
+
+
+class FusedOp(Op):
+    """Runs a chain of operators in a single executor.
+
+    Created by `Graph` for chains of fusable operators in which each
+    operator's output streams are only received by the next operator. The
+    fused operator receives the input streams of the first operator, and
+    sends on the output streams of the last operator. Messages and
+    watermarks flow between the operators of the chain through direct calls,
+    which apply the same watermark semantics as the backends: an operator's
+    completion callbacks run when its low watermark advances, and the
+    watermark flows automatically if the operator has no completion
+    callback for the stream.
+
+    Attributes:
+        ops (list of Op): The operators of the chain.
+    """
+
+    def __init__(self, name, op_handles):
+        super(FusedOp, self).__init__(name)
+        self.ops = []
+        # Callbacks of each operator, by stream uid.
+        self._callbacks = []
+        self._completion_callbacks = []
+        for (index, op_handle) in enumerate(op_handles):
+            op = op_handle.op_cls(op_handle.name, **op_handle.init_args)
+            callbacks = {}
+            completion_callbacks = {}
+            for stream in op_handle.input_streams:
+                callbacks[stream.uid] = [
+                    callback.__get__(op, type(op))
+                    for callback in stream.callbacks
+                ]
+                completion_callbacks[stream.uid] = [
+                    callback.__get__(op, type(op))
+                    for callback in stream.completion_callbacks
+                ]
+                op._watermark_frontier.add_stream(stream.uid)
+            if index + 1 < len(op_handles):
+                op._add_output_streams([
+                    FusedDataStream(self, index + 1, stream)
+                    for stream in op_handle.output_streams
+                ])
+            self.ops.append(op)
+            self._callbacks.append(callbacks)
+            self._completion_callbacks.append(completion_callbacks)
+
+    def on_msg(self, msg):
+        """Callback of the first operator's input streams."""
+        self._on_member_msg(0, msg)
+
+    def on_watermark(self, msg):
+        """Completion callback of the first operator's input streams. The
+        backend already computed the low watermark across them."""
+        self._complete(0, msg)
+
+    def send_end_of_stream(self):
+        """Ends the operators of the chain. The last operator sends the
+        end-of-stream watermark on the output streams."""
+        if self._ended:
+            return
+        self._ended = True
+        for op in self.ops:
+            op.send_end_of_stream()
+        self._end_time = time.time()
+
+    def close(self):
+        for op in self.ops:
+            op.close()
+
+    def _add_output_streams(self, output_streams):
+        super(FusedOp, self)._add_output_streams(output_streams)
+        self.ops[-1]._add_output_streams(output_streams)
+        for op in self.ops:
+            op.framework = self.framework
+
+    def _on_member_msg(self, index, msg):
+        for callback in self._callbacks[index].get(msg.stream_uid, []):
+            callback(msg)
+
+    def _on_member_watermark(self, index, msg):
+        low_watermark = self.ops[index]._watermark_frontier.update(
+            msg.stream_uid, msg.timestamp)
+        if low_watermark is None:
+            return
+        new_msg = WatermarkMessage(low_watermark)
+        new_msg.stream_uid = msg.stream_uid
+        self._complete(index, new_msg)
+
+    def _complete(self, index, msg):
+        """Runs the completion callbacks of an operator whose low watermark
+        advanced, and lets the watermark flow."""
+        op = self.ops[index]
+        callbacks = self._completion_callbacks[index].get(msg.stream_uid)
+        for callback in callbacks or []:
+            callback(msg)
+        if is_top_timestamp(msg.timestamp):
+            op.send_end_of_stream()
+        elif not callbacks:
+            watermark_msg = WatermarkMessage(msg.timestamp)
+            for output_stream in op.output_streams.values():
+                output_stream.send(watermark_msg)
+
+
+class FusedDataStream(DataStream):
+    """Stream between two operators of a `FusedOp`, which directly invokes
+    the callbacks of the receiving operator."""
+
+    def __init__(self, fused_op, receiver_index, data_stream):
+        super(FusedDataStream, self).__init__(
+            data_type=data_stream.data_type,
+            name=data_stream.name,
+            labels=data_stream.labels,
+            uid=data_stream.uid)
+        self._fused_op = fused_op
+        self._receiver_index = receiver_index
+
+    def send(self, msg):
+        # Operators may forward the message they received, which other
+        # receivers may share. Copy the envelope before renaming it.
+        msg = copy.copy(msg)
+        msg.stream_name = self.name
+        msg.stream_uid = self.uid
+        if isinstance(msg, WatermarkMessage):
+            self._fused_op._on_member_watermark(self._receiver_index, msg)
+        else:
+            self._fused_op._on_member_msg(self._receiver_index, msg)
+
+    def setup(self):
+        pass
+
+
+def get_fused_input_stream(data_stream):
+    """Returns a copy of an input stream of the first operator of a chain,
+    on which the `FusedOp` receives messages and watermarks."""
+    stream = data_stream._copy_stream()
+    stream.callbacks = set()
+    if data_stream.callbacks:
+        stream.callbacks.add(FusedOp.on_msg)
+    stream.completion_callbacks = set([FusedOp.on_watermark])
+    return stream
@@ -2,20 +2,75 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import atexit
+import collections
+import json
+import logging
 import subprocess
 import time
 from absl import flags
 
 from erdos.op_handle import OpHandle
 from erdos.graph_handle import GraphHandle
+from erdos.buffered_data_stream import BufferedDataStream
+from erdos.data_stream import OVERFLOW_BLOCK
 from erdos.data_streams import DataStreams
+from erdos.execution_handle import ExecutionHandle
+from erdos.fusion import FusedOp
+from erdos.fusion import get_fused_input_stream
+from erdos.latency_trace import get_latency_report
 from erdos.local.local_executor import LocalExecutor
+from erdos.metrics import dump_metrics
+from erdos.profiler import write_profile_report
+from erdos.serialization_stats import format_serialization_report
 from erdos.utils import log_graph_to_dot_file
 from erdos.operators import NoopOp
 
+logger = logging.getLogger(__name__)
+
 FLAGS = flags.FLAGS
 flags.DEFINE_string('ray_redis_address', '', 'Address of the Ray redis master')
 flags.DEFINE_bool('log_graph', False, 'True to enable graph dot file logging')
+flags.DEFINE_integer('local_num_workers', 4,
+                     'Number of threads running local operator callbacks')
+flags.DEFINE_integer('local_queue_size', 1000,
+                     'Default maximum number of pending messages per input '
+                     'stream of local operators. 0 for unbounded queues')
+flags.DEFINE_bool('inline_subgraphs', False,
+                  'True to connect the operators of subgraphs directly to the '
+                  'operators outside of them, instead of through the NoopOps '
+                  'at the subgraphs\' boundaries')
+flags.DEFINE_bool('fuse_operators', False,
+                  'True to run chains of fusable operators (e.g., MapOp, '
+                  'WhereOp) in a single executor. The fused operators are '
+                  'renamed after the chain (e.g., a+b)')
+flags.DEFINE_bool('enable_metrics', False,
+                  'True to record per-operator metrics (message counts, '
+                  'callback latencies, queue depths)')
+flags.DEFINE_string('metrics_file', '',
+                    'File to which the metrics are written when the driver '
+                    'exits. Requires --enable_metrics')
+flags.DEFINE_bool('trace_latency', False,
+                  'True to trace the path of messages through the operators')
+flags.DEFINE_string('latency_report_file', '',
+                    'File to which the end-to-end latency report is written '
+                    'when the driver exits. Requires --trace_latency')
+flags.DEFINE_bool('serialization_stats', False,
+                  'True to account for the size and serialization time of a '
+                  'sample of the messages sent on Ray and ROS streams')
+flags.DEFINE_float('profile_duration', 0,
+                   'If positive, profile the graph for this many seconds, '
+                   'write the profile report and return from execute')
+flags.DEFINE_integer('profile_num_timestamps', 0,
+                     'If positive, profile the graph until this many '
+                     'timestamps were traced, write the profile report and '
+                     'return from execute')
+flags.DEFINE_string('profile_report', 'erdos_profile.gv',
+                    'File to which the profile report is written. HTML if '
+                    'the file name ends with .html, dot otherwise')
+
+# Interval in seconds at which profiling checks whether to stop.
+_PROFILE_POLL_INTERVAL = 0.5
 
 
 class Graph(object):
@@ -45,6 +100,7 @@ class Graph(object):
         self.graph_handles = {}
         self.output_stream_to_op_id_sinks = {}
         self.framework = "ray"
+        self._local_scheduler = None
 
         # TODO(peter): fix this once the nested graph API switches to setup_streams
         self.input_op = self.add(NoopOp, name='input_op')
@@ -134,15 +190,47 @@ class Graph(object):
     def execute(self, framework=None):
         """Execute the current graph.
 
+        Blocks until the execution finishes (see `ExecutionHandle`), or, if
+        the profiling flags are set, until the graph was profiled.
+
+        Args:
+            framework (str): The name of the framework to use to execute the
+                operators. Either ROS, Ray or local. The local framework runs
+                all operators in the driver process.
+        """
+        profile = (FLAGS.profile_duration > 0
+                   or FLAGS.profile_num_timestamps > 0)
+        execution_handle = self.execute_async(framework)
+        if profile:
+            self._profile(FLAGS.profile_duration,
+                          FLAGS.profile_num_timestamps)
+            self.write_profile_report(FLAGS.profile_report)
+        else:
+            execution_handle.wait()
+
+    def execute_async(self, framework=None):
+        """Starts executing the current graph, and returns without waiting
+        for the execution to finish.
+
         Args:
             framework (str): The name of the framework to use to execute the
-                operators. Either ROS or Ray.
+                operators. Either ROS, Ray or local.
+
+        Returns:
+            (ExecutionHandle): Handle to wait for the execution to finish
+            and to stop it.
         """
         # 0. Setup subgraphs
         self._flatten_subgraphs()
+        if FLAGS.inline_subgraphs:
+            # The graph's own input and output ops are removed as well.
+            self._remove_boundary_op(self.input_op)
+            self._remove_boundary_op(self.output_op)
 
         # 1. Build refined stream graph.
         self._build_refined_op_graph()
+        if FLAGS.fuse_operators:
+            self._fuse_operators()
 
         # 2. Initiate backend framework.
         if framework:
@@ -150,8 +238,24 @@ class Graph(object):
         self._init_frameworks()
 
         # 3. Set the execution framework on each operator handle.
+        profile = (FLAGS.profile_duration > 0
+                   or FLAGS.profile_num_timestamps > 0)
+        if profile and self.framework == 'ros':
+            raise Exception('Profiling is not supported by the ros framework')
+        self._warn_ignored_queue_bounds()
         for op_id, op_handle in self.op_handles.items():
             op_handle.framework = self.framework
+            op_handle.enable_metrics = FLAGS.enable_metrics or profile
+            op_handle.trace_latency = FLAGS.trace_latency or profile
+            op_handle.serialization_stats = FLAGS.serialization_stats
+        if FLAGS.enable_metrics and FLAGS.metrics_file:
+            atexit.register(self.dump_metrics, FLAGS.metrics_file)
+        if FLAGS.serialization_stats and self.framework == 'ray':
+            # ROS operators log their report when their process shuts down.
+            atexit.register(self.log_serialization_report)
+        if FLAGS.trace_latency and FLAGS.latency_report_file:
+            atexit.register(self.dump_latency_report,
+                            FLAGS.latency_report_file)
 
         # 4. Logging
         if FLAGS.log_graph:
@@ -172,19 +276,180 @@ class Graph(object):
         for executor in executors:
             executor.op_handle._build_dependent_op_handles(
                 dependent_op_handles)
+        if self.framework == 'ray':
+            # Set up all the actors at once, and only start executing once
+            # all the receivers are ready. Startup costs a few round trips
+            # instead of a few round trips per operator.
+            import ray
+            ray.get([
+                object_id for executor in executors
+                for object_id in executor.setup_streams()
+            ])
+        elif self.framework == 'local':
+            # Set up all the operators before any starts sending messages.
+            for executor in executors:
+                executor.setup_streams()
+        start_time = time.time()
+        for executor in executors:
             executor.execute()
 
-        # 9. Keep driver running.
-        if self.framework == "ros":
-            procs = list()
-            for op_handle in self.op_handles.values():
-                procs.append(op_handle.executor_handle)
-            for p in procs:
-                p.join()
+        return ExecutionHandle(self, start_time)
+
+    def get_metrics(self):
+        """Returns the metrics of the executing operators.
+
+        Requires the --enable_metrics flag, and the local or Ray framework.
+
+        Returns:
+            (dict of str -> dict): A mapping of operator id to a mapping of
+            metric name to the metric's current value.
+        """
+        return dict(self._call_executors('get_metrics'))
+
+    def dump_metrics(self, filename):
+        """Writes the metrics of the executing operators to a JSON file."""
+        dump_metrics(self.get_metrics(), filename)
+
+    def get_latency_report(self, sink_op_names=None):
+        """Returns the end-to-end latency of the timestamps traced through
+        the executing operators.
+
+        Requires the --trace_latency flag, and the local or Ray framework.
+        Traces are only comparable across machines if their clocks are
+        synchronized.
+
+        Args:
+            sink_op_names (list of str): Names or ids of the operators at
+                which the timestamps' paths end (e.g., the control operator).
+                All the operators if None.
+
+        Returns:
+            (dict): See `erdos.latency_trace.get_latency_report`. Operators
+            are identified by their ids, as in `get_metrics`.
+        """
+        hops = []
+        for (_, op_hops) in self._call_executors('get_latency_hops'):
+            hops.extend(op_hops)
+        # Operators trace hops under their uid, which differs from their id
+        # for the input operators of flattened subgraphs.
+        op_ids = dict((op_handle.get_uid(), op_id)
+                      for (op_id, op_handle) in self.op_handles.items())
+        if sink_op_names is not None:
+            sink_op_names = set(sink_op_names)
+            sink_op_names = [
+                op_handle.get_uid()
+                for (op_id, op_handle) in self.op_handles.items()
+                if op_id in sink_op_names or op_handle.name in sink_op_names
+            ]
+        report = get_latency_report(hops, sink_op_names)
+        report['operators'] = dict(
+            (op_ids.get(op_uid, op_uid), op_report)
+            for (op_uid, op_report) in report['operators'].items())
+        if 'critical_path' in report:
+            report['critical_path'] = [[
+                op_ids.get(sender, sender),
+                op_ids.get(receiver, receiver), stream_name
+            ] for (sender, receiver, stream_name) in report['critical_path']]
+        return report
+
+    def dump_latency_report(self, filename):
+        """Writes the end-to-end latency report to a JSON file."""
+        with open(filename, 'w') as f:
+            json.dump(self.get_latency_report(), f, indent=2, sort_keys=True)
+
+    def get_serialization_report(self):
+        """Returns the size and serialization time of the messages sent on
+        each stream of the executing Ray operators.
+
+        Requires the --serialization_stats flag.
+
+        Returns:
+            (list of dict): See `SerializationStats.get_report`.
+        """
+        if self.framework == 'local':
+            # Local operators pass messages by reference.
+            return []
+        report = []
+        for (_, op_report) in self._call_executors(
+                'get_serialization_report'):
+            report.extend(op_report)
+        return report
+
+    def log_serialization_report(self, top=10):
+        """Logs the streams with the highest serialized byte rates."""
+        logger.info(
+            format_serialization_report(self.get_serialization_report(), top))
+
+    def write_profile_report(self, filename):
+        """Writes a dot or HTML report of the graph annotated with the
+        operators' callback times, the streams' message and byte rates, and
+        the most frequent critical path.
+
+        Requires the --enable_metrics and --trace_latency flags, which
+        profiling enables.
+        """
+        write_profile_report(filename, list(self.op_handles.keys()),
+                             self._get_edges(), self.get_metrics(),
+                             self.get_latency_report())
+
+    def _warn_ignored_queue_bounds(self):
+        """Warns about the input stream queues that the Ray backend does not
+        bound, because they have the OVERFLOW_BLOCK policy."""
+        if self.framework != 'ray':
+            return
+        for (op_id, op_handle) in sorted(self.op_handles.items()):
+            for input_stream in op_handle.input_streams:
+                if (input_stream.max_queue_size
+                        and input_stream.overflow_policy == OVERFLOW_BLOCK):
+                    logger.warning(
+                        'The queue of stream {} of operator {} is unbounded: '
+                        'Ray senders cannot block, so the ray framework '
+                        'ignores max_queue_size with the {} policy'.format(
+                            input_stream.name, op_id, OVERFLOW_BLOCK))
+
+    def _profile(self, duration, num_timestamps):
+        """Waits until the graph ran for duration seconds, or until
+        num_timestamps timestamps were traced. Zero disables a bound."""
+        start_time = time.time()
+        while True:
+            time.sleep(_PROFILE_POLL_INTERVAL)
+            if duration > 0 and time.time() - start_time >= duration:
+                return
+            if num_timestamps > 0:
+                timestamps = set()
+                for (_, op_hops) in self._call_executors('get_latency_hops'):
+                    timestamps.update(hop.coordinates for hop in op_hops)
+                if len(timestamps) >= num_timestamps:
+                    return
+
+    def _call_executors(self, method_name):
+        """Calls a method of the executing operators' wrappers.
+
+        Returns:
+            (list of (str, object)): The operators' ids and the values they
+            returned, except None.
+        """
+        (op_ids, op_handles) = ([], [])
+        for (op_id, op_handle) in self.op_handles.items():
+            if op_handle.executor_handle is not None:
+                op_ids.append(op_id)
+                op_handles.append(op_handle)
+        if self.framework == 'ray':
+            import ray
+            results = ray.get([
+                getattr(op_handle.executor_handle, method_name).remote()
+                for op_handle in op_handles
+            ])
+        elif self.framework == 'local':
+            results = [
+                getattr(op_handle.executor_handle, method_name)()
+                for op_handle in op_handles
+            ]
         else:
-            # TODO(yika): FIX! Temporary solution to keep Ray master running.
-            while True:
-                time.sleep(5)
+            raise Exception('{} is not supported by the {} framework'.format(
+                method_name, self.framework))
+        return [(op_id, result) for (op_id, result) in zip(op_ids, results)
+                if result is not None]
 
     def _flatten_subgraphs(self):
         """Set up subgraphs"""
@@ -196,76 +461,248 @@ class Graph(object):
             subgraph._flatten_subgraphs()
             # Add child op handles
             self.op_handles.update(subgraph.op_handles)
-            # Point graph_id to child's input op
-            self.op_handles[graph_id] = self.op_handles.pop(subgraph.input_op)
+            if FLAGS.inline_subgraphs:
+                # Connect the operators that depend on the subgraph to the
+                # operators that depend on its input op, and the operators
+                # on which its output op depends to the operators that depend
+                # on the subgraph.
+                del self.op_handles[graph_id]
+                self._replace_dependant(graph_id, [subgraph.input_op])
+                self._remove_boundary_op(subgraph.input_op)
+                self._remove_boundary_op(subgraph.output_op)
+            else:
+                # Point graph_id to child's input op
+                self.op_handles[graph_id] = self.op_handles.pop(
+                    subgraph.input_op)
+
+    def _remove_boundary_op(self, op_id):
+        """Removes an input or output op, and connects its producers (the
+        operators that it depends on) directly to its consumers (the
+        operators that depend on it)."""
+        op_handle = self.op_handles.pop(op_id)
+        self._replace_dependant(op_id, [
+            dependant_id for dependant_id in op_handle.dependant_ops
+            if dependant_id != op_id
+        ])
+
+    def _replace_dependant(self, op_id, dependant_ids):
+        """Makes the operators that depend on op_id depend on dependant_ids
+        instead. An operator does not depend twice on the same operator
+        because of the replacement."""
+        for op_handle in self.op_handles.values():
+            if op_id not in op_handle.dependant_ops:
+                continue
+            dependant_ops = []
+            for dependant_id in op_handle.dependant_ops:
+                if dependant_id != op_id:
+                    dependant_ops.append(dependant_id)
+                    continue
+                dependant_ops.extend(
+                    new_id for new_id in dependant_ids
+                    if new_id not in op_handle.dependant_ops
+                    and new_id not in dependant_ops)
+            op_handle.dependant_ops = dependant_ops
 
     def _build_refined_op_graph(self):
         """Refines the operator graph.
 
-        Instantiates all data streams connecting operators. Repeatedly calls
-        each operator's `setup_streams` method until the data streams
-        converge.
+        Instantiates all data streams connecting operators. Calls the
+        operators' `setup_streams` methods until the data streams converge,
+        using a worklist: an operator is only set up again if the output
+        stream uids of one of the operators it depends on changed.
         """
-        not_converged = True
-        while not_converged:
-            not_converged = False
-            # If outputs of setup_streams() change, update output_streams.
-            for op_id, op_handle in self.op_handles.items():
-                current_input_streams = op_handle.input_streams
-                try:
-                    output_streams = op_handle.op_cls.setup_streams(
-                        DataStreams(current_input_streams),
-                        **op_handle.setup_args)
-                    for stream in output_streams:
-                        stream.uid = op_id
-                except TypeError as e:
-                    if len(e.args) > 0 and e.args[0].startswith(
-                            "setup_streams"):
-                        setup_streams_name = "{0}.setup_streams".format(
-                            op_handle.op_cls.__name__)
-                        first_arg = "{0}.{1}".format(op_handle.op_cls.__name__,
-                                                     e.args[0])
-                        e.args = (first_arg, ) + e.args[1:]
-                    raise
-                # Check if the returned output_streams has changed.
-                if self._different_output_streams(op_handle.output_streams,
-                                                  output_streams):
-                    not_converged = True
-                # Update output streams to reset registered sinks. Otherwise,
-                # we may end up with sinks that are added several times.
-                op_handle.output_streams = output_streams
-
-            # Empty input streams in order to ensure that we don't maintain
-            # inputs streams that are removed between iterations.
-            for op_id, op_handle in self.op_handles.items():
-                op_handle.input_streams = []
-            # We do this to break the reference cycle and ensure that the
-            # output data stream object of the upstream operator is different
-            # from the input data stream object of the downstream operator.
-            for op_id, op_handle in self.op_handles.items():
-                # Transform output streams into input streams.
+        # The producers of an operator, in the order in which their output
+        # streams are appended to its input streams. An operator that
+        # depends several times on a producer receives its streams as many
+        # times.
+        producers = dict((op_id, []) for op_id in self.op_handles)
+        for op_id, op_handle in self.op_handles.items():
+            for dependant_id in op_handle.dependant_ops:
+                producers[dependant_id].append(op_id)
+        output_uids = dict(
+            (op_id, frozenset(stream.uid
+                              for stream in op_handle.output_streams))
+            for op_id, op_handle in self.op_handles.items())
+        # Number of times each operator was set up, and the number of times
+        # its producers were set up when its input streams were copied.
+        num_setups = dict((op_id, 0) for op_id in self.op_handles)
+        input_versions = {}
+
+        worklist = collections.deque(self._get_topological_order())
+        queued = set(worklist)
+        while worklist:
+            op_id = worklist.popleft()
+            queued.discard(op_id)
+            op_handle = self.op_handles[op_id]
+            # Ensure that each operator receives a copy of the output
+            # streams as input streams. Otherwise, two operators that have
+            # the same output stream as input will work on a shared object.
+            # This object will contain the callbacks both operators
+            # register.
+            op_handle.input_streams = self._copy_input_streams(
+                producers[op_id])
+            input_versions[op_id] = [
+                num_setups[producer_id] for producer_id in producers[op_id]
+            ]
+            output_streams = self._setup_op_streams(op_handle)
+            for stream in output_streams:
+                stream.uid = op_id
+            num_setups[op_id] += 1
+            uids = frozenset(stream.uid for stream in output_streams)
+            changed = (len(output_streams) != len(op_handle.output_streams)
+                       or uids != output_uids[op_id])
+            op_handle.output_streams = output_streams
+            if changed:
+                output_uids[op_id] = uids
                 for dependant_id in op_handle.dependant_ops:
-                    # Ensure that each operator receives a copy of the output
-                    # streams as input streams. Otherwise, two operators that
-                    # have the same output stream as input will work on a shared
-                    # object. This object will contain the callbacks both
-                    # operators register.
-                    input_streams = [
-                        out_stream._copy_stream()
-                        for out_stream in op_handle.output_streams
-                    ]
-                    self.op_handles[
-                        dependant_id].input_streams += input_streams
-
-        # We must call setup_streams again after convergence to ensure that the
-        # callbacks that are added in setup_streams are added on the latest copy
-        # of the data streams.
+                    if dependant_id not in queued:
+                        queued.add(dependant_id)
+                        worklist.append(dependant_id)
+
+        # The callbacks added in setup_streams must be added on copies of
+        # the latest output streams. Set up again the operators whose
+        # producers were set up after their input streams were copied.
         for op_id, op_handle in self.op_handles.items():
-            op_handle.op_cls.setup_streams(
-                DataStreams(op_handle.input_streams), **op_handle.setup_args)
+            versions = [
+                num_setups[producer_id] for producer_id in producers[op_id]
+            ]
+            if input_versions[op_id] != versions:
+                op_handle.input_streams = self._copy_input_streams(
+                    producers[op_id])
+                self._setup_op_streams(op_handle)
 
         self._build_output_stream_sinks_graph()
 
+    def _fuse_operators(self):
+        """Replaces the chains of fusable operators with `FusedOp`s.
+
+        An operator is fused with the operator it depends on if both are
+        fusable, if it is the only operator that depends on it, and if it
+        depends on no other operator. Requires the refined operator graph.
+        """
+        producers = dict((op_id, []) for op_id in self.op_handles)
+        for op_id, op_handle in self.op_handles.items():
+            for dependant_id in op_handle.dependant_ops:
+                producers[dependant_id].append(op_id)
+
+        def can_fuse(producer_id, consumer_id):
+            producer = self.op_handles[producer_id]
+            consumer = self.op_handles[consumer_id]
+            return (producer.dependant_ops == [consumer_id]
+                    and producers[consumer_id] == [producer_id]
+                    and producer.machine == consumer.machine
+                    and producer.resources == consumer.resources)
+
+        # Maps the ids of the fused operators to the ids of their FusedOps.
+        fused_op_ids = {}
+        for op_id in self._get_topological_order():
+            if op_id in fused_op_ids or not self._is_fusable(op_id):
+                continue
+            if (len(producers[op_id]) == 1
+                    and self._is_fusable(producers[op_id][0])
+                    and can_fuse(producers[op_id][0], op_id)):
+                # The operator is not the first operator of its chain.
+                continue
+            chain = [op_id]
+            while len(self.op_handles[chain[-1]].dependant_ops) == 1:
+                consumer_id = self.op_handles[chain[-1]].dependant_ops[0]
+                if (consumer_id in chain or consumer_id in fused_op_ids
+                        or not self._is_fusable(consumer_id)
+                        or not can_fuse(chain[-1], consumer_id)):
+                    break
+                chain.append(consumer_id)
+            if len(chain) > 1:
+                fused_id = self._fuse_chain(chain, [
+                    fused_op_ids.get(producer_id, producer_id)
+                    for producer_id in producers[op_id]
+                ])
+                fused_op_ids.update((member_id, fused_id)
+                                    for member_id in chain)
+        if fused_op_ids:
+            self.output_stream_to_op_id_sinks = {}
+            self._build_output_stream_sinks_graph()
+
+    def _is_fusable(self, op_id):
+        op_handle = self.op_handles[op_id]
+        return (getattr(op_handle.op_cls, 'fusable', False) and
+                not any(isinstance(stream, BufferedDataStream)
+                        for stream in op_handle.input_streams))
+
+    def _fuse_chain(self, chain, producer_ids):
+        """Replaces the operators of a chain with a `FusedOp`, and returns
+        its id."""
+        op_handles = [self.op_handles[op_id] for op_id in chain]
+        (first, last) = (op_handles[0], op_handles[-1])
+        name = '+'.join(op_handle.name for op_handle in op_handles)
+        fused_handle = OpHandle(name, FusedOp, {'op_handles': op_handles},
+                                None, first.graph_name,
+                                machine=first.machine,
+                                resources=first.resources)
+        fused_id = fused_handle.get_uid()
+        assert fused_id not in self.op_handles, \
+            'Duplicate operator name {}'.format(fused_id)
+        fused_handle.input_streams = [
+            get_fused_input_stream(stream) for stream in first.input_streams
+        ]
+        fused_handle.output_streams = last.output_streams
+        fused_handle.dependant_ops = last.dependant_ops
+        for producer_id in producer_ids:
+            producer = self.op_handles[producer_id]
+            producer.dependant_ops = [
+                fused_id if dependant_id == chain[0] else dependant_id
+                for dependant_id in producer.dependant_ops
+            ]
+        for op_id in chain:
+            del self.op_handles[op_id]
+        self.op_handles[fused_id] = fused_handle
+        return fused_id
+
+    def _copy_input_streams(self, producer_ids):
+        return [
+            out_stream._copy_stream() for producer_id in producer_ids
+            for out_stream in self.op_handles[producer_id].output_streams
+        ]
+
+    def _setup_op_streams(self, op_handle):
+        """Calls the operator's setup_streams on its input streams, and
+        returns its output streams."""
+        try:
+            return op_handle.op_cls.setup_streams(
+                DataStreams(op_handle.input_streams), **op_handle.setup_args)
+        except TypeError as e:
+            if len(e.args) > 0 and e.args[0].startswith("setup_streams"):
+                first_arg = "{0}.{1}".format(op_handle.op_cls.__name__,
+                                             e.args[0])
+                e.args = (first_arg, ) + e.args[1:]
+            raise
+
+    def _get_topological_order(self):
+        """Returns the operator ids such that operators come after the
+        operators they depend on, except in cycles."""
+        visited = set()
+        postorder = []
+        for op_id in self.op_handles:
+            if op_id in visited:
+                continue
+            # Iterative depth-first search, so that long chains of operators
+            # do not exceed the recursion limit.
+            visited.add(op_id)
+            stack = [(op_id, iter(self.op_handles[op_id].dependant_ops))]
+            while stack:
+                (current_id, dependants) = stack[-1]
+                for dependant_id in dependants:
+                    if dependant_id not in visited:
+                        visited.add(dependant_id)
+                        dependant_handle = self.op_handles[dependant_id]
+                        stack.append((dependant_id,
+                                      iter(dependant_handle.dependant_ops)))
+                        break
+                else:
+                    stack.pop()
+                    postorder.append(current_id)
+        postorder.reverse()
+        return postorder
+
     def _build_output_stream_sinks_graph(self):
         # Create sink graph using only op names
         # sink is the op that an output stream is flowing in
@@ -287,13 +724,6 @@ class Graph(object):
             dependent_op_handles[stream_name] = list(handles)
         return dependent_op_handles
 
-    def _different_output_streams(self, output_stream1, output_stream2):
-        if len(output_stream1) != len(output_stream2):
-            return True
-        os_set1 = set([output_stream.uid for output_stream in output_stream1])
-        os_set2 = set([output_stream.uid for output_stream in output_stream2])
-        return len(os_set1.intersection(os_set2)) != len(os_set1)
-
     def _get_source_op_handles(self):
         src_op_handles = []
         for op_id, op_handle in self.op_handles.items():
@@ -311,11 +741,14 @@ class Graph(object):
 
     def _get_edges_helper(self, op_id, edges, visited):
         visited.add(op_id)
+        output_streams = self.op_handles[op_id].output_streams
         for dependant_op_id in self.op_handles[op_id].dependant_ops:
-            # TODO(ionel): Get the stream to which the dependant operator
-            # subscribers to so that the logged graph includes stream names
-            # as well.
-            edges.append((op_id, dependant_op_id, ""))
+            input_stream_uids = set(
+                stream.uid
+                for stream in self.op_handles[dependant_op_id].input_streams)
+            for stream in output_streams:
+                if stream.uid in input_stream_uids:
+                    edges.append((op_id, dependant_op_id, stream.name))
             if dependant_op_id not in visited:
                 self._get_edges_helper(dependant_op_id, edges, visited)
 
@@ -329,6 +762,8 @@ class Graph(object):
                 time.sleep(2)
         elif self.framework == "ray":
             self._init_ray()
+        elif self.framework == "local":
+            self._init_local()
 
     def _init_ray(self):
         import ray
@@ -339,6 +774,11 @@ class Graph(object):
                 redis_address=FLAGS.ray_redis_address)
             time.sleep(2)
 
+    def _init_local(self):
+        from erdos.local.local_scheduler import LocalScheduler
+        self._local_scheduler = LocalScheduler(FLAGS.local_num_workers)
+        self._local_scheduler.start()
+
     def _create_executors(self):
         visited = set([])
         executors = []
@@ -375,7 +815,8 @@ class Graph(object):
             ray_executor = RayExecutor(op_handle)
             return ray_executor
         elif self.framework == 'local':
-            return LocalExecutor(op_handle.name)
+            return LocalExecutor(op_handle, self._local_scheduler,
+                                 FLAGS.local_queue_size)
         else:
             raise Exception('Unexpected framework {}'.format(self.framework))
 
@@ -0,0 +1,230 @@
+import collections
+import itertools
+import threading
+import time
+
+import numpy as np
+
+
+class Hop(object):
+    """A message's passage through an operator.
+
+    The sender of a traced message attaches a pending hop, which only knows
+    its parent and send time, to the message. Each receiver completes its own
+    copy of the hop with the times at which the message was enqueued,
+    dequeued and processed by its callbacks. Times are wall times in seconds,
+    so that the hops recorded by operators running in different processes
+    can be compared.
+
+    Attributes:
+        hop_id (str): Unique id of the hop, or None if the hop is pending.
+        parent_id (str): Id of the hop in whose processing the message was
+            sent. None if the message was sent by a source.
+        sender_op_name (str): Name of the sending operator.
+        op_name (str): Name of the receiving operator.
+        stream_name (str): Name of the stream on which the message was sent.
+        coordinates (tuple): Coordinates of the message's timestamp.
+    """
+
+    __slots__ = ('hop_id', 'parent_id', 'sender_op_name', 'op_name',
+                 'stream_name',
+                 'coordinates', 'send_time', 'enqueue_time', 'dequeue_time',
+                 'callback_start_time', 'callback_end_time')
+
+    def __init__(self, parent_id, send_time):
+        self.hop_id = None
+        self.parent_id = parent_id
+        self.sender_op_name = None
+        self.op_name = None
+        self.stream_name = None
+        self.coordinates = None
+        self.send_time = send_time
+        self.enqueue_time = None
+        self.dequeue_time = None
+        self.callback_start_time = None
+        self.callback_end_time = None
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for (name, value) in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+
+class LatencyTracer(object):
+    """Records the hops of the traced messages an operator receives, and
+    attaches pending hops to the messages it sends.
+
+    A sent message is linked to the latest hop the operator started
+    processing for the message's timestamp. Thus, messages sent from a
+    callback are linked to the message being processed, and messages sent
+    after a timestamp's inputs are synchronized (e.g., in a watermark
+    callback) are linked to the input that arrived last, which is on the
+    critical path.
+
+    Attributes:
+        op_name (str): Name of the operator.
+        max_hops (int): Number of recorded hops which are kept.
+        max_timestamps (int): Number of timestamps for which the latest hop
+            is kept to link the messages sent.
+    """
+
+    def __init__(self, op_name, max_hops=100000, max_timestamps=1000):
+        self.op_name = op_name
+        self.max_hops = max_hops
+        self.max_timestamps = max_timestamps
+        self._hops = collections.deque(maxlen=max_hops)
+        self._latest_hop_ids = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hop_ids = itertools.count()
+
+    def on_send(self, timestamp):
+        """Returns the pending hop to attach to a message sent with the
+        given timestamp."""
+        with self._lock:
+            parent_id = self._latest_hop_ids.get(timestamp)
+        hop = Hop(parent_id, time.time())
+        hop.sender_op_name = self.op_name
+        return hop
+
+    def on_enqueue(self, msg):
+        """Returns the hop of a traced message received by the operator."""
+        hop = Hop(msg.trace.parent_id, msg.trace.send_time)
+        hop.enqueue_time = time.time()
+        hop.sender_op_name = msg.trace.sender_op_name
+        hop.hop_id = '{}/{}'.format(self.op_name, next(self._hop_ids))
+        hop.op_name = self.op_name
+        hop.stream_name = msg.stream_name
+        hop.coordinates = tuple(msg.timestamp.coordinates)
+        return hop
+
+    def on_dequeue(self, hop):
+        hop.dequeue_time = time.time()
+
+    def on_callback_start(self, msg, hop):
+        hop.callback_start_time = time.time()
+        with self._lock:
+            self._latest_hop_ids[msg.timestamp] = hop.hop_id
+            if len(self._latest_hop_ids) > self.max_timestamps:
+                self._latest_hop_ids.popitem(last=False)
+
+    def on_callback_end(self, hop):
+        hop.callback_end_time = time.time()
+        self._hops.append(hop)
+
+    def get_hops(self):
+        """Returns the completed hops, oldest first."""
+        return list(self._hops)
+
+
+def get_critical_paths(hops, sink_op_names=None):
+    """Rebuilds the critical path of each timestamp.
+
+    The critical path of a timestamp ends with the hop of the timestamp
+    whose callbacks completed last, and follows the hops' parents up to the
+    message sent by a source.
+
+    Args:
+        hops (list of Hop): Hops recorded by the operators.
+        sink_op_names (list of str): If set, the paths end at the hops of
+            these operators (e.g., the operator sending the control
+            commands).
+
+    Returns:
+        (dict of tuple -> list of Hop): A mapping of timestamp coordinates to
+        the hops of the critical path, from the source to the sink.
+    """
+    hops_by_id = {}
+    last_hops = {}
+    for hop in hops:
+        hops_by_id[hop.hop_id] = hop
+        if sink_op_names is not None and hop.op_name not in sink_op_names:
+            continue
+        last_hop = last_hops.get(hop.coordinates)
+        if (last_hop is None
+                or hop.callback_end_time > last_hop.callback_end_time):
+            last_hops[hop.coordinates] = hop
+    paths = {}
+    for (coordinates, hop) in last_hops.items():
+        path = [hop]
+        # Parents may be missing if they were evicted from the tracers.
+        while hop.parent_id in hops_by_id:
+            hop = hops_by_id[hop.parent_id]
+            path.append(hop)
+        path.reverse()
+        paths[coordinates] = path
+    return paths
+
+
+def _summarize(values):
+    values = np.array(values) * 1000
+    return {
+        'mean': float(np.mean(values)),
+        'p50': float(np.percentile(values, 50)),
+        'p99': float(np.percentile(values, 99)),
+        'max': float(np.max(values)),
+    }
+
+
+def get_latency_report(hops, sink_op_names=None):
+    """Aggregates the latencies of the timestamps' critical paths.
+
+    Along a critical path, the end-to-end latency of a timestamp splits into
+    the following contributions of each operator:
+        transit: from the send to the enqueue of the message.
+        queue: from the enqueue to the dequeue of the message.
+        dispatch: from the dequeue to the start of the callbacks (e.g., to
+            fetch the message's data from the Ray object store).
+        processing: from the start of the callbacks to the send of the next
+            message on the path, or to the end of the callbacks for the sink.
+
+    Args:
+        hops (list of Hop): Hops recorded by the operators.
+        sink_op_names (list of str): Operators at which the paths end. All
+            the operators if None.
+
+    Returns:
+        (dict): The number of paths, the end-to-end latency and the
+        per-operator contributions, with their mean, p50, p99 and max in ms.
+        The most frequent critical path is listed as (sender operator,
+        receiver operator, stream name) edges, with the fraction of the
+        timestamps whose critical path it is.
+    """
+    paths = get_critical_paths(hops, sink_op_names)
+    path_counts = collections.Counter(
+        tuple((hop.sender_op_name, hop.op_name, hop.stream_name)
+              for hop in path) for path in paths.values())
+    end_to_end = []
+    contributions = collections.defaultdict(
+        lambda: collections.defaultdict(list))
+    for path in paths.values():
+        end_to_end.append(path[-1].callback_end_time - path[0].send_time)
+        for (index, hop) in enumerate(path):
+            if index + 1 < len(path):
+                end_time = path[index + 1].send_time
+            else:
+                end_time = hop.callback_end_time
+            op_contributions = contributions[hop.op_name]
+            op_contributions['transit'].append(hop.enqueue_time -
+                                               hop.send_time)
+            op_contributions['queue'].append(hop.dequeue_time -
+                                             hop.enqueue_time)
+            op_contributions['dispatch'].append(hop.callback_start_time -
+                                                hop.dequeue_time)
+            op_contributions['processing'].append(end_time -
+                                                  hop.callback_start_time)
+    report = {'num_paths': len(paths), 'operators': {}}
+    if end_to_end:
+        report['end_to_end_ms'] = _summarize(end_to_end)
+        (critical_path, count) = path_counts.most_common(1)[0]
+        report['critical_path'] = [list(edge) for edge in critical_path]
+        report['critical_path_fraction'] = float(count) / len(paths)
+    for (op_name, op_contributions) in contributions.items():
+        op_report = {
+            'num_paths': len(op_contributions['processing']),
+        }
+        for (name, values) in op_contributions.items():
+            op_report['{}_ms'.format(name)] = _summarize(values)
+        report['operators'][op_name] = op_report
+    return report
@@ -1,7 +1,39 @@
-class LocalExecutor(object):
-    def __init__(self, op_name):
-        self.op_name = op_name
+import logging
+
+from erdos.executor import Executor
+from erdos.local.local_operator import LocalOperator
+
+logger = logging.getLogger(__name__)
+
+
+class LocalExecutor(Executor):
+    """Helper class to execute operators in the driver process.
+
+    Attributes:
+        scheduler (LocalScheduler): Thread pool shared by all local operators.
+        max_queue_size (int): Default bound on the queues of the operator's
+            input streams. 0 if unbounded.
+    """
+
+    def __init__(self, op_handle, scheduler, max_queue_size=0):
+        super(LocalExecutor, self).__init__(op_handle)
+        self.scheduler = scheduler
+        self.max_queue_size = max_queue_size
+
+    def setup(self):
+        local_op = LocalOperator(self.op_handle, self.scheduler,
+                                 self.max_queue_size)
+        self.op_handle.executor_handle = local_op
+
+    def setup_streams(self):
+        """Sets up the operator's streams. Requires the dependent operator
+        handles."""
+        local_op = self.op_handle.executor_handle
+        # Setup the input/output streams of the ERDOS operator.
+        local_op.setup_streams(self.op_handle.dependent_op_handles)
+        local_op.setup_frequency_actor()
 
     def execute(self):
-        # TODO(ionel): Implement!
-        pass
+        """Execute local operator. Requires the operator to be set up."""
+        logger.info('Executing {}'.format(self.op_handle.name))
+        self.op_handle.executor_handle.execute()
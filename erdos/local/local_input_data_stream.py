@@ -0,0 +1,21 @@
+from erdos.data_stream import DataStream
+
+
+class LocalInputDataStream(DataStream):
+    def __init__(self, local_op, data_stream):
+        super(LocalInputDataStream, self).__init__(
+            data_type=data_stream.data_type,
+            name=data_stream.name,
+            labels=data_stream.labels,
+            callbacks=data_stream.callbacks,
+            completion_callbacks=data_stream.completion_callbacks,
+            uid=data_stream.uid)
+        self._local_op = local_op
+
+    def setup(self):
+        for on_msg_callback in self.callbacks:
+            self._local_op.register_callback(self.uid, on_msg_callback)
+
+        for on_watermark_callback in self.completion_callbacks:
+            self._local_op.register_completion_callback(
+                self.uid, on_watermark_callback)
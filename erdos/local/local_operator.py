@@ -0,0 +1,299 @@
+import collections
+import copy
+import logging
+import threading
+
+from erdos.buffered_data_stream import bind_input_stream
+from erdos.event_trace import EVENT_RECEIVE
+from erdos.event_trace import EVENT_WATERMARK_RECEIVE
+from erdos.latency_trace import LatencyTracer
+from erdos.local.local_input_data_stream import LocalInputDataStream
+from erdos.local.local_output_data_stream import LocalOutputDataStream
+from erdos.message import WatermarkMessage
+from erdos.metrics import MetricsRegistry
+from erdos.stream_queue import StreamQueue
+from erdos.timestamp import is_top_timestamp
+from erdos.timer_wheel import FrequencyActor
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of tasks an operator runs before it yields its worker thread.
+_TASKS_PER_BATCH = 64
+
+
+class LocalOperator(object):
+    """Wraps an ERDOS operator that executes in the driver process.
+
+    Messages sent to the operator are appended to the bounded queue of their
+    input stream, and the callbacks are run by the threads of a shared
+    `LocalScheduler`.
+
+    Attributes:
+        _op: The ERDOS operator, which the wrapper owns.
+        _callbacks: A dict storing the callbacks associated to each stream.
+        _stream_queues: A dict storing the queue of each input stream.
+        _mailbox: Tasks waiting to be run by the scheduler.
+
+    If metrics are enabled, the wrapper records the latency of the callbacks
+    and the state of the input stream queues in the operator's
+    `MetricsRegistry`. If latency tracing is enabled, it records the hops of
+    the traced messages in the operator's `LatencyTracer`.
+    """
+
+    def __init__(self, op_handle, scheduler, max_queue_size=0):
+        # Init ERDOS operator.
+        try:
+            self._op = op_handle.op_cls(op_handle.name, **op_handle.init_args)
+            self._op.framework = op_handle.framework
+            if op_handle.enable_metrics:
+                self._op.metrics = MetricsRegistry(op_handle.name)
+            if op_handle.trace_latency:
+                self._op.latency_tracer = LatencyTracer(
+                    op_handle.get_uid())
+        except TypeError as e:
+            if len(e.args) > 0 and e.args[0].startswith("__init__"):
+                first_arg = "{0}.{1}".format(op_handle.op_cls.__name__,
+                                             e.args[0])
+                e.args = (first_arg, ) + e.args[1:]
+            raise
+        self.name = op_handle.name
+        self._input_streams = op_handle.input_streams
+        self._output_streams = op_handle.output_streams
+        self._scheduler = scheduler
+        self._max_queue_size = max_queue_size
+        self._callbacks = {}
+        self._completion_callbacks = {}
+        self._stream_queues = {}
+        self._mailbox = collections.deque()
+        self._mailbox_lock = threading.Lock()
+        self._scheduled = False
+        self._execute_thread = None
+
+    def on_msg_async(self, msg):
+        """Enqueues a message. Applies the overflow policy of the message's
+        stream if its queue is full.
+
+        The `OVERFLOW_BLOCK` policy only blocks threads that are not
+        scheduler workers, such as the threads running `Op.execute`.
+        Blocking a worker could deadlock the graph, e.g., if all the workers
+        send to the same full queue, or if an operator sends to itself.
+        """
+        if msg.trace is not None and self._op.latency_tracer is not None:
+            # The message is shared with the other receivers.
+            msg = copy.copy(msg)
+            msg.trace = self._op.latency_tracer.on_enqueue(msg)
+        queue = self._stream_queues.get(msg.stream_uid)
+        if queue is None:
+            self._enqueue(self.on_msg, msg)
+        elif (queue.put(msg, block=not self._scheduler.in_worker_thread())
+              and queue.schedule()):
+            self._enqueue(self._run_stream_queue, queue)
+
+    def on_completion_msg_async(self, msg):
+        """Enqueues a watermark after the queued messages of its stream."""
+        queue = self._stream_queues.get(msg.stream_uid)
+        if queue is None:
+            self._enqueue(self.on_completion_msg, msg)
+        else:
+            queue.put_watermark(msg)
+            if queue.schedule():
+                self._enqueue(self._run_stream_queue, queue)
+
+    def on_frequency(self, func_name, *args):
+        """Enqueues the invocation of a periodic method.
+        Called by the timer wheel, and never blocks.
+        """
+        self._enqueue(self._run_frequency, (func_name, args))
+
+    def on_msg(self, msg):
+        """Invokes corresponding callback for stream stream_name."""
+        tracer = self._op.latency_tracer
+        hop = msg.trace if tracer is not None else None
+        if hop is not None:
+            tracer.on_dequeue(hop)
+        self._op.trace_event(EVENT_RECEIVE, msg.stream_name, msg.timestamp)
+        if hop is not None:
+            tracer.on_callback_start(msg, hop)
+        for cb in self._callbacks.get(msg.stream_uid, []):
+            cb(msg)
+        if hop is not None:
+            tracer.on_callback_end(hop)
+
+    def on_completion_msg(self, msg):
+        """Invokes corresponding callback for stream stream_name."""
+        self._op.trace_event(EVENT_WATERMARK_RECEIVE, msg.stream_name,
+                             msg.timestamp)
+        self._op._close_buffered_stream(msg.stream_uid, msg.timestamp)
+
+        # Update the stream's high watermark. The watermark only flows if
+        # the low watermark across all input streams advanced.
+        low_watermark = self._op._watermark_frontier.update(
+            msg.stream_uid, msg.timestamp)
+        if low_watermark is None:
+            return
+        new_msg = WatermarkMessage(low_watermark)
+        new_msg.stream_uid = msg.stream_uid
+
+        # Call the required callbacks.
+        for cb in self._completion_callbacks.get(new_msg.stream_uid, []):
+            cb(new_msg)
+
+        # If no completion callbacks are found, let the watermarks flow
+        # automatically. If there is a completion callback, let the
+        # developer flow the watermarks. The end-of-stream watermark always
+        # flows, unless the callbacks already forwarded it.
+        if is_top_timestamp(low_watermark):
+            self._op.send_end_of_stream()
+        elif not self._completion_callbacks.get(new_msg.stream_uid):
+            watermark_msg = WatermarkMessage(low_watermark, msg.stream_name)
+            for output_stream in self._op.output_streams.values():
+                output_stream.send(watermark_msg)
+
+    def register_callback(self, stream_uid, callback):
+        """Registers a callback for a given stream."""
+        cbs = self._callbacks.get(stream_uid, [])
+        self._callbacks[stream_uid] = cbs + [
+            self._wrap_callback(stream_uid,
+                                callback.__get__(self._op, type(self._op)))
+        ]
+
+    def register_completion_callback(self, stream_uid, callback):
+        """Registers a watermark completion callback for a given stream."""
+        cbs = self._completion_callbacks.get(stream_uid, [])
+        self._completion_callbacks[stream_uid] = cbs + [
+            self._wrap_callback(stream_uid,
+                                callback.__get__(self._op, type(self._op)))
+        ]
+
+    def get_end_time(self):
+        """Returns the time at which the operator sent the end-of-stream
+        watermark, or None if it did not."""
+        return self._op._end_time
+
+    def stop(self):
+        """Stops running the operator's periodic methods."""
+        if self._op.freq_actor is not None:
+            self._op.freq_actor.cancel()
+
+    def close(self):
+        """Closes the operator. Invoked once its callbacks stopped running."""
+        self._op.close()
+
+    def get_queue_metrics(self):
+        """Returns the depth and drop counts of the input stream queues."""
+        return dict((stream_uid, queue.get_metrics())
+                    for (stream_uid, queue) in self._stream_queues.items())
+
+    def get_metrics(self):
+        """Returns the operator's metrics, or None if metrics are
+        disabled."""
+        if self._op.metrics is None:
+            return None
+        return self._op.metrics.snapshot()
+
+    def get_latency_hops(self):
+        """Returns the hops recorded by the operator's latency tracer, or
+        None if latency tracing is disabled."""
+        if self._op.latency_tracer is None:
+            return None
+        return self._op.latency_tracer.get_hops()
+
+    def _wrap_callback(self, stream_uid, callback):
+        if self._op.metrics is None:
+            return callback
+        return self._op.metrics.wrap_callback(callback, stream_uid)
+
+    def _add_queue_gauges(self):
+        if self._op.metrics is None:
+            return
+        for (stream_uid, queue) in self._stream_queues.items():
+            self._op.metrics.gauge('queue.{}'.format(stream_uid),
+                                   queue.get_metrics)
+
+    def setup_frequency_actor(self):
+        """Binds the operator's periodic methods to the timer wheel."""
+        self._op.freq_actor = FrequencyActor(self.on_frequency)
+
+    def setup_streams(self, dependant_ops_handles):
+        """Wraps the operator's streams in local data streams."""
+        # Track the watermarks of all the input streams.
+        for input_stream in self._input_streams:
+            self._op._watermark_frontier.add_stream(input_stream.uid)
+            max_queue_size = input_stream.max_queue_size
+            if max_queue_size is None:
+                max_queue_size = self._max_queue_size
+            self._stream_queues[input_stream.uid] = StreamQueue(
+                input_stream.name, max_queue_size,
+                input_stream.overflow_policy)
+        self._add_queue_gauges()
+
+        local_input_streams = [
+            bind_input_stream(input_stream,
+                              LocalInputDataStream(self, input_stream))
+            for input_stream in self._input_streams
+        ]
+        self._op._add_input_streams(local_input_streams)
+        local_output_streams = [
+            LocalOutputDataStream(
+                self._op, dependant_ops_handles.get(output_stream.uid, []),
+                output_stream) for output_stream in self._output_streams
+        ]
+        self._op._add_output_streams(local_output_streams)
+        self._op._internal_setup_streams()
+
+    def execute(self):
+        """Executes the operator in a dedicated thread.
+
+        `Op.execute` may loop forever (e.g., source operators), so it cannot
+        run on the scheduler's worker threads.
+        """
+        self._execute_thread = threading.Thread(
+            target=self._op.execute, name='erdos-local-{}'.format(self.name))
+        self._execute_thread.daemon = True
+        self._execute_thread.start()
+
+    def _run_frequency(self, func_and_args):
+        if self._op._ended:
+            # The periodic method was queued before the operator ended.
+            return
+        (func_name, args) = func_and_args
+        callback = getattr(self._op, func_name)
+        callback(*args)
+
+    def _run_stream_queue(self, queue):
+        """Processes the next entry of a queue. The task is then appended to
+        the mailbox again if the queue has more entries, so that the other
+        streams and the periodic methods are served in between."""
+        try:
+            msg = queue.get()
+            if isinstance(msg, WatermarkMessage):
+                self.on_completion_msg(msg)
+            elif msg is not None:
+                self.on_msg(msg)
+        finally:
+            if queue.reschedule():
+                self._enqueue(self._run_stream_queue, queue)
+
+    def _enqueue(self, handler, arg):
+        with self._mailbox_lock:
+            self._mailbox.append((handler, arg))
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._scheduler.schedule(self)
+
+    def _run_batch(self):
+        """Runs queued tasks. Invoked by one scheduler worker at a time."""
+        for _ in range(_TASKS_PER_BATCH):
+            with self._mailbox_lock:
+                if not self._mailbox:
+                    self._scheduled = False
+                    return
+                (handler, arg) = self._mailbox.popleft()
+            try:
+                handler(arg)
+            except Exception:
+                logger.exception('Error in operator {} while processing '
+                                 '{}'.format(self.name, arg))
+        # Yield the worker so that other operators make progress.
+        self._scheduler.schedule(self)
@@ -0,0 +1,45 @@
+import copy
+
+from erdos.data_stream import DataStream
+from erdos.event_trace import EVENT_SEND
+from erdos.event_trace import EVENT_WATERMARK_SEND
+from erdos.message import WatermarkMessage
+
+
+class LocalOutputDataStream(DataStream):
+    def __init__(self, op, dependant_op_handles, data_stream):
+        super(LocalOutputDataStream, self).__init__(
+            data_type=data_stream.data_type,
+            name=data_stream.name,
+            labels=data_stream.labels,
+            callbacks=data_stream.callbacks,
+            uid=data_stream.uid)
+        self._op = op
+        self._dependant_op_handles = dependant_op_handles
+
+    def send(self, msg):
+        """Send a message on the stream.
+        Enqueues the message in the mailboxes of the sink operators.
+        """
+        # Messages are passed by reference. Copy the envelope so that
+        # operators which forward a message they received do not rename it
+        # while other receivers are still processing it.
+        msg = copy.copy(msg)
+        msg.stream_name = self.name
+        msg.stream_uid = self.uid
+        if isinstance(msg, WatermarkMessage):
+            self._op.trace_event(EVENT_WATERMARK_SEND, self.name,
+                                 msg.timestamp)
+            for local_op in self._dependant_op_handles:
+                local_op.on_completion_msg_async(msg)
+        else:
+            self._op.trace_event(EVENT_SEND, self.name, msg.timestamp)
+            if self._op.metrics is not None:
+                self._op.metrics.on_send_data(self.name, msg.data)
+            if self._op.latency_tracer is not None:
+                msg.trace = self._op.latency_tracer.on_send(msg.timestamp)
+            for local_op in self._dependant_op_handles:
+                local_op.on_msg_async(msg)
+
+    def setup(self):
+        pass
@@ -0,0 +1,68 @@
+import logging
+import threading
+
+try:
+    import queue as queue
+except ImportError:
+    import Queue as queue
+
+logger = logging.getLogger(__name__)
+
+
+class LocalScheduler(object):
+    """Thread pool which runs the callbacks of local operators.
+
+    Operators are placed on a ready queue whenever their mailbox becomes
+    non-empty. Each worker thread pops an operator, runs a batch of its queued
+    tasks, and puts the operator back on the ready queue if it still has work.
+    An operator is never scheduled on two workers at the same time, so
+    callbacks of the same operator execute sequentially, like in a Ray actor.
+    Workers must never block waiting for other operators, as the operators
+    they wait for may need a worker to make progress.
+
+    Attributes:
+        num_workers (int): Number of worker threads.
+    """
+
+    def __init__(self, num_workers=4):
+        self.num_workers = num_workers
+        self._ready_ops = queue.Queue()
+        self._workers = []
+        self._thread_state = threading.local()
+
+    def start(self):
+        """Starts the worker threads."""
+        for index in range(self.num_workers):
+            worker = threading.Thread(
+                target=self._run, name='erdos-local-worker-{}'.format(index))
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self):
+        """Stops the worker threads once they finish their current task."""
+        for _ in self._workers:
+            self._ready_ops.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def schedule(self, local_op):
+        """Marks an operator as ready to process its mailbox."""
+        self._ready_ops.put(local_op)
+
+    def in_worker_thread(self):
+        """Returns True if the calling thread is one of the workers."""
+        return getattr(self._thread_state, 'is_worker', False)
+
+    def _run(self):
+        self._thread_state.is_worker = True
+        while True:
+            local_op = self._ready_ops.get()
+            if local_op is None:
+                return
+            try:
+                local_op._run_batch()
+            except Exception:
+                logger.exception('Unexpected error in operator {}'.format(
+                    local_op.name))
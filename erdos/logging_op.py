@@ -1,35 +1,48 @@
-try:
-    import queue as queue
-except ImportError:
-    import Queue as queue
+import atexit
 
+from erdos.event_trace import EVENT_CUSTOM
+from erdos.event_trace import TraceWriter
 from erdos.op import Op
 
 
 class LoggingOp(Op):
+    """Operator which traces the messages it sends and receives.
+
+    The events are written to {name}.trace in the binary format of
+    `erdos.event_trace`, which `trace_to_csv` and `trace_to_dataframe`
+    convert.
+
+    Args:
+        name (str): unique name for this operator.
+        buffer_logs (bool): if True, the events are only written when the
+            trace buffer is half full and when the operator closes.
+            Otherwise, they are written every 100ms.
+    """
+
     def __init__(self, name, buffer_logs=False):
         super(LoggingOp, self).__init__(name)
-        self._buffer_logs = buffer_logs
-        self._event_log_buffer = queue.Queue()
-        self._log_file = open('{}.log'.format(self.name), 'a+')
-
-    def __del__(self):
-        self.flush()
-        self._log_file.close()
+        self._trace_writer = TraceWriter(
+            '{}.trace'.format(self.name),
+            flush_interval=None if buffer_logs else 0.1)
+        # The trace is closed when the operator ends or its execution is
+        # stopped. Otherwise, write the buffered events when the process
+        # exits.
+        atexit.register(self.close)
 
     def flush(self):
-        while not self._event_log_buffer.empty():
-            (name, processing_time, timestamp,
-             log_message) = self._event_log_buffer.get()
-            self._log_file.write(name + ',' + str(processing_time) + ',' +
-                                 str(timestamp) + ',' + str(log_message) +
-                                 '\n')
+        """Writes the buffered events."""
+        self._trace_writer.flush()
+
+    def close(self):
+        """Writes the buffered events and closes the trace."""
+        self._trace_writer.close()
 
     def log_event(self, processing_time, timestamp, log_message=None):
-        if self._buffer_logs:
-            self._event_log_buffer.put((self.name, processing_time, timestamp,
-                                        log_message))
-        else:
-            self._log_file.write(self.name + ',' + str(processing_time) + ',' +
-                                 str(timestamp) + ',' + str(log_message) +
-                                 '\n')
+        """Records a custom event. log_message is stored as the event's
+        stream name, and processing_time is replaced by the current time."""
+        self._trace_writer.record(self.name, EVENT_CUSTOM, str(log_message),
+                                  timestamp)
+
+    def trace_event(self, kind, stream_name, timestamp):
+        super(LoggingOp, self).trace_event(kind, stream_name, timestamp)
+        self._trace_writer.record(self.name, kind, stream_name, timestamp)
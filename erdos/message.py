@@ -4,12 +4,14 @@ class Message(object):
        Attributes:
            data: The data of the message.
            timestamp (Timestamp): The timestamp of the message.
+           trace (Hop): The message's hop, if latency tracing is enabled.
     """
 
     def __init__(self, data, timestamp, stream_name='default'):
         self.data = data
         self.timestamp = timestamp
         self.stream_name = stream_name
+        self.trace = None
 
     def __str__(self):
         return '{{stream: {}, timestamp: {}, data: {}}}'.format(
@@ -0,0 +1,157 @@
+import copy
+import pickle
+import struct
+import sys
+
+import numpy as np
+
+from erdos.message import Message
+from erdos.message import WatermarkMessage
+from erdos.timestamp import TOP_TIMESTAMP
+from erdos.timestamp import Timestamp
+from erdos.timestamp import is_top_timestamp
+
+# version, flags, payload kind, number of timestamp coordinates,
+# stream uid length, stream name length.
+_HEADER = struct.Struct('<BBBBHH')
+_VERSION = 1
+_WATERMARK_FLAG = 1
+# The timestamp is the end-of-stream timestamp, which has no coordinates in
+# the frame.
+_TOP_TIMESTAMP_FLAG = 2
+
+# Payload kinds.
+PAYLOAD_NONE = 0
+PAYLOAD_NDARRAY = 1
+PAYLOAD_BYTES = 2
+PAYLOAD_PICKLE = 3
+
+# dtype string length, number of dimensions.
+_NDARRAY_HEADER = struct.Struct('<BB')
+
+# str.join only accepts memoryviews on Python 3.
+_JOIN_MEMORYVIEWS = sys.version_info[0] >= 3
+
+
+class MessageCodec(object):
+    """MessageCodec base class.
+
+    Codecs transform ERDOS messages into bytes that can be sent over a
+    transport that does not understand Python objects (e.g., ROS topics), and
+    back.
+    """
+
+    def encode(self, msg, stream_uid):
+        """Encodes a message sent on the stream identified by stream_uid."""
+        raise NotImplementedError('Codec must implement encode')
+
+    def decode(self, data):
+        """Decodes bytes returned by encode into a message."""
+        raise NotImplementedError('Codec must implement decode')
+
+
+class PickleMessageCodec(MessageCodec):
+    """Pickles the entire message."""
+
+    def encode(self, msg, stream_uid):
+        # The sender may still use the message, so its stream uid must not
+        # change.
+        msg = copy.copy(msg)
+        msg.stream_uid = stream_uid
+        return pickle.dumps(msg)
+
+    def decode(self, data):
+        return pickle.loads(data)
+
+
+class BinaryMessageCodec(MessageCodec):
+    """Framed binary message encoding.
+
+    A frame consists of a fixed header, the timestamp coordinates as 64-bit
+    integers, the stream uid and name, and a typed payload. NumPy arrays are
+    stored as raw buffers described by their dtype and shape; decoding them
+    returns read-only arrays that share memory with the frame, which can be
+    any bytes-like object (e.g., a memoryview of a memory-mapped file).
+    `bytes` payloads are stored as is, and any other data is pickled.
+    """
+
+    def encode(self, msg, stream_uid):
+        flags = _WATERMARK_FLAG if isinstance(msg, WatermarkMessage) else 0
+        coordinates = msg.timestamp.coordinates
+        if is_top_timestamp(msg.timestamp):
+            flags |= _TOP_TIMESTAMP_FLAG
+            coordinates = ()
+        uid = stream_uid.encode('utf-8')
+        name = msg.stream_name.encode('utf-8')
+        (kind, payload) = self._encode_payload(msg.data)
+        header = _HEADER.pack(_VERSION, flags, kind, len(coordinates),
+                              len(uid), len(name))
+        coords = struct.pack('<{}q'.format(len(coordinates)), *coordinates)
+        return b''.join([header, coords, uid, name] + payload)
+
+    def decode(self, data):
+        (version, flags, kind, num_coords, uid_len,
+         name_len) = _HEADER.unpack_from(data, 0)
+        if version != _VERSION:
+            raise ValueError(
+                'Unsupported message encoding version {}'.format(version))
+        offset = _HEADER.size
+        coordinates = list(
+            struct.unpack_from('<{}q'.format(num_coords), data, offset))
+        offset += 8 * num_coords
+        stream_uid = bytes(data[offset:offset + uid_len]).decode('utf-8')
+        offset += uid_len
+        stream_name = bytes(data[offset:offset + name_len]).decode('utf-8')
+        offset += name_len
+        if flags & _TOP_TIMESTAMP_FLAG:
+            timestamp = TOP_TIMESTAMP
+        else:
+            timestamp = Timestamp(coordinates=coordinates)
+        if flags & _WATERMARK_FLAG:
+            msg = WatermarkMessage(timestamp, stream_name)
+        else:
+            msg = Message(self._decode_payload(kind, data, offset), timestamp,
+                          stream_name)
+        msg.stream_uid = stream_uid
+        return msg
+
+    def _encode_payload(self, data):
+        """Returns the payload kind and a list of buffers to write."""
+        if data is None:
+            return (PAYLOAD_NONE, [])
+        elif isinstance(data, np.ndarray) and not data.dtype.hasobject:
+            data = np.ascontiguousarray(data)
+            dtype = data.dtype.str.encode('ascii')
+            header = _NDARRAY_HEADER.pack(len(dtype), data.ndim)
+            shape = struct.pack('<{}q'.format(data.ndim), *data.shape)
+            buf = memoryview(data.reshape(-1).view(np.uint8))
+            if _JOIN_MEMORYVIEWS:
+                # Passing the array's memory avoids an intermediate copy.
+                return (PAYLOAD_NDARRAY, [header, dtype, shape, buf])
+            return (PAYLOAD_NDARRAY, [header, dtype, shape, buf.tobytes()])
+        elif isinstance(data, bytes):
+            return (PAYLOAD_BYTES, [data])
+        else:
+            return (PAYLOAD_PICKLE,
+                    [pickle.dumps(data, pickle.HIGHEST_PROTOCOL)])
+
+    def _decode_payload(self, kind, data, offset):
+        if kind == PAYLOAD_NONE:
+            return None
+        elif kind == PAYLOAD_NDARRAY:
+            (dtype_len, ndim) = _NDARRAY_HEADER.unpack_from(data, offset)
+            offset += _NDARRAY_HEADER.size
+            dtype = np.dtype(
+                bytes(data[offset:offset + dtype_len]).decode('ascii'))
+            offset += dtype_len
+            shape = struct.unpack_from('<{}q'.format(ndim), data, offset)
+            offset += 8 * ndim
+            count = int(np.prod(shape)) if ndim > 0 else 1
+            return np.frombuffer(data, dtype=dtype, count=count,
+                                 offset=offset).reshape(shape)
+        elif kind == PAYLOAD_BYTES:
+            return bytes(data[offset:])
+        elif kind == PAYLOAD_PICKLE:
+            return pickle.loads(data[offset:])
+        else:
+            raise ValueError('Unknown payload kind {}'.format(kind))
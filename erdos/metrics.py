@@ -0,0 +1,241 @@
+import json
+import pickle
+import threading
+import time
+from functools import wraps
+
+import numpy as np
+
+from erdos.event_trace import EVENT_NAMES
+
+# Number of bits of the histogram values which are kept. Values are
+# recorded with a relative error below 2^-(_SIGNIFICANT_BITS - 1).
+_SIGNIFICANT_BITS = 6
+_SUB_BUCKETS = 1 << _SIGNIFICANT_BITS
+_HALF_SUB_BUCKETS = _SUB_BUCKETS >> 1
+# Enough buckets for 64-bit values.
+_NUM_BUCKETS = (64 - _SIGNIFICANT_BITS + 2) * _HALF_SUB_BUCKETS
+
+# The size of one out of _SIZE_SAMPLE_INTERVAL messages whose data must be
+# pickled to be measured is measured.
+_SIZE_SAMPLE_INTERVAL = 16
+
+_clock_ns = getattr(time, 'perf_counter_ns', None)
+if _clock_ns is None:
+
+    def _clock_ns():
+        return int(time.time() * 1e9)
+
+
+class Counter(object):
+    """Counts events, and derives their rate since the counter's creation."""
+
+    __slots__ = ('value', '_start_time')
+
+    def __init__(self):
+        self.value = 0
+        self._start_time = time.time()
+
+    def inc(self, n=1):
+        self.value += n
+
+    def snapshot(self):
+        duration = time.time() - self._start_time
+        return {
+            'count': self.value,
+            'rate': self.value / duration if duration > 0 else 0.0,
+        }
+
+
+class Gauge(object):
+    """Holds the last value set, or the value returned by a function."""
+
+    __slots__ = ('value', '_func')
+
+    def __init__(self, func=None):
+        self.value = None
+        self._func = func
+
+    def set(self, value):
+        self.value = value
+
+    def snapshot(self):
+        return self._func() if self._func is not None else self.value
+
+
+class Histogram(object):
+    """Histogram of non-negative integers, e.g. latencies in ns.
+
+    Values are counted in log-linear buckets, as in HDR histograms: each
+    power of two range is split into the same number of buckets. Recording
+    is O(1) and the memory is fixed, while the percentiles are accurate to
+    a few percent.
+    """
+
+    __slots__ = ('count', 'total', 'min', 'max', '_buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self._buckets = [0] * _NUM_BUCKETS
+
+    def record(self, value):
+        value = int(value)
+        if value < 0:
+            value = 0
+        self._buckets[_get_bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def get_percentile(self, percentile):
+        """Returns the lowest value of the bucket which contains the given
+        percentile, capped by the recorded maximum."""
+        if self.count == 0:
+            return None
+        rank = max(1, int(round(percentile / 100.0 * self.count)))
+        seen = 0
+        for (index, bucket_count) in enumerate(self._buckets):
+            seen += bucket_count
+            if seen >= rank:
+                return min(max(_get_bucket_value(index), self.min), self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+            'mean': float(self.total) / self.count if self.count else None,
+            'p50': self.get_percentile(50),
+            'p90': self.get_percentile(90),
+            'p99': self.get_percentile(99),
+            'p999': self.get_percentile(99.9),
+        }
+
+
+def _get_bucket(value):
+    if value < _SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - _SIGNIFICANT_BITS
+    return shift * _HALF_SUB_BUCKETS + (value >> shift)
+
+
+def _get_bucket_value(bucket):
+    """Returns the lowest value of a bucket."""
+    if bucket < _SUB_BUCKETS:
+        return bucket
+    shift = (bucket >> (_SIGNIFICANT_BITS - 1)) - 1
+    return (bucket - shift * _HALF_SUB_BUCKETS) << shift
+
+
+class MetricsRegistry(object):
+    """The metrics of an operator, indexed by name.
+
+    Metrics are only created when metrics are enabled (see the
+    --enable_metrics flag), so that operators do not pay for them otherwise.
+
+    Attributes:
+        name (str): Name of the operator.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._metrics = {}
+        self._lock = threading.Lock()
+        # Maps (event kind, stream name) to the event's counter.
+        self._event_counters = {}
+        # Maps stream names to the number of messages sent, the last
+        # measured size and the stream's byte counter.
+        self._size_samples = {}
+
+    def counter(self, name):
+        return self._get_metric(name, Counter)
+
+    def gauge(self, name, func=None):
+        """Returns a gauge. If func is set, the gauge's value is the value
+        it returns when the metrics are exported."""
+        return self._get_metric(name, Gauge, func)
+
+    def histogram(self, name):
+        return self._get_metric(name, Histogram)
+
+    def on_event(self, kind, stream_name):
+        """Counts the messages sent and received on a stream."""
+        counter = self._event_counters.get((kind, stream_name))
+        if counter is None:
+            counter = self.counter('stream.{}.{}'.format(
+                stream_name, EVENT_NAMES[kind]))
+            self._event_counters[(kind, stream_name)] = counter
+        counter.inc()
+
+    def on_send_data(self, stream_name, data):
+        """Counts the bytes of message data sent on a stream.
+
+        NumPy arrays and bytes are measured exactly. Other data is pickled to
+        be measured, so only a sample of the messages is measured.
+        """
+        sample = self._size_samples.get(stream_name)
+        if sample is None:
+            sample = [
+                0, 0,
+                self.counter('stream.{}.send_bytes'.format(stream_name))
+            ]
+            self._size_samples[stream_name] = sample
+        if isinstance(data, np.ndarray):
+            size = data.nbytes
+        elif isinstance(data, bytes):
+            size = len(data)
+        else:
+            if sample[0] % _SIZE_SAMPLE_INTERVAL == 0:
+                sample[1] = len(pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+            size = sample[1]
+        sample[0] += 1
+        sample[2].inc(size)
+
+    def wrap_callback(self, callback, stream_uid):
+        """Returns a callback which records the latency of the given
+        callback, in ns. The latency is also recorded in the operator's
+        callback.latency_ns histogram."""
+        histogram = self.histogram('callback.{}.{}.latency_ns'.format(
+            getattr(callback, '__name__', 'callback'), stream_uid))
+        op_histogram = self.histogram('callback.latency_ns')
+
+        @wraps(callback)
+        def wrapper(*args, **kwargs):
+            start_time = _clock_ns()
+            try:
+                return callback(*args, **kwargs)
+            finally:
+                latency = _clock_ns() - start_time
+                histogram.record(latency)
+                op_histogram.record(latency)
+
+        return wrapper
+
+    def snapshot(self):
+        """Returns a dict mapping metric names to their current values."""
+        with self._lock:
+            metrics = list(self._metrics.items())
+        return dict((name, metric.snapshot()) for (name, metric) in metrics)
+
+    def _get_metric(self, name, metric_cls, *args):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = metric_cls(*args)
+                    self._metrics[name] = metric
+        return metric
+
+
+def dump_metrics(metrics, filename):
+    """Writes the metrics returned by `Graph.get_metrics` as JSON."""
+    with open(filename, 'w') as f:
+        json.dump(metrics, f, indent=2, sort_keys=True)
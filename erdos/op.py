@@ -1,6 +1,13 @@
 import logging
+import time
 from time import sleep
 
+from erdos.buffered_data_stream import BufferedDataStream
+from erdos.message import WatermarkMessage
+from erdos.timestamp import TOP_TIMESTAMP
+from erdos.timestamp import is_top_timestamp
+from erdos.watermark_frontier import WatermarkFrontier
+
 
 class Op(object):
     """Operator base class.
@@ -14,6 +21,8 @@ class Op(object):
 
     2. __init__: Sets up operator state.
     3. execute: Invoked upon operator execution.
+    4. close: Releases the operator's resources (e.g., writes buffered data
+    to files) once the operator ended.
 
     Attributes:
         name (str): A unique string naming the operator.
@@ -21,17 +30,38 @@ class Op(object):
             is subscribed.
         output_streams (dict of str -> DataStream): Data streams on which the
             operator publishes. Mapping between name and data stream.
-        freq_actor: A Ray actor used for periodic tasks.
+        freq_actor (FrequencyActor): Schedules the periodic tasks.
+        metrics (MetricsRegistry): The operator's metrics, or None if metrics
+            are disabled.
+        latency_tracer (LatencyTracer): Traces the messages the operator
+            receives and sends, or None if latency tracing is disabled.
+        serialization_stats (SerializationStats): Accounts for the cost of
+            serializing the messages the operator sends, or None if disabled.
+        fusable (bool): Class attribute. True if the operator can run in the
+            same executor as the operator it receives messages from, and as
+            the operator it sends messages to. Fusable operators only
+            react to their callbacks: they must neither execute a loop nor
+            run periodic methods nor buffer their input streams.
     """
 
+    fusable = False
+
     def __init__(self, name):
         self.name = name
         self.input_streams = []
         self.output_streams = {}
         self.freq_actor = None
+        self.metrics = None
+        self.latency_tracer = None
+        self.serialization_stats = None
         self.progress_tracker = None
         self.framework = None
-        self._stream_to_high_watermark = {}
+        self._watermark_frontier = WatermarkFrontier()
+        # Time at which the operator sent the end-of-stream watermark and
+        # was closed.
+        self._end_time = None
+        self._ended = False
+        self._buffered_input_streams = {}
 
     def get_output_stream(self, name):
         """Returns the output stream matching name"""
@@ -52,6 +82,37 @@ class Op(object):
         """
         self.spin()
 
+    def send_end_of_stream(self):
+        """Sends the end-of-stream watermark on all the output streams.
+
+        Source operators call it once they sent all their messages, and must
+        not send messages afterwards. Operators that receive the watermark on
+        all their input streams send it automatically, after their
+        completion callbacks. The operator's periodic methods stop running,
+        and the operator is closed.
+        """
+        if self._ended:
+            return
+        self._ended = True
+        if self.freq_actor is not None:
+            self.freq_actor.cancel()
+        watermark_msg = WatermarkMessage(TOP_TIMESTAMP)
+        for output_stream in self.output_streams.values():
+            output_stream.send(watermark_msg)
+        self.close()
+        # The operator only counts as ended once it is closed, so that the
+        # execution is not stopped while it writes its buffered data.
+        self._end_time = time.time()
+
+    def close(self):
+        """Invoked once the operator ended, or when its execution is
+        stopped. Can be invoked several times.
+
+        User override. Operators that buffer data (e.g., in files) must write
+        it out, as their process may be terminated afterwards.
+        """
+        pass
+
     @staticmethod
     def setup_streams(input_streams, **kwargs):
         """Subscribes to input data streams and constructs output data streams.
@@ -87,9 +148,32 @@ class Op(object):
     def log_event(self, processing_time, timestamp, log_message=None):
         pass
 
+    def trace_event(self, kind, stream_name, timestamp):
+        """Invoked by the framework when the operator sends or receives a
+        message. kind is one of the EVENT_* constants of erdos.event_trace.
+        """
+        if self.metrics is not None:
+            self.metrics.on_event(kind, stream_name)
+
     def _add_input_streams(self, input_streams):
         """Setups and updates all input streams."""
         self.input_streams = self.input_streams + input_streams
+        self._buffered_input_streams = dict(
+            (stream.uid, stream) for stream in self.input_streams
+            if isinstance(stream, BufferedDataStream))
+
+    def _buffer_msg(self, msg):
+        """Callback which buffers the messages of buffered input streams."""
+        self._buffered_input_streams[msg.stream_uid].put(msg)
+
+    def _close_buffered_stream(self, stream_uid, timestamp):
+        """Invoked by the framework when a watermark arrives on an input
+        stream. Closes the stream if it is buffered and the watermark is the
+        end-of-stream watermark, so that the operator stops pulling from it
+        once it read the buffered messages."""
+        stream = self._buffered_input_streams.get(stream_uid)
+        if stream is not None and is_top_timestamp(timestamp):
+            stream.close()
 
     def _add_output_streams(self, output_streams):
         """Updates the dictionary of output data streams."""
@@ -26,6 +26,9 @@ class OpHandle(object):
         self.dependent_op_handles = {}
         self.executor_handle = None
         self.progress_tracker = None  # Unused now
+        self.enable_metrics = False
+        self.trace_latency = False
+        self.serialization_stats = False
 
     def get_uid(self):
         # TODO(yika): return a better handle than graph_name/op_name
@@ -1,15 +1,26 @@
-import copy
+import atexit
 import heapq
+import itertools
 import logging
-import pickle
 import sys
 import time
 from enum import Enum
+try:
+    from math import gcd
+except ImportError:
+    from fractions import gcd
 
+import numpy as np
+
+from erdos.async_writer import AsyncFileWriter
 from erdos.data_stream import DataStream
 from erdos.message import Message
 from erdos.message import WatermarkMessage
 from erdos.op import Op
+from erdos.record_log import AsyncLogWriter
+from erdos.record_log import COMPRESSION_NONE
+from erdos.record_log import LogReader
+from erdos.record_log import read_log_streams
 from erdos.timestamp import Timestamp
 from erdos.utils import frequency
 
@@ -77,17 +88,39 @@ class LogOp(Op):
 
 
 class RecordOp(Op):
-    """Operator which saves serialized data from input streams to file.
+    """Operator which saves the messages of its input streams to a log.
+
+    The log is written by an `AsyncLogWriter` on a background thread, so
+    that slow disks do not stall the operator's callbacks unless the
+    writer's queue is full. The log can be replayed by `ReplayOp`.
 
     Args:
         filename (str): path to file.
+        chunk_size (int): size in bytes of the chunks of the log.
+        compression (str): compression of the chunks. Either
+            COMPRESSION_NONE or COMPRESSION_ZLIB.
+        max_queue_size (int): maximum number of messages waiting to be
+            written.
+        fsync_interval (float): interval in seconds at which the log is
+            synced to disk. If None, it is only synced when closed.
         input_streams (list): list of input streams from which to save data.
         name (str): unique name for this operator. Generated by default.
     """
 
-    def __init__(self, name, filename):
+    def __init__(self,
+                 name,
+                 filename,
+                 chunk_size=4 * 1024 * 1024,
+                 compression=COMPRESSION_NONE,
+                 max_queue_size=1024,
+                 fsync_interval=None):
         super(RecordOp, self).__init__(name)
         self.filename = filename
+        self.chunk_size = chunk_size
+        self.compression = compression
+        self.max_queue_size = max_queue_size
+        self.fsync_interval = fsync_interval
+        self._writer = None
 
     @staticmethod
     def setup_streams(input_streams, filter):
@@ -97,75 +130,179 @@ class RecordOp(Op):
         return []
 
     def record_data(self, msg):
-        pickle.dump(msg, self._file)
-
-    def execute(self):
-        self._file = open(self.filename, "wb")
-
-        # Write input stream info
-        input_stream_info = [(input_stream.data_type, input_stream.name)
-                             for input_stream in self.input_streams]
-        pickle.dump(input_stream_info, self._file)
-        self.spin()
+        self._get_writer().write(msg)
+
+    def close(self):
+        """Writes the queued messages and the index of the log. Can be
+        called several times."""
+        self._get_writer().close()
+
+    def get_writer_metrics(self):
+        return self._get_writer().get_metrics()
+
+    def _get_writer(self):
+        """Returns the log writer, which is created in the operator's
+        executor before the first message is recorded."""
+        if self._writer is None:
+            # Write input stream info
+            input_stream_info = [(input_stream.data_type, input_stream.name)
+                                 for input_stream in self.input_streams]
+            self._writer = AsyncLogWriter(self.filename,
+                                          input_stream_info,
+                                          self.chunk_size,
+                                          self.compression,
+                                          max_queue_size=self.max_queue_size,
+                                          fsync_interval=self.fsync_interval)
+            # The log is closed when the input streams end. Otherwise, write
+            # the index when the process exits.
+            atexit.register(self.close)
+        return self._writer
 
 
 class ReplayOp(Op):
-    """Operator which replays saved data from file to an output stream.
+    """Operator which replays saved data from file to its output streams.
+
+    The messages are replayed either at a fixed rate, with the timing at
+    which they were recorded (optionally sped up), or as fast as the
+    downstream operators accept them. A watermark is sent on all the output
+    streams once all the messages of a timestamp are replayed. The operator
+    sends the end-of-stream watermark at the end of the log.
 
     Args:
+        name (str): unique name for this operator.
         filename (str): path to file.
         frequency (int): rate at which the operator publishes data. If 0, the
-            operator publishes data as soon as it is read from file.
-        name (str): unique name for this operator. Generated by default.
+            operator publishes data according to speed.
+        start_timestamp (Timestamp): replay the messages from this timestamp
+            on. The log is replayed from the beginning if None.
+        use_mmap (bool): memory-map the log, so that NumPy arrays are not
+            copied out of it.
+        speed (float): if set, the messages are replayed with the intervals
+            at which they were recorded, divided by speed. Otherwise, they
+            are published as soon as they are read from file.
     """
 
-    def __init__(self, filename, frequency=0, name="replay_op"):
+    def __init__(self,
+                 name,
+                 filename,
+                 frequency=0,
+                 start_timestamp=None,
+                 use_mmap=True,
+                 speed=None):
         super(ReplayOp, self).__init__(name)
         self.filename = filename
         self.frequency = frequency
+        self.start_timestamp = start_timestamp
+        self.use_mmap = use_mmap
+        self.speed = speed
+        self.num_replayed = 0
+        self.replay_duration = 0
 
     @staticmethod
-    def setup_streams(input_streams, filename):
+    def setup_streams(input_streams, filename, stream_names=None):
+        """Creates an output stream for each replayed stream.
+
+        Args:
+            stream_names (list of str): names of the streams to replay. All
+                the recorded streams are replayed if None.
+        """
         output_streams = []
-        with open(filename, "rb") as f:
-            stream_info = pickle.load(f)
-            for data_type, name in stream_info:
+        for data_type, name in read_log_streams(filename):
+            if stream_names is None or name in stream_names:
                 output_streams.append(
                     DataStream(data_type=data_type, name=name))
         return output_streams
 
-    def publish_data(self):
-        if self._file.closed:
-            return
-        try:
-            msg = pickle.load(self._file)
-            self.get_output_stream(msg.stream_name).send(msg)
-        except EOFError:
-            logging.error("Reached end of input file: {0}".format(
-                self.filename))
-            self._file.close()
+    def get_send_time(self, start_time, entries, index):
+        """Returns the time at which the index-th message must be sent, or
+        None if it can be sent immediately."""
+        if self.frequency:
+            return start_time + float(index) / self.frequency
+        elif self.speed:
+            return start_time + (entries[index].time -
+                                 entries[0].time) / self.speed
+        return None
 
-    def execute(self):
-        self._file = open(self.filename, "rb")
-        pickle.load(self._file)  # Read past the stream names
+    def send_watermark(self, coordinates):
+        watermark = WatermarkMessage(Timestamp(coordinates=coordinates))
+        for output_stream in self.output_streams.values():
+            output_stream.send(watermark)
 
-        if self.frequency:
-            publish_data = frequency(self.frequency)(self.publish_data)
-            publish_data()
-            self.spin()
-        else:
-            while True:
-                self.publish_data()
-        self.spin()
+    def execute(self):
+        reader = LogReader(self.filename, self.use_mmap)
+        # Only read the records of the replayed streams.
+        entries = reader.get_entries(list(self.output_streams.keys()),
+                                     self.start_timestamp)
+        start_time = time.time()
+        # The highest timestamp replayed, and the last watermark sent.
+        max_coordinates = None
+        watermark_coordinates = None
+        for (index, entry) in enumerate(entries):
+            send_time = self.get_send_time(start_time, entries, index)
+            if send_time is not None:
+                delay = send_time - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+            if (watermark_coordinates is not None
+                    and entry.coordinates <= watermark_coordinates):
+                logging.warning(
+                    "Replaying message {0} after its watermark".format(
+                        entry.coordinates))
+            msg = reader.read_entry(entry)
+            self.get_output_stream(msg.stream_name).send(msg)
+            if max_coordinates is None or entry.coordinates > max_coordinates:
+                max_coordinates = entry.coordinates
+            # The messages are recorded in timestamp order, unless operators
+            # send them out of order. A timestamp is thus complete when a
+            # higher timestamp follows.
+            if (index + 1 == len(entries)
+                    or entries[index + 1].coordinates > max_coordinates):
+                self.send_watermark(max_coordinates)
+                watermark_coordinates = max_coordinates
+        for output_stream in self.output_streams.values():
+            output_stream.flush()
+        self.num_replayed = len(entries)
+        self.replay_duration = time.time() - start_time
+        logging.info("Replayed {0} messages from {1} in {2:.3f}s".format(
+            self.num_replayed, self.filename, self.replay_duration))
+        reader.close()
+        self.send_end_of_stream()
 
 
 class FileWriterOp(Op):
-    def __init__(self, name, file_name):
-        super(FileWriterOp, self).__init__(name)
-        self._output_file = open(file_name, 'w')
+    """Operator which writes the data of its input messages to a text file,
+    one message per line, on a background thread.
+
+    The file is opened in the operator's executor when the first line is
+    written or when the operator closes, and is closed when the input
+    streams end.
+    """
 
-    def __del__(self):
-        self._output_file.close()
+    def __init__(self, name, file_name, max_queue_size=1024,
+                 fsync_interval=None):
+        super(FileWriterOp, self).__init__(name)
+        self.file_name = file_name
+        self.max_queue_size = max_queue_size
+        self.fsync_interval = fsync_interval
+        self._writer = None
+
+    def close(self):
+        """Writes the queued lines and closes the file. Can be called several
+        times."""
+        self._get_writer().close()
+
+    def get_writer_metrics(self):
+        return self._get_writer().get_metrics()
+
+    def _get_writer(self):
+        if self._writer is None:
+            self._writer = AsyncFileWriter(self.file_name,
+                                           max_queue_size=self.max_queue_size,
+                                           fsync_interval=self.fsync_interval)
+            # Write the queued lines when the process exits if the input
+            # streams do not end.
+            atexit.register(self.close)
+        return self._writer
 
     @staticmethod
     def setup_streams(input_streams, filter_stream_lambda=None):
@@ -174,10 +311,12 @@ class FileWriterOp(Op):
         return []
 
     def on_msg(self, msg):
-        self._output_file.write(str(msg.data) + '\n')
+        self._get_writer().write(str(msg.data) + '\n')
 
 
 class WhereOp(Op):
+    fusable = True
+
     def __init__(self, name, output_stream_name, where_lambda):
         super(WhereOp, self).__init__(name)
         self._output_stream_name = output_stream_name
@@ -196,6 +335,8 @@ class WhereOp(Op):
 
 
 class MapOp(Op):
+    fusable = True
+
     def __init__(self, name, output_stream_name, map_lambda):
         super(MapOp, self).__init__(name)
         self._output_stream_name = output_stream_name
@@ -215,6 +356,8 @@ class MapOp(Op):
 
 
 class MapManyOp(Op):
+    fusable = True
+
     def __init__(self, name, output_stream_name, map_lambda=None):
         super(MapManyOp, self).__init__(name)
         self._output_stream_name = output_stream_name
@@ -243,6 +386,8 @@ class MapManyOp(Op):
 
 
 class ConcatOp(Op):
+    fusable = True
+
     def __init__(self, name, output_stream_name):
         super(ConcatOp, self).__init__(name)
         self._output_stream_name = output_stream_name
@@ -260,6 +405,8 @@ class ConcatOp(Op):
 
 
 class UnzipOp(Op):
+    fusable = True
+
     def __init__(self, name, output_stream_name1, output_stream_name2):
         super(UnzipOp, self).__init__(name)
         self._output_stream_name1 = output_stream_name1
@@ -288,9 +435,14 @@ def get_timestamp_ms():
     return int(time.time() * 1000)
 
 
-def get_window_start_with_offset(window_size_ms, window_offset_ms):
-    return ((get_timestamp_ms() - window_offset_ms) // window_size_ms *
-            window_size_ms)
+def get_event_time_ms(msg):
+    """Returns the event time of a message, i.e. its first coordinate."""
+    return msg.timestamp.coordinates[0]
+
+
+def get_last_window_start(time_ms, window_slide_ms, window_offset_ms):
+    """Returns the start of the last window that contains time_ms."""
+    return time_ms - (time_ms - window_offset_ms) % window_slide_ms
 
 
 class Window(object):
@@ -300,6 +452,8 @@ class Window(object):
         window_id(int): A unique int identifying the window.
     """
 
+    __slots__ = ('is_time_window', '_uid')
+
     def __init__(self, window_id, is_time_window=False):
         self.is_time_window = is_time_window
         self._uid = window_id
@@ -317,11 +471,17 @@ class TimeWindow(Window):
         end_time (int): Window ending time in ms
     """
 
+    __slots__ = ('_start_time', '_end_time')
+
     def __init__(self, start_time, end_time):
         super(TimeWindow, self).__init__(hash((start_time, end_time)), True)
         self._start_time = start_time
         self._end_time = end_time
 
+    @property
+    def start_time(self):
+        return self._start_time
+
     @property
     def end_time(self):
         return self._end_time
@@ -329,13 +489,51 @@ class TimeWindow(Window):
 
 class WindowAssigner(object):
     """WindowAssigner base class.
+
+    Attributes:
+        event_time (bool): True if windows are assigned using the timestamps
+            of the messages rather than the wall-clock time. Event-time
+            windows are closed by watermarks.
+        pane_size (int): Time duration of the panes in ms, if windows are
+            made of panes.
     """
 
+    event_time = False
+    pane_size = None
+
+    def get_time_ms(self, msg):
+        """Returns the time in ms at which a message falls. Windows and panes
+        are both assigned from this time."""
+        if self.event_time:
+            return get_event_time_ms(msg)
+        return get_timestamp_ms()
+
     def assign_windows(self, msg):
-        """Assigns a message to a list of windows."""
+        """Assigns a message to a list of windows.
+
+        Assigners can return the same window objects, and the same list, for
+        consecutive messages. The list must not be modified.
+        """
         raise NotImplementedError(
             'Window assigner must implement assign_windows')
 
+    def assign_pane(self, msg):
+        """Assigns a message to a pane.
+
+        Panes are non-overlapping time windows such that every window is a
+        union of consecutive panes. Overlapping windows share the aggregates
+        of their common panes.
+
+        Returns:
+            (TimeWindow): The pane, or None if windows are not made of panes.
+        """
+        return None
+
+    def get_pane_windows(self, pane):
+        """Returns the windows that contain a pane."""
+        raise NotImplementedError(
+            'Window assigner must implement get_pane_windows')
+
 
 class TumblingWindowAssigner(WindowAssigner):
     """Assigns messages to non-overlapping windows (i.e., tumbling).
@@ -343,15 +541,35 @@ class TumblingWindowAssigner(WindowAssigner):
     Attributes:
         time_size_ms (int): Time duration of the window
         time_offset_ms (int): Offset of the window
+        event_time (bool): Assign windows using the first coordinate of the
+            message timestamps, in ms, instead of the wall-clock time.
     """
 
-    def __init__(self, time_size_ms, time_offset_ms=0):
+    def __init__(self, time_size_ms, time_offset_ms=0, event_time=False):
         self._size = time_size_ms
         self._offset = time_offset_ms
+        self.event_time = event_time
+        self.pane_size = time_size_ms
+        # The windows returned for the last message, which are reused until
+        # a message falls in a different window.
+        self._last_start_time = None
+        self._last_windows = None
 
     def assign_windows(self, msg):
-        start_time = get_window_start_with_offset(self._size, self._offset)
-        return [TimeWindow(start_time, start_time + self._size)]
+        start_time = get_last_window_start(self.get_time_ms(msg), self._size,
+                                           self._offset)
+        if start_time != self._last_start_time:
+            self._last_start_time = start_time
+            self._last_windows = [
+                TimeWindow(start_time, start_time + self._size)
+            ]
+        return self._last_windows
+
+    def assign_pane(self, msg):
+        return self.assign_windows(msg)[0]
+
+    def get_pane_windows(self, pane):
+        return [pane]
 
 
 class SlidingWindowAssigner(WindowAssigner):
@@ -361,19 +579,58 @@ class SlidingWindowAssigner(WindowAssigner):
         time_size_ms (int): Time duration of the window
         time_slide_ms (int): By how much time a window slides
         time_offset_ms (int): Offset of the window
+        event_time (bool): Assign windows using the first coordinate of the
+            message timestamps, in ms, instead of the wall-clock time.
     """
 
-    def __init__(self, time_size_ms, time_slide_ms, time_offset_ms=0):
+    def __init__(self,
+                 time_size_ms,
+                 time_slide_ms,
+                 time_offset_ms=0,
+                 event_time=False):
         self._size = time_size_ms
         self._slide = time_slide_ms
         self._offset = time_offset_ms
+        self.event_time = event_time
+        self.pane_size = gcd(time_size_ms, time_slide_ms)
+        # The windows and pane returned for the last messages, which are
+        # reused until a message falls in a different pane.
+        self._last_pane_start = None
+        self._last_windows = None
+        self._last_pane = None
 
     def assign_windows(self, msg):
-        start_time = get_window_start_with_offset(self._size, self._offset)
+        time_ms = self.get_time_ms(msg)
+        # Window bounds are multiples of the pane size, so all the times
+        # within a pane belong to the same windows.
+        pane_start = get_last_window_start(time_ms, self.pane_size,
+                                           self._offset)
+        if pane_start != self._last_pane_start:
+            self._last_pane_start = pane_start
+            self._last_windows = self._get_windows_containing(time_ms)
+        return self._last_windows
+
+    def assign_pane(self, msg):
+        time_ms = self.get_time_ms(msg)
+        start_time = get_last_window_start(time_ms, self.pane_size,
+                                           self._offset)
+        if (self._last_pane is None
+                or self._last_pane.start_time != start_time):
+            self._last_pane = TimeWindow(start_time,
+                                         start_time + self.pane_size)
+        return self._last_pane
+
+    def get_pane_windows(self, pane):
+        return self._get_windows_containing(pane.start_time)
+
+    def _get_windows_containing(self, time_ms):
+        """Returns the windows that contain time_ms, oldest window first."""
+        start_time = get_last_window_start(time_ms, self._slide, self._offset)
         windows = []
-        while start_time < msg.timestamp.coordinates[0]:
+        while start_time > time_ms - self._size:
             windows.append(TimeWindow(start_time, start_time + self._size))
-            start_time += self._slide
+            start_time -= self._slide
+        windows.reverse()
         return windows
 
 
@@ -387,6 +644,7 @@ class CountWindowAssigner(WindowAssigner):
         self._msg_count = msg_count
         self._cur_msg_count = 0
         self._window_id = 0
+        self._windows = [Window(self._window_id)]
 
     def assign_windows(self, msg):
         if self._cur_msg_count < self._msg_count:
@@ -394,7 +652,35 @@ class CountWindowAssigner(WindowAssigner):
         else:
             self._cur_msg_count = 1
             self._window_id += 1
-        return [Window(self._window_id)]
+            self._windows = [Window(self._window_id)]
+        return self._windows
+
+
+class WindowState(object):
+    """The state of a window that has not been processed yet.
+
+    A single trigger object is shared by all the windows of an operator, so
+    triggers must keep their per-window state in the window's record.
+
+    Attributes:
+        window (Window): The window.
+        contents: The messages of the window, or the accumulator if an
+            aggregator is used.
+        timestamp (Timestamp): The timestamp of the first message.
+        num_msgs (int): Number of messages added to the window.
+        trigger_state: Per-window state of the trigger, initialized with
+            `WindowTrigger.create_state`.
+    """
+
+    __slots__ = ('window', 'contents', 'timestamp', 'num_msgs',
+                 'trigger_state')
+
+    def __init__(self, window, contents, timestamp, trigger_state):
+        self.window = window
+        self.contents = contents
+        self.timestamp = timestamp
+        self.num_msgs = 0
+        self.trigger_state = trigger_state
 
 
 class WindowTrigger(object):
@@ -404,13 +690,22 @@ class WindowTrigger(object):
     1. is_time_based: Return true if trigger is time-based.
     2. on_message: Invoked for each message received for the window.
     3. on_time: Invoked when the time triggers.
+
+    Triggers are stateless strategies shared by all the windows. Triggers that
+    need per-window state override create_state, and update the
+    `trigger_state` of the window's `WindowState`.
     """
 
     def is_time_based(self):
         """Returns True if the window is time-based."""
         raise NotImplementedError('Trigger must implement is_time_based')
 
-    def on_message(self, msg, window):
+    def create_state(self):
+        """Returns the initial trigger state of a new window."""
+        return None
+
+    def on_message(self, msg, window, window_state):
+        """Invoked after msg was added to window_state."""
         raise NotImplementedError('Trigger must implement on_message')
 
     def on_time(self, time, window):
@@ -431,7 +726,7 @@ class TimeWindowTrigger(WindowTrigger):
     def is_time_based(self):
         return True
 
-    def on_message(self, msg, window):
+    def on_message(self, msg, window, window_state):
         return WindowTriggerAction.CONTINUE
 
     def on_time(self, time, window):
@@ -447,15 +742,14 @@ class CountWindowTrigger(WindowTrigger):
 
     def __init__(self, msg_cnt):
         self._msg_cnt = msg_cnt
-        self._cur_count = 0
 
     def is_time_based(self):
         return False
 
-    def on_message(self, msg, window):
-        self._cur_count += 1
-        if self._cur_count == self._msg_cnt:
-            self._cur_count = 0
+    def on_message(self, msg, window, window_state):
+        # The window's state is removed once it is processed, which resets
+        # the count.
+        if window_state.num_msgs == self._msg_cnt:
             return WindowTriggerAction.PROCESS
         return WindowTriggerAction.CONTINUE
 
@@ -487,9 +781,159 @@ class SumWindowProcessor(WindowProcessor):
         return [Message(res, msgs[0].timestamp)]
 
 
+class WindowAggregator(object):
+    """WindowAggregator base class.
+
+    Aggregators incrementally reduce the messages of a window into an
+    accumulator, instead of storing the messages until the window is
+    processed. All aggregators must inherit from this class, and must
+    implement:
+    1. create: Returns an empty accumulator.
+    2. add: Adds the data of a message to an accumulator.
+    3. merge: Merges two accumulators.
+    4. result: Computes the output data from an accumulator.
+    """
+
+    def create(self):
+        raise NotImplementedError('Aggregator must implement create')
+
+    def add(self, acc, data):
+        """Returns the accumulator updated with data. Can modify acc."""
+        raise NotImplementedError('Aggregator must implement add')
+
+    def merge(self, acc1, acc2):
+        """Returns the merged accumulator. Can modify acc1, but not acc2."""
+        raise NotImplementedError('Aggregator must implement merge')
+
+    def result(self, acc):
+        raise NotImplementedError('Aggregator must implement result')
+
+
+class SumAggregator(WindowAggregator):
+    def create(self):
+        return 0
+
+    def add(self, acc, data):
+        return acc + data
+
+    def merge(self, acc1, acc2):
+        return acc1 + acc2
+
+    def result(self, acc):
+        return acc
+
+
+class CountAggregator(WindowAggregator):
+    def create(self):
+        return 0
+
+    def add(self, acc, data):
+        return acc + 1
+
+    def merge(self, acc1, acc2):
+        return acc1 + acc2
+
+    def result(self, acc):
+        return acc
+
+
+class MinAggregator(WindowAggregator):
+    def create(self):
+        return None
+
+    def add(self, acc, data):
+        if acc is None or data < acc:
+            return data
+        return acc
+
+    def merge(self, acc1, acc2):
+        if acc2 is None:
+            return acc1
+        return self.add(acc1, acc2)
+
+    def result(self, acc):
+        return acc
+
+
+class MaxAggregator(WindowAggregator):
+    def create(self):
+        return None
+
+    def add(self, acc, data):
+        if acc is None or data > acc:
+            return data
+        return acc
+
+    def merge(self, acc1, acc2):
+        if acc2 is None:
+            return acc1
+        return self.add(acc1, acc2)
+
+    def result(self, acc):
+        return acc
+
+
+class MeanAggregator(WindowAggregator):
+    """Computes the mean. The accumulator is a (sum, count) tuple."""
+
+    def create(self):
+        return (0, 0)
+
+    def add(self, acc, data):
+        return (acc[0] + data, acc[1] + 1)
+
+    def merge(self, acc1, acc2):
+        return (acc1[0] + acc2[0], acc1[1] + acc2[1])
+
+    def result(self, acc):
+        return float(acc[0]) / acc[1]
+
+
+class NumpyAggregator(WindowAggregator):
+    """Reduces NumPy arrays element-wise, in place, using a binary ufunc.
+
+    Attributes:
+        ufunc (numpy.ufunc): The reduction (e.g., np.add, np.maximum).
+        dtype (numpy.dtype): The type of the accumulator. Defaults to the
+            type of the first array.
+    """
+
+    def __init__(self, ufunc=np.add, dtype=None):
+        self._ufunc = ufunc
+        self._dtype = dtype
+
+    def create(self):
+        return None
+
+    def add(self, acc, data):
+        if acc is None:
+            return np.array(data, dtype=self._dtype, copy=True)
+        return self._ufunc(acc, data, out=acc)
+
+    def merge(self, acc1, acc2):
+        if acc2 is None:
+            return acc1
+        return self.add(acc1, acc2)
+
+    def result(self, acc):
+        return acc
+
+
 class WindowOp(Op):
     """ERDOS-provided operator for windowing streams.
 
+    If the assigner uses event time, time windows are closed when the low
+    watermark of the input streams reaches their last timestamp. The results
+    of such windows carry the window's last timestamp, and are sent before
+    the watermark that closed the window. Otherwise, the operator polls the
+    wall-clock time to close them.
+
+    Windows are processed either by a processor, which receives the list of
+    messages of the window, or by an aggregator, which is updated upon every
+    message. With an aggregator, a time-based trigger, and an assigner that
+    splits time into panes (e.g., sliding windows), overlapping windows share
+    the partial aggregates of their panes, and are only processed on time.
+
     Attributes:
         name (str): A unique string naming the operator.
         output_stream_name (str): Name of the stream on which to output data.
@@ -498,17 +942,36 @@ class WindowOp(Op):
             processed.
         processor (WindowProcessor): object used to process a window when it is
             ready.
+        aggregator (WindowAggregator): object used to incrementally aggregate
+            the messages of a window. Used instead of a processor.
     """
 
-    def __init__(self, name, output_stream_name, assigner, trigger, processor):
+    def __init__(self,
+                 name,
+                 output_stream_name,
+                 assigner,
+                 trigger,
+                 processor=None,
+                 aggregator=None):
         super(WindowOp, self).__init__(name)
+        if (processor is None) == (aggregator is None):
+            raise Exception(
+                'WindowOp {} requires either a processor or an aggregator'.
+                format(name))
         self._output_stream_name = output_stream_name
         self._assigner = assigner
         self._trigger = trigger
         self._processor = processor
+        self._aggregator = aggregator
+        self._use_panes = aggregator is not None and trigger.is_time_based()
+        # Maps window uids to WindowStates.
         self._window_state_map = {}
-        self._window_trigger_map = {}
+        # Maps pane start times to [accumulator, first message timestamp,
+        # number of windows which have not yet processed the pane].
+        self._pane_state_map = {}
         self._window_end_pqueue = []
+        # Breaks ties between windows that end at the same time.
+        self._window_seq = itertools.count()
         self._registered_windows = set([])
 
     @staticmethod
@@ -517,30 +980,81 @@ class WindowOp(Op):
                       filter_stream_lambda=None):
         input_streams.filter(filter_stream_lambda).add_callback(
             WindowOp.on_msg)
+        # The low watermark advances on any of the input streams.
+        input_streams.add_completion_callback(WindowOp.on_watermark)
         return [DataStream(name=output_stream_name)]
 
     def on_process(self, window_uid):
         """Invoke processing of the window."""
-        output_msgs = self._processor.process(
-            self._window_state_map[window_uid])
+        # Remove window state
+        window_state = self._window_state_map.pop(window_uid)
+        timestamp = self.get_result_timestamp(window_state.window,
+                                              window_state.timestamp)
+        if self._aggregator is None:
+            output_msgs = self._processor.process(window_state.contents)
+            if timestamp is not window_state.timestamp:
+                for output_msg in output_msgs:
+                    output_msg.timestamp = timestamp
+        else:
+            output_msgs = [
+                Message(self._aggregator.result(window_state.contents),
+                        timestamp)
+            ]
         for output_msg in output_msgs:
             self.get_output_stream(self._output_stream_name).send(output_msg)
-        # Remove window state
-        del self._window_state_map[window_uid]
-        del self._window_trigger_map[window_uid]
         try:
             self._registered_windows.remove(window_uid)
         except KeyError as e:
             pass
 
-    def on_time_trigger(self, time, window):
-        # The time window ended, invoke trigger to decide action.
-        action = self._trigger.on_time(time, window)
-        if action == WindowTriggerAction.PROCESS:
-            self.on_process(window.uid)
+    def on_process_panes(self, window):
+        """Invoke processing of a window by merging the aggregates of its
+        panes."""
+        acc = self._aggregator.create()
+        timestamp = None
+        pane_start = window.start_time
+        while pane_start < window.end_time:
+            pane_state = self._pane_state_map.get(pane_start)
+            if pane_state is not None:
+                acc = self._aggregator.merge(acc, pane_state[0])
+                if timestamp is None:
+                    timestamp = pane_state[1]
+                # Remove the pane once all its windows processed it.
+                pane_state[2] -= 1
+                if pane_state[2] == 0:
+                    del self._pane_state_map[pane_start]
+            pane_start += self._assigner.pane_size
+        self._registered_windows.discard(window.uid)
+        if timestamp is not None:
+            self.get_output_stream(self._output_stream_name).send(
+                Message(self._aggregator.result(acc),
+                        self.get_result_timestamp(window, timestamp)))
+
+    def get_result_timestamp(self, window, first_timestamp):
+        """Returns the timestamp of a window's results.
 
-    def on_message_trigger(self, msg, window):
-        action = self._window_trigger_map[window.uid].on_message(msg, window)
+        Event-time windows can be processed after the operator forwarded
+        watermarks greater than the timestamp of their first message, so
+        their results carry the last timestamp of the window instead.
+        """
+        if self._assigner.event_time and window.is_time_window:
+            return Timestamp(coordinates=[window.end_time - 1])
+        return first_timestamp
+
+    def on_time_trigger(self, time, window):
+        if window.uid in self._window_state_map:
+            # The time window ended, invoke trigger to decide action.
+            action = self._trigger.on_time(time, window)
+            if action == WindowTriggerAction.PROCESS:
+                self.on_process(window.uid)
+        elif self._use_panes and window.uid in self._registered_windows:
+            action = self._trigger.on_time(time, window)
+            if action == WindowTriggerAction.PROCESS:
+                self.on_process_panes(window)
+
+    def on_message_trigger(self, msg, window_state):
+        window = window_state.window
+        action = self._trigger.on_message(msg, window, window_state)
         if action == WindowTriggerAction.PROCESS:
             self.on_process(window.uid)
 
@@ -550,40 +1064,87 @@ class WindowOp(Op):
             # Only add the end of window event if we haven't seen this window
             # before.
             self._registered_windows.add(window.uid)
-            heapq.heappush(self._window_end_pqueue, (window_end_time, window))
+            heapq.heappush(self._window_end_pqueue,
+                           (window_end_time, next(self._window_seq), window))
+
+    def add_to_pane(self, msg, pane):
+        """Adds a message to the partial aggregate of a pane."""
+        pane_state = self._pane_state_map.get(pane.start_time)
+        if pane_state is None:
+            windows = self._assigner.get_pane_windows(pane)
+            # Aggregate, timestamp of the first message, and number of
+            # windows which still have to process the pane.
+            pane_state = [
+                self._aggregator.create(), msg.timestamp, len(windows)
+            ]
+            self._pane_state_map[pane.start_time] = pane_state
+            for window in windows:
+                self.register_time_trigger(window.end_time, window)
+        pane_state[0] = self._aggregator.add(pane_state[0], msg.data)
 
     def on_msg(self, msg):
-        windows = self._assigner.assign_windows(msg)
-        for window in windows:
+        if self._use_panes:
+            pane = self._assigner.assign_pane(msg)
+            if pane is not None:
+                self.add_to_pane(msg, pane)
+                return
+        for window in self._assigner.assign_windows(msg):
             # Add message to the per-window state.
-            if window.uid in self._window_state_map:
-                self._window_state_map[window.uid].append(msg)
+            window_state = self._window_state_map.get(window.uid)
+            if window_state is None:
+                window_state = self.create_window_state(msg, window)
+            if self._aggregator is None:
+                window_state.contents.append(msg)
             else:
-                self._window_state_map[window.uid] = [msg]
-            if window.uid not in self._window_trigger_map:
-                self._window_trigger_map[window.uid] = copy.deepcopy(
-                    self._trigger)
-            # TODO(ionel): We shouldn't have two paths for time & non-time
-            # windows. Fix!
-            if window.is_time_window:
-                # Register a trigger for the end of the window.
-                self.register_time_trigger(window.end_time, window)
-            self.on_message_trigger(msg, window)
+                window_state.contents = self._aggregator.add(
+                    window_state.contents, msg.data)
+            window_state.num_msgs += 1
+            self.on_message_trigger(msg, window_state)
+
+    def create_window_state(self, msg, window):
+        """Creates the state of a window upon its first message."""
+        if self._aggregator is None:
+            contents = []
+        else:
+            contents = self._aggregator.create()
+        window_state = WindowState(window, contents, msg.timestamp,
+                                   self._trigger.create_state())
+        self._window_state_map[window.uid] = window_state
+        # TODO(ionel): We shouldn't have two paths for time & non-time
+        # windows. Fix!
+        if window.is_time_window:
+            # Register a trigger for the end of the window.
+            self.register_time_trigger(window.end_time, window)
+        return window_state
+
+    def on_watermark(self, msg):
+        if self._assigner.event_time:
+            # A window ends before end_time, and is thus complete once the
+            # watermark reaches end_time - 1.
+            self.fire_triggers_until(msg.timestamp.coordinates[0] + 1)
+        watermark_msg = WatermarkMessage(msg.timestamp)
+        self.get_output_stream(self._output_stream_name).send(watermark_msg)
+
+    def fire_triggers_until(self, time_ms):
+        """Fires the triggers of the windows that end at or before time_ms."""
+        while (len(self._window_end_pqueue) > 0
+               and self._window_end_pqueue[0][0] <= time_ms):
+            (end_time, _, window) = heapq.heappop(self._window_end_pqueue)
+            self.on_time_trigger(end_time, window)
 
     @frequency(100)
     def fire_triggers(self):
-        # TODO(ionel): There are more efficient ways to implement this. Fix!
-        while (len(self._window_end_pqueue) > 0
-               and self._window_end_pqueue[0][0] <= get_timestamp_ms()):
-            (end_time, window) = heapq.heappop(self._window_end_pqueue)
-            self.on_time_trigger(end_time, window)
+        self.fire_triggers_until(get_timestamp_ms())
 
     def execute(self):
-        self.fire_triggers()
+        if not self._assigner.event_time:
+            self.fire_triggers()
         self.spin()
 
 
 class NoopOp(Op):
+    fusable = True
+
     def on_msg(self, msg):
         self.get_output_stream(msg.stream_name).send(msg)
 
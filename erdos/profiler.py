@@ -0,0 +1,159 @@
+try:
+    from html import escape
+except ImportError:
+    from cgi import escape
+
+_CRITICAL_COLOR = '#d62728'
+_EDGE_COLOR = '#999999'
+
+
+def get_profile(nodes, edges, metrics, latency_report):
+    """Annotates the graph with the profiled metrics.
+
+    Args:
+        nodes (list of str): Operator ids.
+        edges (list of (str, str, str)): (sender id, receiver id, stream
+            name) edges.
+        metrics (dict of str -> dict): The metrics of the operators, as
+            returned by `Graph.get_metrics`.
+        latency_report (dict): The report returned by
+            `Graph.get_latency_report`, with operator ids as names.
+
+    Returns:
+        (list of dict, list of dict): The operators, with their mean and p99
+        callback time in ms, and the edges, with their messages and bytes per
+        second. Operators and edges on the most frequent critical path are
+        flagged.
+    """
+    critical_edges = set()
+    critical_nodes = set()
+    for (sender, receiver, stream_name) in latency_report.get(
+            'critical_path', []):
+        critical_edges.add((sender, receiver, stream_name))
+        critical_nodes.update([sender, receiver])
+    op_profiles = []
+    for node in nodes:
+        callback_latency = metrics.get(node, {}).get('callback.latency_ns',
+                                                     {})
+        op_profiles.append({
+            'op': node,
+            'num_callbacks': callback_latency.get('count', 0),
+            'mean_callback_ms': _ns_to_ms(callback_latency.get('mean')),
+            'p99_callback_ms': _ns_to_ms(callback_latency.get('p99')),
+            'critical': node in critical_nodes,
+        })
+    edge_profiles = []
+    for (sender, receiver, stream_name) in edges:
+        sender_metrics = metrics.get(sender, {})
+        msgs = sender_metrics.get('stream.{}.send'.format(stream_name), {})
+        sent_bytes = sender_metrics.get(
+            'stream.{}.send_bytes'.format(stream_name), {})
+        edge_profiles.append({
+            'sender': sender,
+            'receiver': receiver,
+            'stream': stream_name,
+            'msgs_per_sec': msgs.get('rate', 0.0),
+            'bytes_per_sec': sent_bytes.get('rate', 0.0),
+            'critical': (sender, receiver, stream_name) in critical_edges,
+        })
+    return (op_profiles, edge_profiles)
+
+
+def write_profile_report(filename, nodes, edges, metrics, latency_report):
+    """Writes the profile of a graph as a dot file, or as an HTML page if
+    filename ends with .html. See `get_profile` for the arguments."""
+    (op_profiles, edge_profiles) = get_profile(nodes, edges, metrics,
+                                               latency_report)
+    dot = _to_dot(op_profiles, edge_profiles)
+    with open(filename, 'w') as f:
+        if filename.endswith('.html'):
+            f.write(
+                _to_html(op_profiles, edge_profiles, latency_report, dot))
+        else:
+            f.write(dot)
+
+
+def _ns_to_ms(value):
+    return value / 1e6 if value is not None else None
+
+
+def _format_ms(value):
+    return '{:.3f} ms'.format(value) if value is not None else 'n/a'
+
+
+def _format_rate(value, unit):
+    for prefix in ('', 'K', 'M', 'G'):
+        if value < 1000:
+            break
+        value /= 1000.0
+    return '{:.1f} {}{}/s'.format(value, prefix, unit)
+
+
+def _quote(name):
+    return '"{}"'.format(name.replace('"', '\\"'))
+
+
+def _to_dot(op_profiles, edge_profiles):
+    lines = ['digraph G {', '\tgraph [rankdir="LR"]', '\tnode [shape=box]']
+    for op in op_profiles:
+        label = '{}\\nmean {}\\np99 {}'.format(
+            op['op'], _format_ms(op['mean_callback_ms']),
+            _format_ms(op['p99_callback_ms']))
+        style = ' color="{}" penwidth=2'.format(
+            _CRITICAL_COLOR) if op['critical'] else ''
+        lines.append('\t{} [ label = {}{} ];'.format(
+            _quote(op['op']), _quote(label), style))
+    for edge in edge_profiles:
+        label = '{}\\n{}\\n{}'.format(edge['stream'],
+                                      _format_rate(edge['msgs_per_sec'],
+                                                   'msg'),
+                                      _format_rate(edge['bytes_per_sec'],
+                                                   'B'))
+        color = _CRITICAL_COLOR if edge['critical'] else _EDGE_COLOR
+        style = ' penwidth=2' if edge['critical'] else ''
+        lines.append('\t{} -> {} [ label = {} color="{}"{} ];'.format(
+            _quote(edge['sender']), _quote(edge['receiver']), _quote(label),
+            color, style))
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+
+def _html_row(cells, critical):
+    style = ' style="color: {}"'.format(_CRITICAL_COLOR) if critical else ''
+    return '<tr{}>{}</tr>'.format(
+        style, ''.join('<td>{}</td>'.format(escape(str(cell)))
+                       for cell in cells))
+
+
+def _to_html(op_profiles, edge_profiles, latency_report, dot):
+    parts = ['<html><head><title>ERDOS profile</title></head><body>']
+    end_to_end = latency_report.get('end_to_end_ms')
+    if end_to_end:
+        parts.append(
+            '<p>End-to-end latency over {} timestamps: p50 {}, p99 {}, '
+            'max {}. Operators and streams on the most frequent critical '
+            'path are highlighted.</p>'.format(
+                latency_report['num_paths'], _format_ms(end_to_end['p50']),
+                _format_ms(end_to_end['p99']), _format_ms(end_to_end['max'])))
+    parts.append('<h2>Operators</h2><table border="1"><tr><th>Operator</th>'
+                 '<th>Callbacks</th><th>Mean</th><th>p99</th></tr>')
+    for op in op_profiles:
+        parts.append(
+            _html_row([
+                op['op'], op['num_callbacks'],
+                _format_ms(op['mean_callback_ms']),
+                _format_ms(op['p99_callback_ms'])
+            ], op['critical']))
+    parts.append('</table><h2>Streams</h2><table border="1"><tr>'
+                 '<th>Sender</th><th>Receiver</th><th>Stream</th>'
+                 '<th>Messages</th><th>Bytes</th></tr>')
+    for edge in edge_profiles:
+        parts.append(
+            _html_row([
+                edge['sender'], edge['receiver'], edge['stream'],
+                _format_rate(edge['msgs_per_sec'], 'msg'),
+                _format_rate(edge['bytes_per_sec'], 'B')
+            ], edge['critical']))
+    parts.append('</table><h2>Graph</h2><pre>{}</pre></body></html>'.format(
+        escape(dot)))
+    return '\n'.join(parts) + '\n'
@@ -1,5 +1,4 @@
 import logging
-import ray
 
 from erdos.executor import Executor
 from erdos.ray.ray_operator import RayOperator
@@ -33,22 +32,33 @@ class RayExecutor(Executor):
             stream.completion_callbacks = set(
                              [f.__name__ for f in stream.completion_callbacks])
 
-        # Create the Ray actor wrapping the ERDOS operator.
+        # Create the Ray actor wrapping the ERDOS operator. The actor is
+        # created asynchronously, and its tasks run in submission order.
         ray_op = RayOperator._remote([self.op_handle], {}, num_cpus, num_gpus,
                                      resources)
-        # Set the actor handle in the ray operator actor.
-        ray.get(ray_op.set_handle.remote(ray_op))
         self.op_handle.executor_handle = ray_op
 
+    def setup_streams(self):
+        """Submits the tasks which set up the actor, without waiting for
+        them. Requires the dependent operator handles.
+
+        Returns:
+            (list of ray.ObjectID): The results of the tasks, which are ready
+            once the operator is ready to receive messages.
+        """
+        ray_op = self.op_handle.executor_handle
+        return [
+            # Set the actor handle in the ray operator actor.
+            ray_op.set_handle.remote(ray_op),
+            # Setup the input/output streams of the ERDOS operator.
+            ray_op.setup_streams.remote(self.op_handle.dependent_op_handles),
+            # Bind the operator's periodic methods to the timer wheel.
+            ray_op.setup_frequency_actor.remote(),
+        ]
+
     def execute(self):
-        """Execute Ray operator."""
-        # Setup the input/output streams of the ERDOS operator.
-        ray.get(
-            self.op_handle.executor_handle.setup_streams.remote(
-                self.op_handle.dependent_op_handles))
-        # Start the frequency actor associated to the Ray operator actor.
-        ray.get(self.op_handle.executor_handle.setup_frequency_actor.remote())
-        # Execute the operator. We do not call .get here because the executor
-        # would block until the operator completes.
+        """Execute Ray operator. Requires the operator to be set up."""
+        # We do not call .get here because the executor would block until the
+        # operator completes.
         logger.info('Executing {}'.format(self.op_handle.name))
         self.op_handle.executor_handle.execute.remote()
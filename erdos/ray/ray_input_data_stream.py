@@ -2,7 +2,15 @@ from erdos.data_stream import DataStream
 
 
 class RayInputDataStream(DataStream):
-    def __init__(self, actor_handle, data_stream):
+    """Input stream of a Ray operator.
+
+    The stream is set up inside the operator's actor, so it registers the
+    callbacks directly on the `RayOperator` instead of submitting tasks to
+    the actor. Hence, the callbacks are registered once the actor's
+    setup_streams task completes.
+    """
+
+    def __init__(self, ray_op, data_stream):
         super(RayInputDataStream, self).__init__(
             data_type=data_stream.data_type,
             name=data_stream.name,
@@ -10,13 +18,12 @@ class RayInputDataStream(DataStream):
             callbacks=data_stream.callbacks,
             completion_callbacks=data_stream.completion_callbacks,
             uid=data_stream.uid)
-        self._actor_handle = actor_handle
+        self._ray_op = ray_op
 
     def setup(self):
         for on_msg_callback in self.callbacks:
-            self._actor_handle.register_callback.remote(
-                self.uid, on_msg_callback)
- 
+            self._ray_op.register_callback(self.uid, on_msg_callback)
+
         for on_watermark_callback in self.completion_callbacks:
-            self._actor_handle.register_completion_callback.remote(
+            self._ray_op.register_completion_callback(
                 self.uid, on_watermark_callback)
@@ -0,0 +1,66 @@
+import copy
+
+import numpy as np
+import ray
+
+
+class ObjectStoreData(object):
+    """Placeholder for message data that is stored in the Ray object store.
+
+    Attributes:
+        object_id: The Ray object id of the data.
+    """
+
+    def __init__(self, object_id):
+        self.object_id = object_id
+
+
+def put_message_data(msg, threshold):
+    """Moves large NumPy message data to the Ray object store.
+
+    The data is put in the object store once, and the returned message only
+    carries its object id. Hence, sending the message to N actors does not
+    serialize the array N times.
+
+    Args:
+        msg (Message): The message to send.
+        threshold (int): Minimum size in bytes of the arrays to move to the
+            object store. None to never move them.
+
+    Returns:
+        (Message): `msg` if its data is not moved, otherwise a copy of `msg`
+        which references the data in the object store.
+    """
+    if (threshold is None or not isinstance(msg.data, np.ndarray)
+            or msg.data.nbytes < threshold):
+        return msg
+    # Copy the message so that the sender's message still holds the array.
+    store_msg = copy.copy(msg)
+    store_msg.data = ObjectStoreData(ray.put(msg.data))
+    return store_msg
+
+
+def get_message_data(msg):
+    """Resolves message data that was moved to the Ray object store.
+
+    NumPy arrays are read from the object store without copying them, so the
+    resolved arrays are read-only.
+    """
+    if isinstance(msg.data, ObjectStoreData):
+        msg.data = ray.get(msg.data.object_id)
+    return msg
+
+
+def get_batch_message_data(msgs):
+    """Resolves the message data of a batch that was moved to the Ray object
+    store, with a single request to the object store.
+
+    Returns:
+        (list of Message): The messages, with their data resolved.
+    """
+    store_msgs = [msg for msg in msgs if isinstance(msg.data, ObjectStoreData)]
+    if store_msgs:
+        values = ray.get([msg.data.object_id for msg in store_msgs])
+        for (msg, value) in zip(store_msgs, values):
+            msg.data = value
+    return msgs
@@ -2,15 +2,28 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-import time
+import collections
+import logging
+import threading
 
 import ray
 
-from erdos.ray.frequency_actor import FrequencyActor
+from erdos.buffered_data_stream import bind_input_stream
+from erdos.data_stream import OVERFLOW_BLOCK
+from erdos.event_trace import EVENT_RECEIVE
+from erdos.event_trace import EVENT_WATERMARK_RECEIVE
+from erdos.latency_trace import LatencyTracer
+from erdos.ray.ray_object_store import get_batch_message_data
+from erdos.ray.ray_object_store import get_message_data
 from erdos.ray.ray_input_data_stream import RayInputDataStream
 from erdos.ray.ray_output_data_stream import RayOutputDataStream
+from erdos.serialization_stats import SerializationStats
 from erdos.utils import setup_logging
 from erdos.message import WatermarkMessage
+from erdos.metrics import MetricsRegistry
+from erdos.stream_queue import StreamQueue
+from erdos.timestamp import is_top_timestamp
+from erdos.timer_wheel import FrequencyActor
 
 
 @ray.remote
@@ -20,7 +33,10 @@ class RayOperator(object):
        Attributes:
            _op_handle: Handle to the ERDOS operator, which the actor wraps.
            _callbacks: A dict storing the callbacks associated to each stream.
-           _op_freq_actor: A Ray actor used to trigger periodic tasks/methods.
+           _stream_queues: A dict storing the queues of the input streams
+               that have a bounded queue.
+           _tasks: Tasks run by the dispatch thread, or None if callbacks
+               run in the actor's thread.
     """
 
     def __init__(self, op_handle):
@@ -28,6 +44,14 @@ class RayOperator(object):
         try:
             self._op = op_handle.op_cls(op_handle.name, **op_handle.init_args)
             self._op.framework = op_handle.framework
+            if op_handle.enable_metrics:
+                self._op.metrics = MetricsRegistry(op_handle.name)
+            if op_handle.trace_latency:
+                self._op.latency_tracer = LatencyTracer(
+                    op_handle.get_uid())
+            if op_handle.serialization_stats:
+                self._op.serialization_stats = SerializationStats(
+                    op_handle.get_uid())
         except TypeError as e:
             if len(e.args) > 0 and e.args[0].startswith("__init__"):
                 first_arg = "{0}.{1}".format(op_handle.op_cls.__name__,
@@ -40,48 +64,65 @@ class RayOperator(object):
         self._handle = None
         self._callbacks = {}
         self._completion_callbacks = {}
+        self._stream_queues = {}
+        self._tasks = None
+        self._tasks_condition = threading.Condition()
+        self._dispatch_thread = None
+        self._execute_thread = None
 
     def on_msg(self, msg):
         """Invokes corresponding callback for stream stream_name."""
-        self._op.log_event(time.time(), msg.timestamp,
-                           'receive {}'.format(msg.stream_name))
-        for cb in self._callbacks.get(msg.stream_uid, []):
-            cb(msg)
+        self._op.trace_event(EVENT_RECEIVE, msg.stream_name, msg.timestamp)
+        if msg.trace is not None and self._op.latency_tracer is not None:
+            # Each actor receives its own copy of the message.
+            msg.trace = self._op.latency_tracer.on_enqueue(msg)
+        queue = self._stream_queues.get(msg.stream_uid)
+        if queue is None:
+            self._dispatch(self._process_msg, msg)
+        elif queue.put(msg) and queue.schedule():
+            self._dispatch(self._process_stream_queue, queue)
+
+    def on_msg_batch(self, msgs):
+        """Invokes the callbacks for each message of a batch, in order."""
+        for msg in get_batch_message_data(msgs):
+            self.on_msg(msg)
 
     def on_completion_msg(self, msg):
         """Invokes corresponding callback for stream stream_name."""
-        self._op.log_event(time.time(), msg.timestamp,
-                           'receive watermark {}'.format(msg.stream_name))
-
-        # Ensure that the watermark is monotonically increasing.
-        high_watermark = self._op._stream_to_high_watermark[msg.stream_name]
-        if not high_watermark:
-            # The first watermark, just set the dictionary with the value.
-            self._op._stream_to_high_watermark[
-                msg.stream_name] = msg.timestamp
+        self._op.trace_event(EVENT_WATERMARK_RECEIVE, msg.stream_name,
+                             msg.timestamp)
+        queue = self._stream_queues.get(msg.stream_uid)
+        if queue is None:
+            self._dispatch(self._process_completion_msg, msg)
         else:
-            if high_watermark >= msg.timestamp:
-                raise Exception(
-                    "The watermark received in the msg {} is not "
-                    "higher than the watermark previously received "
-                    "on the same stream: {}".format(msg, high_watermark))
-            else:
-                self._op._stream_to_high_watermark[msg.stream_name] = \
-                        msg.timestamp
-
-        # Now check if all other streams have a higher or equal watermark.
-        # If yes, flow this watermark. If not, return from this function
-        # Also, maintain the lowest watermark observed.
-        low_watermark = msg.timestamp
-        for stream, watermark in self._op._stream_to_high_watermark.items():
-            if stream != msg.stream_name:
-                if not watermark or watermark < msg.timestamp:
-                    return
-                if low_watermark > watermark:
-                    low_watermark = watermark
+            queue.put_watermark(msg)
+            if queue.schedule():
+                self._dispatch(self._process_stream_queue, queue)
+
+    def _process_msg(self, msg):
+        tracer = self._op.latency_tracer
+        hop = msg.trace if tracer is not None else None
+        if hop is not None:
+            tracer.on_dequeue(hop)
+        msg = get_message_data(msg)
+        if hop is not None:
+            tracer.on_callback_start(msg, hop)
+        for cb in self._callbacks.get(msg.stream_uid, []):
+            cb(msg)
+        if hop is not None:
+            tracer.on_callback_end(hop)
+
+    def _process_completion_msg(self, msg):
+        self._op._close_buffered_stream(msg.stream_uid, msg.timestamp)
+        # Update the stream's high watermark. The watermark only flows if
+        # the low watermark across all input streams advanced.
+        low_watermark = self._op._watermark_frontier.update(
+            msg.stream_uid, msg.timestamp)
+        if low_watermark is None:
+            return
         new_msg = WatermarkMessage(low_watermark)
         new_msg.stream_uid = msg.stream_uid
-        
+
         # Call the required callbacks.
         for cb in self._completion_callbacks.get(new_msg.stream_uid, []):
             cb(new_msg)
@@ -91,48 +132,165 @@ class RayOperator(object):
 
         # TODO (sukritk) :: Same issue as erdos/ros/ros_input_data_stream.py
         # TODO (sukritk) FIX (Ray Issue #4463): Remove when Ray issue is fixed.
-        if not self._completion_callbacks.get(new_msg.stream_uid):
-            watermark_msg = WatermarkMessage(msg.timestamp, msg.stream_name)
+        # The end-of-stream watermark always flows, unless the callbacks
+        # already forwarded it.
+        if is_top_timestamp(low_watermark):
+            self._op.send_end_of_stream()
+        elif not self._completion_callbacks.get(new_msg.stream_uid):
+            watermark_msg = WatermarkMessage(low_watermark, msg.stream_name)
             for output_stream in self._op.output_streams.values():
                 output_stream.send(watermark_msg)
 
     def register_callback(self, stream_uid, callback_name):
         """Registers a callback for a given stream."""
         cbs = self._callbacks.get(stream_uid, [])
-        self._callbacks[stream_uid] = cbs + [getattr(self._op, callback_name)]
+        self._callbacks[stream_uid] = cbs + [
+            self._wrap_callback(stream_uid, getattr(self._op, callback_name))
+        ]
 
     def register_completion_callback(self, stream_uid, callback_name):
         """Registers a watermark completion callback for a given stream."""
         callbacks = self._completion_callbacks.get(stream_uid, [])
-        self._completion_callbacks[stream_uid] = callbacks + [getattr(self._op, callback_name)]
+        self._completion_callbacks[stream_uid] = callbacks + [
+            self._wrap_callback(stream_uid, getattr(self._op, callback_name))
+        ]
 
     def on_frequency(self, func_name, *args):
         """Invokes operator func_name.
-        Method is called by the frequency actor when a periodic task/method
-        must run.
+        Method is called by the timer wheel when a periodic task/method must
+        run.
         """
+        self._dispatch(self._run_frequency, (func_name, args))
+
+    def get_end_time(self):
+        """Returns the time at which the operator sent the end-of-stream
+        watermark, or None if it did not."""
+        return self._op._end_time
+
+    def close(self):
+        """Stops running the operator's periodic methods, and closes the
+        operator before the actor is killed."""
+        if self._op.freq_actor is not None:
+            self._op.freq_actor.cancel()
+        self._op.close()
+
+    def get_queue_metrics(self):
+        """Returns the depth and drop counts of the input stream queues."""
+        return dict((stream_uid, queue.get_metrics())
+                    for (stream_uid, queue) in self._stream_queues.items())
+
+    def get_metrics(self):
+        """Returns the operator's metrics, or None if metrics are
+        disabled."""
+        if self._op.metrics is None:
+            return None
+        return self._op.metrics.snapshot()
+
+    def get_latency_hops(self):
+        """Returns the hops recorded by the operator's latency tracer, or
+        None if latency tracing is disabled."""
+        if self._op.latency_tracer is None:
+            return None
+        return self._op.latency_tracer.get_hops()
+
+    def get_serialization_report(self):
+        """Returns the serialization cost of the operator's output streams,
+        or None if serialization accounting is disabled."""
+        if self._op.serialization_stats is None:
+            return None
+        return self._op.serialization_stats.get_report()
+
+    def _wrap_callback(self, stream_uid, callback):
+        if self._op.metrics is None:
+            return callback
+        return self._op.metrics.wrap_callback(callback, stream_uid)
+
+    def _add_queue_gauges(self):
+        if self._op.metrics is None:
+            return
+        for (stream_uid, queue) in self._stream_queues.items():
+            self._op.metrics.gauge('queue.{}'.format(stream_uid),
+                                   queue.get_metrics)
+
+    def _run_frequency(self, func_and_args):
+        if self._op._ended:
+            # The periodic method was queued before the operator ended.
+            return
+        (func_name, args) = func_and_args
         callback = getattr(self._op, func_name)
         callback(*args)
 
+    def _process_stream_queue(self, queue):
+        try:
+            msg = queue.get()
+            if isinstance(msg, WatermarkMessage):
+                self._process_completion_msg(msg)
+            elif msg is not None:
+                self._process_msg(msg)
+        finally:
+            if queue.reschedule():
+                self._dispatch(self._process_stream_queue, queue)
+
+    def _dispatch(self, handler, arg):
+        """Runs a task inline, or hands it to the dispatch thread if the
+        operator has bounded input stream queues."""
+        if self._tasks is None:
+            handler(arg)
+            return
+        with self._tasks_condition:
+            self._tasks.append((handler, arg))
+            self._tasks_condition.notify()
+
+    def _run_tasks(self):
+        while True:
+            with self._tasks_condition:
+                while not self._tasks:
+                    self._tasks_condition.wait()
+                (handler, arg) = self._tasks.popleft()
+            try:
+                handler(arg)
+            except Exception:
+                logging.exception('Error in operator {} while processing '
+                                  '{}'.format(self._op.name, arg))
+
     def set_handle(self, handle):
         self._handle = handle
 
     def setup_frequency_actor(self):
-        """Creates a Ray frequency actor.
-        Each Ray operator has a Ray frequency actor associated with it. The
-        actor call on_frequency when periodic methods must execute.
+        """Schedules periodic methods on the timer wheel of the actor's
+        process. The wheel submits on_frequency tasks to the actor when
+        periodic methods must execute.
         """
-        self._op.freq_actor = FrequencyActor.remote(self._handle)
+        self._op.freq_actor = FrequencyActor(self._handle.on_frequency.remote)
 
     def setup_streams(self, dependant_ops_handles):
         """Sets the input_stream.ray_sink to the Ray operator."""
-        # Populate the map with the correct stream names.
+        # Track the watermarks of all the input streams.
         for input_stream in self._input_streams:
-            self._op._stream_to_high_watermark[input_stream.name] = None
+            self._op._watermark_frontier.add_stream(input_stream.uid)
+            # Senders' actor calls never wait for the actor, so blocking the
+            # actor would not bound its mailbox. Queues with the
+            # OVERFLOW_BLOCK policy are therefore not bounded on Ray.
+            if (input_stream.max_queue_size
+                    and input_stream.overflow_policy != OVERFLOW_BLOCK):
+                self._stream_queues[input_stream.uid] = StreamQueue(
+                    input_stream.name, input_stream.max_queue_size,
+                    input_stream.overflow_policy)
+        self._add_queue_gauges()
+        if self._stream_queues:
+            # The actor's mailbox is unbounded. Run the callbacks in another
+            # thread so that the actor drains its mailbox into the bounded
+            # queues. All the tasks go through the dispatch thread so that
+            # callbacks do not run concurrently.
+            self._tasks = collections.deque()
+            self._dispatch_thread = threading.Thread(target=self._run_tasks)
+            self._dispatch_thread.daemon = True
+            self._dispatch_thread.start()
 
         # Wrap input streams in Ray data streams.
         ray_input_streams = [
-            RayInputDataStream(self._handle, input_stream)
+            bind_input_stream(input_stream,
+                              RayInputDataStream(self, input_stream))
             for input_stream in self._input_streams
         ]
         self._op._add_input_streams(ray_input_streams)
@@ -147,5 +305,15 @@ class RayOperator(object):
         self._op._internal_setup_streams()
 
     def execute(self):
-        """Executes the operator."""
-        self._op.execute()
+        """Executes the operator.
+
+        Operators with buffered input streams pull messages in `Op.execute`,
+        which runs in a separate thread so that the actor keeps receiving
+        the messages.
+        """
+        if self._op._buffered_input_streams:
+            self._execute_thread = threading.Thread(target=self._op.execute)
+            self._execute_thread.daemon = True
+            self._execute_thread.start()
+        else:
+            self._op.execute()
@@ -1,7 +1,13 @@
+import pickle
+import threading
 import time
 
 from erdos.data_stream import DataStream
+from erdos.event_trace import EVENT_SEND
+from erdos.event_trace import EVENT_WATERMARK_SEND
 from erdos.message import WatermarkMessage
+from erdos.ray.ray_object_store import ObjectStoreData
+from erdos.ray.ray_object_store import put_message_data
 
 
 class RayOutputDataStream(DataStream):
@@ -11,11 +17,20 @@ class RayOutputDataStream(DataStream):
             name=data_stream.name,
             labels=data_stream.labels,
             callbacks=data_stream.callbacks,
-            uid=data_stream.uid)
+            uid=data_stream.uid,
+            batch_size=data_stream.batch_size,
+            batch_timeout_ms=data_stream.batch_timeout_ms,
+            zero_copy_threshold=data_stream.zero_copy_threshold)
         self._op = op
         self._dependant_op_handles = dependant_op_handles
         self._dependant_op_on_msg = None
+        self._dependant_op_on_msg_batch = None
         self._dependant_op_on_completion = None
+        # Messages waiting to be sent in a single on_msg_batch call.
+        self._batch = []
+        self._batch_deadline = None
+        self._batch_condition = threading.Condition()
+        self._flush_thread = None
 
     def send(self, msg):
         """Send a message on the stream.
@@ -24,15 +39,35 @@ class RayOutputDataStream(DataStream):
         msg.stream_name = self.name
         msg.stream_uid = self.uid
         if isinstance(msg, WatermarkMessage):
-            self._op.log_event(time.time(), msg.timestamp,
-                           'watermark send {}'.format(self.name))
-            for on_completion_func in self._dependant_op_on_completion:
-                on_completion_func.remote(msg)
+            self._op.trace_event(EVENT_WATERMARK_SEND, self.name,
+                                 msg.timestamp)
+            with self._batch_condition:
+                # Messages must reach the sinks before the watermark that
+                # completes their timestamp.
+                self._flush_batch()
+                for on_completion_func in self._dependant_op_on_completion:
+                    on_completion_func.remote(msg)
         else:
-            self._op.log_event(time.time(), msg.timestamp,
-                               'send {}'.format(self.name))
-            for on_msg_func in self._dependant_op_on_msg:
-                on_msg_func.remote(msg)
+            self._op.trace_event(EVENT_SEND, self.name, msg.timestamp)
+            if self._op.metrics is not None:
+                self._op.metrics.on_send_data(self.name, msg.data)
+            if self._op.latency_tracer is not None:
+                msg.trace = self._op.latency_tracer.on_send(msg.timestamp)
+            stats = self._op.serialization_stats
+            if stats is not None and stats.should_sample(self.name):
+                msg = self._put_and_measure(msg, stats)
+            else:
+                msg = put_message_data(msg, self.zero_copy_threshold)
+            if self.batch_size > 1:
+                self._add_to_batch(msg)
+            else:
+                for on_msg_func in self._dependant_op_on_msg:
+                    on_msg_func.remote(msg)
+
+    def flush(self):
+        """Sends the messages buffered in the current batch."""
+        with self._batch_condition:
+            self._flush_batch()
 
     def setup(self):
         """Setup dependant operator on_msg methods.
@@ -43,7 +78,64 @@ class RayOutputDataStream(DataStream):
             getattr(actor_handle, "on_msg")
             for actor_handle in self._dependant_op_handles
         ]
+        self._dependant_op_on_msg_batch = [
+            getattr(actor_handle, "on_msg_batch")
+            for actor_handle in self._dependant_op_handles
+        ]
         self._dependant_op_on_completion = [
             getattr(actor_handle, "on_completion_msg")
             for actor_handle in self._dependant_op_handles
         ]
+        if self.batch_size > 1 and self.batch_timeout_ms is not None:
+            self._flush_thread = threading.Thread(target=self._flush_loop)
+            self._flush_thread.daemon = True
+            self._flush_thread.start()
+
+    def _put_and_measure(self, msg, stats):
+        """Moves the message's data to the object store if it is large, and
+        records the cost of serializing the message.
+
+        Ray serializes the message when it submits the on_msg tasks, so the
+        message is pickled once more to estimate its size and serialization
+        time. The data moved to the object store is counted at its size.
+        """
+        start_time = time.time()
+        store_msg = put_message_data(msg, self.zero_copy_threshold)
+        num_bytes = len(pickle.dumps(store_msg, pickle.HIGHEST_PROTOCOL))
+        if isinstance(store_msg.data, ObjectStoreData):
+            num_bytes += msg.data.nbytes
+        stats.record(self.name, num_bytes, time.time() - start_time)
+        return store_msg
+
+    def _add_to_batch(self, msg):
+        with self._batch_condition:
+            self._batch.append(msg)
+            if len(self._batch) >= self.batch_size:
+                self._flush_batch()
+            elif len(self._batch) == 1 and self.batch_timeout_ms is not None:
+                self._batch_deadline = (time.time() +
+                                        self.batch_timeout_ms / 1000.0)
+                self._batch_condition.notify()
+
+    def _flush_batch(self):
+        """Sends the current batch. The caller must hold the batch lock."""
+        if not self._batch:
+            return
+        batch = self._batch
+        self._batch = []
+        self._batch_deadline = None
+        for on_msg_batch_func in self._dependant_op_on_msg_batch:
+            on_msg_batch_func.remote(batch)
+
+    def _flush_loop(self):
+        """Sends partial batches whose time window expired."""
+        with self._batch_condition:
+            while True:
+                if self._batch_deadline is None:
+                    self._batch_condition.wait()
+                    continue
+                time_until_flush = self._batch_deadline - time.time()
+                if time_until_flush > 0:
+                    self._batch_condition.wait(time_until_flush)
+                else:
+                    self._flush_batch()
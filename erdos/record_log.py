@@ -0,0 +1,318 @@
+import collections
+import mmap
+import os
+import pickle
+import struct
+import time
+import zlib
+
+from erdos.async_writer import AsyncWriter
+from erdos.message_codec import BinaryMessageCodec
+
+# Log layout:
+#   file header: magic, version, length of the pickled stream info
+#   pickled list of (data_type, name) of the recorded streams
+#   chunks: chunk header, followed by the (possibly compressed) records
+#   footer: pickled index, followed by the trailer
+# Records consist of the frame's length and the time at which the message
+# was recorded, followed by the message's frame encoded by
+# BinaryMessageCodec, which stores NumPy arrays as raw buffers.
+_MAGIC = b'ERDOSLOG'
+_FOOTER_MAGIC = b'ERDOSIDX'
+# Version 2 added the record times to the record headers.
+_VERSION = 2
+_FILE_HEADER = struct.Struct('<8sBI')
+# compression, stored size, raw size.
+_CHUNK_HEADER = struct.Struct('<BII')
+_RECORD_HEADER = struct.Struct('<Id')
+# footer offset, footer magic.
+_TRAILER = struct.Struct('<Q8s')
+
+COMPRESSION_NONE = None
+COMPRESSION_ZLIB = 'zlib'
+_COMPRESSION_IDS = {COMPRESSION_NONE: 0, COMPRESSION_ZLIB: 1}
+
+# Location of a record in the log. record_offset is the offset of the
+# record's frame in the uncompressed chunk, and time the time in seconds at
+# which the message was recorded.
+LogIndexEntry = collections.namedtuple('LogIndexEntry', [
+    'stream_name', 'coordinates', 'time', 'chunk_offset', 'record_offset',
+    'size'
+])
+
+
+class LogWriter(object):
+    """Writes messages to a chunked log.
+
+    Records are buffered into chunks of about chunk_size bytes, which are
+    compressed separately. The index of the records is written in a footer
+    when the log is closed. Logs that were not closed can still be read, but
+    their index has to be rebuilt by scanning the chunks.
+
+    Attributes:
+        filename (str): Path of the log.
+        chunk_size (int): Size in bytes above which a chunk is written.
+        compression (str): COMPRESSION_NONE or COMPRESSION_ZLIB.
+    """
+
+    def __init__(self,
+                 filename,
+                 streams,
+                 chunk_size=4 * 1024 * 1024,
+                 compression=COMPRESSION_NONE):
+        if compression not in _COMPRESSION_IDS:
+            raise ValueError('Unknown compression {}'.format(compression))
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.compression = compression
+        self._codec = BinaryMessageCodec()
+        self._file = open(filename, 'wb')
+        stream_info = pickle.dumps(streams, pickle.HIGHEST_PROTOCOL)
+        self._file.write(
+            _FILE_HEADER.pack(_MAGIC, _VERSION, len(stream_info)))
+        self._file.write(stream_info)
+        self._index = []
+        # Records of the current chunk, and their index entries.
+        self._chunk = []
+        self._chunk_entries = []
+        self._chunk_bytes = 0
+
+    def write(self, msg, record_time=None):
+        """Writes a message received at record_time, which defaults to the
+        current time."""
+        if record_time is None:
+            record_time = time.time()
+        frame = self._codec.encode(
+            msg, getattr(msg, 'stream_uid', msg.stream_name))
+        self._chunk_entries.append(
+            (msg.stream_name, msg.timestamp.coordinates, record_time,
+             self._chunk_bytes + _RECORD_HEADER.size, len(frame)))
+        self._chunk.append(_RECORD_HEADER.pack(len(frame), record_time))
+        self._chunk.append(frame)
+        self._chunk_bytes += _RECORD_HEADER.size + len(frame)
+        if self._chunk_bytes >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the current chunk."""
+        if not self._chunk:
+            return
+        data = b''.join(self._chunk)
+        if self.compression == COMPRESSION_ZLIB:
+            stored = zlib.compress(data, 1)
+        else:
+            stored = data
+        chunk_offset = self._file.tell()
+        self._file.write(
+            _CHUNK_HEADER.pack(_COMPRESSION_IDS[self.compression],
+                               len(stored), len(data)))
+        self._file.write(stored)
+        self._file.flush()
+        for (name, coordinates, record_time, record_offset,
+             size) in self._chunk_entries:
+            self._index.append(
+                LogIndexEntry(name, coordinates, record_time, chunk_offset,
+                              record_offset, size))
+        self._chunk = []
+        self._chunk_entries = []
+        self._chunk_bytes = 0
+
+    def sync(self):
+        """Syncs the written chunks to disk."""
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """Writes the last chunk and the index. Can be called several times."""
+        if self._file.closed:
+            return
+        self.flush()
+        footer_offset = self._file.tell()
+        pickle.dump([tuple(entry) for entry in self._index], self._file,
+                    pickle.HIGHEST_PROTOCOL)
+        self._file.write(_TRAILER.pack(footer_offset, _FOOTER_MAGIC))
+        self._file.close()
+
+
+class AsyncLogWriter(AsyncWriter):
+    """Writes messages to a log on a background thread.
+
+    The messages are encoded by the thread, so they must not be modified
+    after they are written.
+    """
+
+    def __init__(self,
+                 filename,
+                 streams,
+                 chunk_size=4 * 1024 * 1024,
+                 compression=COMPRESSION_NONE,
+                 **kwargs):
+        self._log_writer = LogWriter(filename, streams, chunk_size,
+                                     compression)
+        super(AsyncLogWriter, self).__init__(
+            name='erdos-writer-{}'.format(filename), **kwargs)
+
+    def write(self, msg):
+        super(AsyncLogWriter, self).write((msg, time.time()))
+
+    def _write_batch(self, items):
+        for (msg, record_time) in items:
+            self._log_writer.write(msg, record_time)
+
+    def _sync(self):
+        self._log_writer.sync()
+
+    def _close(self):
+        self._log_writer.close()
+
+
+def _read_file_header(f):
+    """Returns the stream info and the offset of the first chunk."""
+    header = f.read(_FILE_HEADER.size)
+    if len(header) < _FILE_HEADER.size:
+        raise ValueError('{} is not an ERDOS log'.format(f.name))
+    (magic, version, info_size) = _FILE_HEADER.unpack(header)
+    if magic != _MAGIC:
+        raise ValueError('{} is not an ERDOS log'.format(f.name))
+    if version != _VERSION:
+        raise ValueError('Unsupported log version {}'.format(version))
+    streams = pickle.loads(f.read(info_size))
+    return (streams, _FILE_HEADER.size + info_size)
+
+
+def read_log_streams(filename):
+    """Returns the (data_type, name) of the streams recorded in a log."""
+    with open(filename, 'rb') as f:
+        return _read_file_header(f)[0]
+
+
+class LogReader(object):
+    """Reads the messages of a log written by `LogWriter`.
+
+    The reader uses the log's index to seek to a timestamp and to skip the
+    records of the streams that are not read. If use_mmap is True, the log
+    is memory-mapped, and the NumPy arrays read from uncompressed chunks
+    share memory with the mapping instead of being copied.
+
+    Attributes:
+        filename (str): Path of the log.
+        streams (list of (type, str)): Data type and name of the recorded
+            streams.
+        index (list of LogIndexEntry): Location of the records, in the order
+            in which they were written.
+    """
+
+    def __init__(self, filename, use_mmap=True):
+        self.filename = filename
+        self._codec = BinaryMessageCodec()
+        self._file = open(filename, 'rb')
+        (self.streams, self._data_offset) = _read_file_header(self._file)
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._mmap = None
+        if use_mmap:
+            self._mmap = mmap.mmap(self._file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        # The last decompressed chunk.
+        self._chunk_offset = None
+        self._chunk = None
+        self.index = self._read_index()
+
+    def get_entries(self, stream_names=None, start_timestamp=None):
+        """Returns the index entries of the records of the given streams, and
+        whose timestamps are greater or equal to start_timestamp."""
+        entries = self.index
+        if stream_names is not None:
+            stream_names = set(stream_names)
+            entries = [e for e in entries if e.stream_name in stream_names]
+        if start_timestamp is not None:
+            start = start_timestamp.coordinates
+            entries = [e for e in entries if e.coordinates >= start]
+        return entries
+
+    def read(self, stream_names=None, start_timestamp=None):
+        """Returns a generator of the recorded messages.
+
+        Args:
+            stream_names (list of str): Only read the messages of these
+                streams. All streams are read if None.
+            start_timestamp (Timestamp): Skip the messages with lower
+                timestamps.
+        """
+        for entry in self.get_entries(stream_names, start_timestamp):
+            yield self.read_entry(entry)
+
+    def read_entry(self, entry):
+        """Reads the message at the location given by an index entry."""
+        return self._codec.decode(self._read_frame(entry))
+
+    def close(self):
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Arrays read from the log still use the mapping, which is
+                # released once they are garbage collected.
+                pass
+        self._file.close()
+
+    def _read_frame(self, entry):
+        (compression, stored_size, raw_size) = _CHUNK_HEADER.unpack(
+            self._read(entry.chunk_offset, _CHUNK_HEADER.size))
+        if compression == _COMPRESSION_IDS[COMPRESSION_NONE]:
+            return self._read(
+                entry.chunk_offset + _CHUNK_HEADER.size +
+                entry.record_offset, entry.size)
+        if self._chunk_offset != entry.chunk_offset:
+            self._chunk = zlib.decompress(
+                self._read(entry.chunk_offset + _CHUNK_HEADER.size,
+                           stored_size))
+            self._chunk_offset = entry.chunk_offset
+        return memoryview(self._chunk)[entry.record_offset:entry.record_offset
+                                       + entry.size]
+
+    def _read(self, offset, size):
+        if self._mmap is not None:
+            return memoryview(self._mmap)[offset:offset + size]
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def _read_index(self):
+        if self._size >= self._data_offset + _TRAILER.size:
+            (footer_offset, magic) = _TRAILER.unpack(
+                bytes(self._read(self._size - _TRAILER.size, _TRAILER.size)))
+            if magic == _FOOTER_MAGIC:
+                footer = self._read(footer_offset,
+                                    self._size - _TRAILER.size - footer_offset)
+                return [LogIndexEntry(*entry)
+                        for entry in pickle.loads(footer)]
+        return self._scan_chunks()
+
+    def _scan_chunks(self):
+        """Rebuilds the index of a log that was not closed. Stops at the
+        first truncated chunk."""
+        index = []
+        chunk_offset = self._data_offset
+        while chunk_offset + _CHUNK_HEADER.size <= self._size:
+            (_, stored_size, raw_size) = _CHUNK_HEADER.unpack(
+                bytes(self._read(chunk_offset, _CHUNK_HEADER.size)))
+            end_offset = chunk_offset + _CHUNK_HEADER.size + stored_size
+            if end_offset > self._size:
+                break
+            record_offset = 0
+            while record_offset < raw_size:
+                entry = LogIndexEntry(None, None, None, chunk_offset,
+                                      record_offset + _RECORD_HEADER.size, 0)
+                (size, record_time) = _RECORD_HEADER.unpack(
+                    bytes(self._read_frame(entry._replace(
+                        record_offset=record_offset,
+                        size=_RECORD_HEADER.size))))
+                msg = self.read_entry(entry._replace(size=size))
+                index.append(
+                    entry._replace(stream_name=msg.stream_name,
+                                   coordinates=msg.timestamp.coordinates,
+                                   time=record_time,
+                                   size=size))
+                record_offset += _RECORD_HEADER.size + size
+            chunk_offset = end_offset
+        return index
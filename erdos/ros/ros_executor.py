@@ -1,9 +1,15 @@
+import logging
 from multiprocessing import Process
 import rospy
 
+from erdos.buffered_data_stream import bind_input_stream
 from erdos.executor import Executor
 from erdos.ros.ros_input_data_stream import ROSInputDataStream
 from erdos.ros.ros_output_data_stream import ROSOutputDataStream
+from erdos.serialization_stats import SerializationStats
+from erdos.serialization_stats import format_serialization_report
+
+logger = logging.getLogger(__name__)
 
 
 class ROSExecutor(Executor):
@@ -27,6 +33,15 @@ class ROSExecutor(Executor):
     def _execute_helper(self):
         op = self._init_operator()
         rospy.init_node(op.name, anonymous=True)
+        if op.serialization_stats is not None:
+            # Each operator runs in its own process, which reports the cost
+            # of its output streams when it shuts down.
+            rospy.on_shutdown(lambda: logger.info(
+                format_serialization_report(
+                    op.serialization_stats.get_report())))
+        # The process is terminated with SIGTERM, upon which rospy shuts
+        # down.
+        rospy.on_shutdown(op.close)
         op._internal_setup_streams()
         op.execute()
 
@@ -39,6 +54,9 @@ class ROSExecutor(Executor):
             op = self.op_handle.op_cls(self.op_handle.name,
                                        **self.op_handle.init_args)
             op.framework = self.op_handle.framework
+            if self.op_handle.serialization_stats:
+                op.serialization_stats = SerializationStats(
+                    self.op_handle.get_uid())
         except TypeError as e:
             if len(e.args) > 0 and e.args[0].startswith("__init__"):
                 first_arg = "{0}.{1}".format(self.op_handle.op_cls.__name__,
@@ -48,7 +66,8 @@ class ROSExecutor(Executor):
 
         # Set input/output streams
         ros_input_streams = [
-            ROSInputDataStream(op, input_stream)
+            bind_input_stream(input_stream,
+                              ROSInputDataStream(op, input_stream))
             for input_stream in self.op_handle.input_streams
         ]
         ros_output_streams = [
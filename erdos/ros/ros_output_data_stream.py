@@ -1,17 +1,20 @@
 import logging
-import pickle
 import time
 
 import rospy
 from std_msgs.msg import String
 
 from erdos.data_stream import DataStream
+from erdos.event_trace import EVENT_SEND
+from erdos.event_trace import EVENT_WATERMARK_SEND
+from erdos.message import WatermarkMessage
+from erdos.ros.ros_utils import get_codec
 
 logger = logging.getLogger(__name__)
 
 
 class ROSOutputDataStream(DataStream):
-    def __init__(self, op, data_stream):
+    def __init__(self, op, data_stream, codec=None):
         super(ROSOutputDataStream, self).__init__(
             data_type=data_stream.data_type,
             name=data_stream.name,
@@ -20,21 +23,29 @@ class ROSOutputDataStream(DataStream):
             uid=data_stream.uid)
         self.op = op
         self.publisher = None
+        self.codec = codec if codec else get_codec(self.data_type)
 
     def send(self, msg):
         """Sending a message on a ROS stream (i.e., publishes it)."""
-        self.op.log_event(time.time(), msg.timestamp,
-                          'send {}'.format(self.name))
+        self.op.trace_event(
+            EVENT_WATERMARK_SEND
+            if isinstance(msg, WatermarkMessage) else EVENT_SEND, self.name,
+            msg.timestamp)
         msg.stream_name = self.name
-        msg = pickle.dumps(msg)
-        self.publisher.publish(msg)
+        stats = self.op.serialization_stats
+        if stats is not None and stats.should_sample(self.name):
+            start_time = time.time()
+            data = self.codec.encode(msg, self.uid)
+            stats.record(self.name, len(data), time.time() - start_time)
+        else:
+            data = self.codec.encode(msg, self.uid)
+        self.publisher.publish(data)
 
     def setup(self):
         """Setups the source operator as a publisher."""
         data_type = self.data_type if self.data_type else String
-        # TODO(ionel): We currently transform messages to Strings because
-        # we want to pass timestamp and stream info along with the message.
-        # However, the extra serialization can add overheads. Fix!
+        # Messages are encoded by the stream's codec because we want to pass
+        # timestamp and stream info along with the message.
         self.publisher = rospy.Publisher(
             self.uid, String, latch=True, queue_size=10)
         # TODO(yika): hacky way to stall generator publisher in order to wait
@@ -0,0 +1,18 @@
+from erdos.message_codec import BinaryMessageCodec
+from erdos.message_codec import PickleMessageCodec
+
+
+def is_ros_message_type(data_type):
+    """Returns True if data_type is a message class generated by ROS."""
+    return hasattr(data_type, '_type') and hasattr(data_type, '_md5sum')
+
+
+def get_codec(data_type):
+    """Selects the codec used to transfer messages over a ROS topic.
+
+    Messages carrying native ROS types keep being pickled, and all other
+    messages use the binary codec, which avoids pickling NumPy arrays.
+    """
+    if is_ros_message_type(data_type):
+        return PickleMessageCodec()
+    return BinaryMessageCodec()
@@ -0,0 +1,93 @@
+import threading
+import time
+
+
+class SerializationStats(object):
+    """Accounts for the serialized size and the serialization time of the
+    messages an operator sends, per output stream.
+
+    Only one out of sample_interval messages of each stream is measured, and
+    the stream's byte rate is extrapolated from the sampled sizes.
+
+    Attributes:
+        op_name (str): Name of the operator.
+        sample_interval (int): Interval between two measured messages.
+    """
+
+    def __init__(self, op_name, sample_interval=16):
+        self.op_name = op_name
+        self.sample_interval = sample_interval
+        self._start_time = time.time()
+        # Maps stream names to [number of messages, number of sampled
+        # messages, sampled bytes, sampled serialization time].
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def should_sample(self, stream_name):
+        """Counts a message sent on the stream, and returns True if its
+        serialization must be measured and recorded."""
+        with self._lock:
+            stream = self._streams.get(stream_name)
+            if stream is None:
+                stream = [0, 0, 0, 0.0]
+                self._streams[stream_name] = stream
+            stream[0] += 1
+            return (stream[0] - 1) % self.sample_interval == 0
+
+    def record(self, stream_name, num_bytes, duration):
+        """Records the size in bytes and the serialization time in seconds of
+        a sampled message."""
+        with self._lock:
+            stream = self._streams[stream_name]
+            stream[1] += 1
+            stream[2] += num_bytes
+            stream[3] += duration
+
+    def get_report(self):
+        """Returns a list with the estimated bytes and serialization time of
+        each stream."""
+        duration = max(time.time() - self._start_time, 1e-9)
+        report = []
+        with self._lock:
+            streams = [(name, list(stream))
+                       for (name, stream) in self._streams.items()]
+        for (stream_name, (num_msgs, num_sampled, num_bytes,
+                           serialization_time)) in streams:
+            if num_sampled == 0:
+                continue
+            mean_bytes = float(num_bytes) / num_sampled
+            mean_time = serialization_time / num_sampled
+            report.append({
+                'op': self.op_name,
+                'stream': stream_name,
+                'num_msgs': num_msgs,
+                'num_sampled': num_sampled,
+                'mean_bytes': mean_bytes,
+                'bytes_per_sec': mean_bytes * num_msgs / duration,
+                'mean_serialization_ms': mean_time * 1000,
+                'serialization_ms_per_sec': (mean_time * num_msgs * 1000 /
+                                             duration),
+            })
+        return report
+
+
+def format_serialization_report(stream_reports, top=10):
+    """Formats the streams with the highest byte rates.
+
+    Args:
+        stream_reports (list of dict): Stream reports returned by
+            `SerializationStats.get_report`.
+        top (int): Number of streams to list.
+    """
+    stream_reports = sorted(stream_reports,
+                            key=lambda report: report['bytes_per_sec'],
+                            reverse=True)[:top]
+    lines = ['Top {} streams by serialized bytes per second:'.format(
+        len(stream_reports))]
+    for report in stream_reports:
+        lines.append(
+            '  {op}/{stream}: {bytes_per_sec:.0f} B/s, {num_msgs} msgs, '
+            'mean {mean_bytes:.0f} B, serialization '
+            '{mean_serialization_ms:.3f} ms/msg '
+            '({serialization_ms_per_sec:.1f} ms/s)'.format(**report))
+    return '\n'.join(lines)
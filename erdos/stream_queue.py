@@ -0,0 +1,147 @@
+import collections
+import threading
+
+from erdos.data_stream import OVERFLOW_BLOCK
+from erdos.data_stream import OVERFLOW_DROP_NEWEST
+from erdos.data_stream import OVERFLOW_LATEST_PER_TIMESTAMP
+from erdos.message import WatermarkMessage
+
+
+class StreamQueue(object):
+    """Bounded queue of the messages received on an input stream, which
+    wait for the operator to run the stream's callbacks.
+
+    Watermarks are queued with the messages so that they are processed in
+    order, but they do not count towards the bound and are never dropped.
+    With the `OVERFLOW_BLOCK` policy, senders that must not block (e.g., the
+    threads that run operator callbacks) add their messages beyond the
+    bound, which the `num_over_bound` metric counts.
+
+    The queue is drained by one task at a time, which processes an entry and
+    is rescheduled while entries remain. `schedule` and `reschedule` track
+    whether such a task is pending, so that the operator's mailbox holds at
+    most one task per queue.
+
+    Attributes:
+        stream_name (str): The name of the input stream.
+        max_size (int): Maximum number of queued messages. 0 if unbounded.
+        overflow_policy (str): What to do with a message received when the
+            queue is full. One of the `OVERFLOW_*` policies of `DataStream`.
+    """
+
+    def __init__(self, stream_name, max_size=0,
+                 overflow_policy=OVERFLOW_BLOCK):
+        self.stream_name = stream_name
+        self.max_size = max_size
+        self.overflow_policy = overflow_policy
+        self._queue = collections.deque()
+        self._not_full = threading.Condition()
+        # Number of queued messages, excluding watermarks.
+        self._num_msgs = 0
+        # Maps timestamps to their latest message, which replaces the queued
+        # message with the same timestamp.
+        self._latest_msgs = {}
+        self._max_depth = 0
+        self._num_received = 0
+        self._num_dropped = 0
+        self._num_over_bound = 0
+        # Whether a task that drains the queue is pending.
+        self._scheduled = False
+
+    def put(self, msg, block=True):
+        """Adds a message to the queue, applying the overflow policy if the
+        queue is full.
+
+        Args:
+            msg (Message): The message to add.
+            block (bool): Whether the `OVERFLOW_BLOCK` policy may block the
+                caller until the queue has room. If False, the message is
+                added beyond the bound.
+
+        Returns:
+            (bool): True if a new entry was added to the queue.
+        """
+        with self._not_full:
+            self._num_received += 1
+            if self.overflow_policy == OVERFLOW_LATEST_PER_TIMESTAMP:
+                if msg.timestamp in self._latest_msgs:
+                    self._latest_msgs[msg.timestamp] = msg
+                    self._num_dropped += 1
+                    return False
+            if self.max_size and self._num_msgs >= self.max_size:
+                if self.overflow_policy == OVERFLOW_BLOCK:
+                    while block and self._num_msgs >= self.max_size:
+                        self._not_full.wait()
+                    if self._num_msgs >= self.max_size:
+                        self._num_over_bound += 1
+                elif self.overflow_policy == OVERFLOW_DROP_NEWEST:
+                    self._num_dropped += 1
+                    return False
+                else:
+                    # Drop the oldest message, which is a placeholder for
+                    # the latest message of its timestamp with the
+                    # OVERFLOW_LATEST_PER_TIMESTAMP policy.
+                    self._drop_oldest_msg()
+            if self.overflow_policy == OVERFLOW_LATEST_PER_TIMESTAMP:
+                self._latest_msgs[msg.timestamp] = msg
+            self._queue.append(msg)
+            self._num_msgs += 1
+            self._max_depth = max(self._max_depth, self._num_msgs)
+            return True
+
+    def put_watermark(self, msg):
+        """Adds a watermark to the queue. Always adds a new entry."""
+        with self._not_full:
+            self._queue.append(msg)
+
+    def get(self):
+        """Returns the next message or watermark, or None if the queue is
+        empty (e.g., because its messages were dropped)."""
+        with self._not_full:
+            if not self._queue:
+                return None
+            msg = self._queue.popleft()
+            if isinstance(msg, WatermarkMessage):
+                return msg
+            self._num_msgs -= 1
+            self._not_full.notify()
+            if self.overflow_policy == OVERFLOW_LATEST_PER_TIMESTAMP:
+                msg = self._latest_msgs.pop(msg.timestamp)
+            return msg
+
+    def schedule(self):
+        """Returns True if the caller must schedule a task that drains the
+        queue, i.e., if the queue has entries and no such task is pending."""
+        with self._not_full:
+            if self._scheduled or not self._queue:
+                return False
+            self._scheduled = True
+            return True
+
+    def reschedule(self):
+        """Invoked by the task that drains the queue once it processed an
+        entry. Returns True if entries remain, in which case the caller must
+        schedule the task again."""
+        with self._not_full:
+            self._scheduled = bool(self._queue)
+            return self._scheduled
+
+    def get_metrics(self):
+        with self._not_full:
+            return {
+                'depth': self._num_msgs,
+                'max_depth': self._max_depth,
+                'num_received': self._num_received,
+                'num_dropped': self._num_dropped,
+                'num_over_bound': self._num_over_bound,
+            }
+
+    def _drop_oldest_msg(self):
+        for (index, queued_msg) in enumerate(self._queue):
+            if not isinstance(queued_msg, WatermarkMessage):
+                del self._queue[index]
+                break
+        self._num_msgs -= 1
+        self._num_dropped += 1
+        if self.overflow_policy == OVERFLOW_LATEST_PER_TIMESTAMP:
+            del self._latest_msgs[queued_msg.timestamp]
@@ -0,0 +1,323 @@
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Each level of the wheel has 2^_SLOT_BITS slots. With 1ms ticks, the levels
+# span 256ms, 65s, 4.6h and 49 days.
+_SLOT_BITS = 8
+_NUM_SLOTS = 1 << _SLOT_BITS
+_SLOT_MASK = _NUM_SLOTS - 1
+_NUM_LEVELS = 4
+_MAX_TICKS = (1 << (_SLOT_BITS * _NUM_LEVELS)) - 1
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class TimerHandle(object):
+    """A callback scheduled on a `TimerWheel`.
+
+    Attributes:
+        name (str): Name used in log messages.
+        period (float): Period in seconds, or None for one-shot timers.
+        expire_time (float): Time at which the callback is due.
+        num_runs (int): Number of times the callback was invoked.
+        total_drift (float): Sum of the delays, in seconds, between the due
+            times and the invocations.
+        max_drift (float): Maximum delay between a due time and an invocation.
+        num_missed (int): Number of periods skipped because the callback ran
+            late by more than a period.
+    """
+
+    __slots__ = ('name', 'period', 'expire_time', 'num_runs', 'total_drift',
+                 'max_drift', 'num_missed', '_callback', '_args', '_wheel',
+                 '_expire_tick', '_slot')
+
+    def __init__(self, wheel, expire_time, period, name, callback, args):
+        self.name = name
+        self.period = period
+        self.expire_time = expire_time
+        self.num_runs = 0
+        self.total_drift = 0.0
+        self.max_drift = 0.0
+        self.num_missed = 0
+        self._callback = callback
+        self._args = args
+        self._wheel = wheel
+        self._expire_tick = 0
+        # The slot containing the handle, or None if it is not scheduled.
+        self._slot = None
+
+    def cancel(self):
+        """Cancels the timer. Returns False if it was not scheduled."""
+        return self._wheel.cancel(self)
+
+    def get_drift_stats(self):
+        return {
+            'num_runs': self.num_runs,
+            'mean_drift': self.total_drift / max(self.num_runs, 1),
+            'max_drift': self.max_drift,
+            'num_missed': self.num_missed,
+        }
+
+
+class TimerWheel(object):
+    """Hierarchical timer wheel run by a background thread.
+
+    Timers are stored in the slot of the tick at which they expire. Timers
+    that expire further away than the span of the first level are stored in
+    the coarser levels, and are moved down when the wheel reaches their slot.
+    Scheduling and cancelling a timer are O(1).
+
+    Callbacks run on the wheel's thread, and must therefore be short (e.g.,
+    enqueue work or submit a Ray task).
+
+    Attributes:
+        tick (float): Resolution of the wheel, in seconds.
+    """
+
+    def __init__(self, tick=0.001):
+        self.tick = tick
+        self._levels = [[set() for _ in range(_NUM_SLOTS)]
+                        for _ in range(_NUM_LEVELS)]
+        self._lock = threading.Condition()
+        self._start_time = _clock()
+        # The last processed tick.
+        self._current_tick = 0
+        # The tick at which the thread plans to wake up.
+        self._wakeup_tick = 0
+        self._num_timers = 0
+        self._running = False
+        self._thread = None
+        self._num_fired = 0
+        self._total_drift = 0.0
+        self._max_drift = 0.0
+        self._num_missed = 0
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run,
+                                        name='erdos-timer-wheel')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            self._lock.notify()
+        self._thread.join()
+
+    def schedule(self, delay, callback, *args, **kwargs):
+        """Invokes callback(*args) in delay seconds.
+
+        Args:
+            delay (float): Delay in seconds.
+            callback: Function to invoke.
+            name (str): Optional name of the timer, used in log messages.
+
+        Returns:
+            (TimerHandle): Handle which can be used to cancel the timer.
+        """
+        return self._schedule(delay, None, callback, args,
+                              kwargs.get('name'))
+
+    def schedule_periodic(self, period, callback, *args, **kwargs):
+        """Invokes callback(*args) every period seconds, starting in period
+        seconds. Periods are measured from the due times, so delays do not
+        accumulate. Periods missed because of delays are skipped.
+        """
+        return self._schedule(period, period, callback, args,
+                              kwargs.get('name'))
+
+    def cancel(self, handle):
+        with self._lock:
+            if handle._slot is None:
+                return False
+            handle._slot.discard(handle)
+            handle._slot = None
+            self._num_timers -= 1
+            return True
+
+    def get_drift_stats(self):
+        """Returns the drift statistics of all the timers that fired."""
+        with self._lock:
+            return {
+                'num_timers': self._num_timers,
+                'num_fired': self._num_fired,
+                'mean_drift': self._total_drift / max(self._num_fired, 1),
+                'max_drift': self._max_drift,
+                'num_missed': self._num_missed,
+            }
+
+    def _schedule(self, delay, period, callback, args, name):
+        handle = TimerHandle(self, _clock() + delay, period, name
+                             or getattr(callback, '__name__', 'timer'),
+                             callback, args)
+        with self._lock:
+            self._insert(handle)
+            self._num_timers += 1
+            if handle._expire_tick < self._wakeup_tick:
+                self._lock.notify()
+        return handle
+
+    def _insert(self, handle):
+        """Adds a handle to the slot of its expiration tick."""
+        next_tick = self._current_tick + 1
+        # Round up, so that timers never fire before their due time.
+        expire_tick = int(
+            math.ceil((handle.expire_time - self._start_time) / self.tick))
+        delta = expire_tick - next_tick
+        if delta < 0:
+            # Already due, fire it on the next tick.
+            expire_tick = next_tick
+            delta = 0
+        elif delta > _MAX_TICKS:
+            expire_tick = next_tick + _MAX_TICKS
+            delta = _MAX_TICKS
+        handle._expire_tick = expire_tick
+        level = (delta.bit_length() - 1) // _SLOT_BITS if delta else 0
+        slot = self._levels[level][(expire_tick >> (level * _SLOT_BITS))
+                                   & _SLOT_MASK]
+        slot.add(handle)
+        handle._slot = slot
+
+    def _cascade(self, tick):
+        """Moves the timers of the coarser levels down when the finer levels
+        wrap around."""
+        level = 1
+        while (level < _NUM_LEVELS
+               and (tick >> ((level - 1) * _SLOT_BITS)) & _SLOT_MASK == 0):
+            level += 1
+        # Cascade the coarsest level first, as its timers can move to the
+        # slots of the finer levels that are cascaded next.
+        for cascaded_level in range(level - 1, 0, -1):
+            index = (tick >> (cascaded_level * _SLOT_BITS)) & _SLOT_MASK
+            slot = self._levels[cascaded_level][index]
+            self._levels[cascaded_level][index] = set()
+            for handle in slot:
+                self._insert(handle)
+
+    def _advance(self, now_tick):
+        """Processes the ticks up to now_tick. Returns the expired handles."""
+        expired = []
+        while self._current_tick < now_tick:
+            tick = self._current_tick + 1
+            if tick & _SLOT_MASK == 0:
+                self._cascade(tick)
+            index = tick & _SLOT_MASK
+            slot = self._levels[0][index]
+            if slot:
+                self._levels[0][index] = set()
+                for handle in slot:
+                    handle._slot = None
+                expired.extend(slot)
+                self._num_timers -= len(slot)
+            self._current_tick = tick
+        return expired
+
+    def _get_next_wakeup_tick(self):
+        """Returns the tick of the next non-empty slot of the first level, or
+        the tick at which the first level wraps around."""
+        tick = self._current_tick + 1
+        end_tick = (tick | _SLOT_MASK) + 1
+        while tick < end_tick:
+            if self._levels[0][tick & _SLOT_MASK]:
+                return tick
+            tick += 1
+        return end_tick
+
+    def _fire(self, handle, now):
+        drift = now - handle.expire_time
+        handle.num_runs += 1
+        handle.total_drift += drift
+        handle.max_drift = max(handle.max_drift, drift)
+        self._num_fired += 1
+        self._total_drift += drift
+        self._max_drift = max(self._max_drift, drift)
+        if handle.period is not None:
+            handle.expire_time += handle.period
+            if handle.expire_time < now:
+                num_missed = int(
+                    (now - handle.expire_time) / handle.period) + 1
+                handle.num_missed += num_missed
+                self._num_missed += num_missed
+                handle.expire_time += num_missed * handle.period
+                logger.warning('Cannot run {} at desired rate {}'.format(
+                    handle.name, 1.0 / handle.period))
+            self._insert(handle)
+            self._num_timers += 1
+
+    def _run(self):
+        with self._lock:
+            while self._running:
+                now = _clock()
+                expired = self._advance(
+                    int((now - self._start_time) / self.tick))
+                for handle in expired:
+                    self._fire(handle, now)
+                if expired:
+                    # Run the callbacks without holding the lock, so that they
+                    # can schedule and cancel timers.
+                    self._lock.release()
+                    try:
+                        for handle in expired:
+                            try:
+                                handle._callback(*handle._args)
+                            except Exception:
+                                logger.exception(
+                                    'Error in timer {}'.format(handle.name))
+                    finally:
+                        self._lock.acquire()
+                    continue
+                self._wakeup_tick = self._get_next_wakeup_tick()
+                timeout = (self._start_time + self._wakeup_tick * self.tick -
+                           _clock())
+                if timeout > 0:
+                    self._lock.wait(timeout)
+
+
+_timer_wheel = None
+_timer_wheel_pid = None
+_timer_wheel_lock = threading.Lock()
+
+
+def get_timer_wheel():
+    """Returns the timer wheel shared by the process, and starts it if needed.
+
+    A new wheel is created in forked processes, as threads do not survive
+    forks.
+    """
+    global _timer_wheel, _timer_wheel_pid
+    with _timer_wheel_lock:
+        if _timer_wheel is None or _timer_wheel_pid != os.getpid():
+            _timer_wheel = TimerWheel()
+            _timer_wheel_pid = os.getpid()
+            _timer_wheel.start()
+        return _timer_wheel
+
+
+class FrequencyActor(object):
+    """Runs the periodic methods of an operator using the process's timer
+    wheel.
+
+    Attributes:
+        on_frequency: Function invoked with the name and the arguments of the
+            periodic method when it must run. It must not block.
+    """
+
+    def __init__(self, on_frequency):
+        self._on_frequency = on_frequency
+        self.timers = []
+
+    def set_frequency(self, rate, func_name, *args):
+        """Invokes `func_name` rate times per second."""
+        self.timers.append(get_timer_wheel().schedule_periodic(
+            1.0 / rate, self._on_frequency, func_name, *args, name=func_name))
+
+    def cancel(self):
+        for timer in self.timers:
+            timer.cancel()
+        self.timers = []
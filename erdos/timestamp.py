@@ -1,66 +1,159 @@
 class Timestamp(object):
     """A ERDOS timestamp.
 
-       The timestamp can consist of one or more coordinates.
+       The timestamp can consist of one or more coordinates. Timestamps are
+       immutable: the coordinates are stored in a tuple, which is compared
+       natively, and the hash is computed at most once.
 
        Attributes:
            timestamp (Timestamp): For the copy constructor.
-           coordinates (list of int): An array of coordinates.
+           coordinates (tuple of int): The coordinates of the timestamp. Any
+               sequence of ints can be passed to the constructor.
     """
 
+    __slots__ = ('coordinates', '_hash')
+
     def __init__(self, timestamp=None, coordinates=None):
         if timestamp is None:
             assert coordinates is not None
-            self.coordinates = coordinates
+            coordinates = tuple(coordinates)
         else:
-            self.coordinates = timestamp.coordinates
+            coordinates = timestamp.coordinates
+        _set_coordinates(self, coordinates)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Timestamp is immutable')
+
+    def __reduce__(self):
+        return (Timestamp, (None, self.coordinates))
 
     def __repr__(self):
-        return str(self.coordinates)
+        return str(list(self.coordinates))
 
     def __str__(self):
         return self.__repr__()
 
     def __eq__(self, timestamp):
-        if len(self.coordinates) != len(timestamp.coordinates):
-            return False
-        for coord, other_coord in zip(self.coordinates, timestamp.coordinates):
-            if coord != other_coord:
-                return False
-        return True
+        if not isinstance(timestamp, Timestamp):
+            return NotImplemented
+        return self.coordinates == timestamp.coordinates
 
     def __ne__(self, timestamp):
-        return not self.__eq__(timestamp)
+        if not isinstance(timestamp, Timestamp):
+            return NotImplemented
+        return self.coordinates != timestamp.coordinates
 
     def __lt__(self, timestamp):
         if len(self.coordinates) != len(timestamp.coordinates):
-            raise Exception(
-                'Cannot compare timestamps of different size {} and {}'.format(
-                    self, timestamp))
-        for coord, other_coord in zip(self.coordinates, timestamp.coordinates):
-            if coord > other_coord:
-                return False
-            elif coord < other_coord:
-                return True
-        return False
+            return _compare_size_mismatch(self, timestamp) < 0
+        return self.coordinates < timestamp.coordinates
 
     def __le__(self, timestamp):
         if len(self.coordinates) != len(timestamp.coordinates):
-            raise Exception(
-                'Cannot compare timestamps of different size {} and {}'.format(
-                    self, timestamp))
-        for coord, other_coord in zip(self.coordinates, timestamp.coordinates):
-            if coord > other_coord:
-                return False
-            elif coord < other_coord:
-                return True
-        return True
+            return _compare_size_mismatch(self, timestamp) <= 0
+        return self.coordinates <= timestamp.coordinates
 
     def __gt__(self, timestamp):
-        return not self.__le__(timestamp)
+        if len(self.coordinates) != len(timestamp.coordinates):
+            return _compare_size_mismatch(self, timestamp) > 0
+        return self.coordinates > timestamp.coordinates
 
     def __ge__(self, timestamp):
-        return not self.__lt__(timestamp)
+        if len(self.coordinates) != len(timestamp.coordinates):
+            return _compare_size_mismatch(self, timestamp) >= 0
+        return self.coordinates >= timestamp.coordinates
 
     def __hash__(self):
-        return hash(tuple(self.coordinates))
+        try:
+            return self._hash
+        except AttributeError:
+            _set_hash(self, hash(self.coordinates))
+            return self._hash
+
+
+# Slot setters, which bypass the immutable __setattr__.
+_set_coordinates = Timestamp.coordinates.__set__
+_set_hash = Timestamp._hash.__set__
+
+
+class SingleTimestamp(Timestamp):
+    """A timestamp with a single coordinate.
+
+       Compares the coordinate directly when the other timestamp also has a
+       single coordinate. Equal to, and hashes like, the `Timestamp` with the
+       same coordinates.
+
+       Attributes:
+           coordinate (int): The coordinate of the timestamp.
+    """
+
+    __slots__ = ('coordinate', )
+
+    def __init__(self, coordinate):
+        _set_coordinate(self, coordinate)
+        _set_coordinates(self, (coordinate, ))
+
+    def __reduce__(self):
+        return (SingleTimestamp, (self.coordinate, ))
+
+    def __eq__(self, timestamp):
+        if type(timestamp) is SingleTimestamp:
+            return self.coordinate == timestamp.coordinate
+        return Timestamp.__eq__(self, timestamp)
+
+    def __ne__(self, timestamp):
+        if type(timestamp) is SingleTimestamp:
+            return self.coordinate != timestamp.coordinate
+        return Timestamp.__ne__(self, timestamp)
+
+    def __lt__(self, timestamp):
+        if type(timestamp) is SingleTimestamp:
+            return self.coordinate < timestamp.coordinate
+        return Timestamp.__lt__(self, timestamp)
+
+    def __le__(self, timestamp):
+        if type(timestamp) is SingleTimestamp:
+            return self.coordinate <= timestamp.coordinate
+        return Timestamp.__le__(self, timestamp)
+
+    def __gt__(self, timestamp):
+        if type(timestamp) is SingleTimestamp:
+            return self.coordinate > timestamp.coordinate
+        return Timestamp.__gt__(self, timestamp)
+
+    def __ge__(self, timestamp):
+        if type(timestamp) is SingleTimestamp:
+            return self.coordinate >= timestamp.coordinate
+        return Timestamp.__ge__(self, timestamp)
+
+    __hash__ = Timestamp.__hash__
+
+
+_set_coordinate = SingleTimestamp.coordinate.__set__
+
+
+# Coordinates of the end-of-stream timestamp.
+_TOP_COORDINATES = (float('inf'), )
+
+# Timestamp higher than all the other timestamps, whatever their number of
+# coordinates. Sources send it as a watermark once they sent all their
+# messages.
+TOP_TIMESTAMP = Timestamp(coordinates=_TOP_COORDINATES)
+
+
+def is_top_timestamp(timestamp):
+    """Returns True if the timestamp is the end-of-stream timestamp."""
+    return timestamp.coordinates == _TOP_COORDINATES
+
+
+def _compare_size_mismatch(timestamp1, timestamp2):
+    """Compares timestamps of different sizes, one of which must be the
+    end-of-stream timestamp. Returns a negative number, zero or a positive
+    number like cmp."""
+    if timestamp1.coordinates == _TOP_COORDINATES:
+        return 1
+    if timestamp2.coordinates == _TOP_COORDINATES:
+        return -1
+    raise Exception(
+        'Cannot compare timestamps of different size {} and {}'.format(
+            timestamp1, timestamp2))
@@ -1,7 +1,9 @@
 import logging
-import time
 from functools import wraps
-from threading import Thread, Condition
+from threading import Event
+from threading import Thread
+
+from erdos.timer_wheel import get_timer_wheel
 
 _freq_called = set([])
 
@@ -15,27 +17,30 @@ def deadline(*expected_args):
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-
-            condition = Condition()
-
-            def check_deadline(end_time):
-                with condition:
-                    condition.wait(timeout=end_time - time.time())
-                if time.time() >= end_time:
-                    getattr(args[0], expected_args[1])()
-
-            deadline_time = time.time() + expected_args[0] / 1000.0
-            check_thread = Thread(target=check_deadline, args=(deadline_time,))
-            check_thread.start()
-            func(*args, **kwargs)  # Execute callback function
-            with condition:
-                condition.notify()
-            check_thread.join()
+            # If the callback does not complete in time, the deadline miss
+            # handler runs on a short-lived thread while the callback is
+            # still running. It neither holds up the timer wheel, nor waits
+            # for the operator's callbacks.
+            handler = getattr(args[0], expected_args[1])
+            timer = get_timer_wheel().schedule(expected_args[0] / 1000.0,
+                                               _start_thread,
+                                               handler,
+                                               name=expected_args[1])
+            try:
+                return func(*args, **kwargs)  # Execute callback function
+            finally:
+                timer.cancel()
         return wrapper
 
     return decorator
 
 
+def _start_thread(target):
+    thread = Thread(target=target)
+    thread.daemon = True
+    thread.start()
+
+
 def frequency(*expected_args):
     """ Frequency decorator to be used for periodic tasks (i.e., methods)."""
 
@@ -45,11 +50,20 @@ def frequency(*expected_args):
             framework = args[0].framework
             if framework == "ros":
                 import rospy
-                rate = rospy.Rate(expected_args[0])
-                while not rospy.is_shutdown():
-                    func(*args, **kwargs)
-                    rate.sleep()
-            elif framework == "ray":
+                tick = Event()
+                timer = get_timer_wheel().schedule_periodic(
+                    1.0 / expected_args[0], tick.set, name=func.__name__)
+                try:
+                    while not rospy.is_shutdown():
+                        func(*args, **kwargs)
+                        # Ticks that happen while func runs are coalesced.
+                        while not tick.wait(0.1):
+                            if rospy.is_shutdown():
+                                return
+                        tick.clear()
+                finally:
+                    timer.cancel()
+            elif framework == "ray" or framework == "local":
                 # XXX(ionel): Hack to avoid recursive calls. frequency()
                 # method is called upon each func invocation, thus without the
                 # _freq_called check the func would be called infinitely. The
@@ -62,7 +76,7 @@ def frequency(*expected_args):
                     # Remove reference to self because is added again when
                     # the callback is invoked.
                     method_args = args[1:]
-                    args[0].freq_actor.set_frequency.remote(
+                    args[0].freq_actor.set_frequency(
                         expected_args[0], func.__name__, *method_args)
                 else:
                     func(*args, **kwargs)
@@ -0,0 +1,88 @@
+import heapq
+
+from erdos.timestamp import is_top_timestamp
+
+
+class WatermarkFrontier(object):
+    """Tracks the low watermark across the input streams of an operator.
+
+    The low watermark is the minimum of the streams' high watermarks, and is
+    None until every stream received a watermark. High watermarks are kept in
+    a heap with lazy deletion, so an update costs O(log n) for n streams.
+
+    Attributes:
+        low_watermark (Timestamp): The current low watermark.
+    """
+
+    def __init__(self, stream_uids=None):
+        self.low_watermark = None
+        self._high_watermarks = {}
+        self._num_streams_without_watermark = 0
+        # Heap of (high watermark, stream uid). Contains stale entries for
+        # streams whose watermark advanced since the entry was pushed.
+        self._heap = []
+        for stream_uid in stream_uids or []:
+            self.add_stream(stream_uid)
+
+    def add_stream(self, stream_uid):
+        """Adds a stream which has not received any watermark."""
+        if stream_uid in self._high_watermarks:
+            return
+        self._high_watermarks[stream_uid] = None
+        self._num_streams_without_watermark += 1
+
+    def get_high_watermark(self, stream_uid):
+        """Returns the last watermark received on a stream, or None."""
+        return self._high_watermarks[stream_uid]
+
+    def update(self, stream_uid, timestamp):
+        """Updates the high watermark of a stream.
+
+        Args:
+            stream_uid (str): The stream on which the watermark was received.
+            timestamp (Timestamp): The watermark.
+
+        Returns:
+            (Timestamp): The new low watermark if it advanced, otherwise None.
+        """
+        if stream_uid not in self._high_watermarks:
+            self.add_stream(stream_uid)
+        high_watermark = self._high_watermarks[stream_uid]
+        if high_watermark is None:
+            self._num_streams_without_watermark -= 1
+        elif high_watermark >= timestamp:
+            if is_top_timestamp(timestamp):
+                # The stream already ended. Operators that forward the
+                # end-of-stream watermark send it twice.
+                return None
+            raise Exception(
+                "The watermark {} received on stream {} is not higher than "
+                "the watermark previously received on the same stream: "
+                "{}".format(timestamp, stream_uid, high_watermark))
+        self._high_watermarks[stream_uid] = timestamp
+        heapq.heappush(self._heap, (timestamp, stream_uid))
+        if self._num_streams_without_watermark > 0:
+            self._compact()
+            return None
+
+        # Drop the entries of watermarks that were superseded.
+        while self._heap[0][0] != self._high_watermarks[self._heap[0][1]]:
+            heapq.heappop(self._heap)
+        self._compact()
+        low_watermark = self._heap[0][0]
+        if self.low_watermark is None or self.low_watermark < low_watermark:
+            self.low_watermark = low_watermark
+            return low_watermark
+        return None
+
+    def _compact(self):
+        """Rebuilds the heap when stale entries dominate it.
+
+        Stale entries above the low watermark are not popped, which happens
+        when a stream lags behind the others.
+        """
+        if len(self._heap) > 2 * len(self._high_watermarks) + 16:
+            self._heap = [(watermark, stream_uid) for stream_uid, watermark in
+                          self._high_watermarks.items()
+                          if watermark is not None]
+            heapq.heapify(self._heap)
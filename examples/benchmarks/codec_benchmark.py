@@ -0,0 +1,49 @@
+from __future__ import print_function
+
+import time
+
+from absl import app
+from absl import flags
+import numpy as np
+
+from erdos.message import Message
+from erdos.message_codec import BinaryMessageCodec
+from erdos.message_codec import PickleMessageCodec
+from erdos.timestamp import Timestamp
+
+FLAGS = flags.FLAGS
+flags.DEFINE_integer('num_frames', 200, 'Number of frames to encode.')
+flags.DEFINE_integer('frame_width', 1920, 'Width of the frames.')
+flags.DEFINE_integer('frame_height', 1080, 'Height of the frames.')
+
+
+def benchmark_codec(codec, frame):
+    """Returns the mean encode and decode time in ms of a frame message."""
+    encode_time = 0
+    decode_time = 0
+    for cnt in range(FLAGS.num_frames):
+        msg = Message(frame, Timestamp(coordinates=[cnt]), 'camera')
+        start_time = time.time()
+        data = codec.encode(msg, 'default/camera/camera')
+        encode_time += time.time() - start_time
+        start_time = time.time()
+        codec.decode(data)
+        decode_time += time.time() - start_time
+    return (encode_time * 1000 / FLAGS.num_frames,
+            decode_time * 1000 / FLAGS.num_frames)
+
+
+def main(argv):
+    # Compares the previous ROS stream path (pickling the whole message) with
+    # the binary codec on camera frames.
+    frame = np.random.randint(
+        0, 255, (FLAGS.frame_height, FLAGS.frame_width, 3), dtype=np.uint8)
+    for (name, codec) in [('pickle', PickleMessageCodec()),
+                          ('binary', BinaryMessageCodec())]:
+        (encode_ms, decode_ms) = benchmark_codec(codec, frame)
+        print('{}: encode {:.3f} ms, decode {:.3f} ms per frame'.format(
+            name, encode_ms, decode_ms))
+
+
+if __name__ == '__main__':
+    app.run(main)
@@ -1,8 +1,9 @@
-import csv
 from absl import app
 from absl import flags
 
 import erdos.graph
+from erdos.event_trace import EVENT_SEND
+from erdos.event_trace import read_trace
 from erdos.operators import CountWindowTrigger, FileWriterOp, WindowOp, Window, WindowAssigner, WindowProcessor
 from erdos.data_stream import DataStream
 from erdos.message import Message
@@ -29,17 +30,15 @@ class LogReaderOp(Op):
 
     def execute(self):
         output_stream = self.get_output_stream(self._output_name)
-        with open(self._log_file_name, 'r') as log_file:
-            csv_reader = csv.reader(log_file)
-            for row in csv_reader:
-                name = row[0]
-                processing_time = float(row[1])
-                coordinates = [
-                    int(val) for val in row[2].strip('[]').split(',')
-                ]
-                output_msg = Message((name, processing_time),
-                                     Timestamp(coordinates=coordinates))
-                output_stream.send(output_msg)
+        (names, records, offset_ns) = read_trace(self._log_file_name)
+        for record in records[records['kind'] == EVENT_SEND]:
+            name = names[record['op_id']]
+            processing_time = (int(record['time_ns']) + offset_ns) / 1e9
+            coordinates = record['coordinates'][:record['num_coordinates']]
+            output_msg = Message(
+                (name, processing_time),
+                Timestamp(coordinates=[int(c) for c in coordinates]))
+            output_stream.send(output_msg)
 
 
 class SliddingCountWindowAssigner(WindowAssigner):
@@ -97,7 +96,7 @@ def main(argv):
     front_locations = FLAGS.front_camera_locations.split(',')
 
     for location in front_locations:
-        analyze_frequency(graph, 'camera_' + location + '.log',
+        analyze_frequency(graph, 'camera_' + location + '.trace',
                           'jitter_camera_' + location + '.log')
 
     graph.execute(FLAGS.framework)
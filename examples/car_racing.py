@@ -54,8 +54,8 @@ class CarRacingOp(Op):
         self.on_next([0, 0, 0])
         # Pull implementation
         while True:
-            action = self.input_streams[0].next()
-            self.on_next(action)
+            msg = self.input_streams[0].next()
+            self.on_next(msg.data)
 
 
 class ActionOp(Op):
@@ -42,9 +42,9 @@ def add_camera_replay_ops(graph):
             init_args={'log_file_name': FLAGS.log_file_name},
             setup_args={'op_name': op_name})
         camera_ops.append(camera_op)
-    # replay_rgb_op = ReplayOp('pylot_rgb_camera_data.erdos',
-    #                          frequency=10,
-    #                          name='replay_rgb_camera')
+    # replay_rgb_op = ReplayOp('replay_rgb_camera',
+    #                          'pylot_rgb_camera_data.erdos',
+    #                          frequency=10)
     # camera_streams = replay_rgb_op([])
     return camera_ops
 
@@ -0,0 +1,106 @@
+import sys
+from absl import app
+from absl import flags
+from multiprocessing import Process
+
+import erdos.graph
+from erdos.data_stream import DataStream
+from erdos.message import Message
+from erdos.message import WatermarkMessage
+from erdos.op import Op
+from erdos.timestamp import Timestamp
+from erdos.timestamp import is_top_timestamp
+
+FLAGS = flags.FLAGS
+flags.DEFINE_string('framework', 'ray',
+                    'Execution framework to use: ros | ray | local.')
+flags.DEFINE_float('timeout', 30,
+                   'Seconds after which the test fails if the graph did '
+                   'not drain.')
+MAX_MSG_COUNT = 100
+MSGS_PER_TIMESTAMP = 7
+BATCH_SIZE = 4
+
+
+class PublisherOp(Op):
+    def __init__(self, name):
+        super(PublisherOp, self).__init__(name)
+
+    @staticmethod
+    def setup_streams(input_streams):
+        return [
+            DataStream(data_type=int,
+                       name='pub_out',
+                       batch_size=BATCH_SIZE,
+                       batch_timeout_ms=10)
+        ]
+
+    def execute(self):
+        for cnt in range(MAX_MSG_COUNT):
+            timestamp = Timestamp(coordinates=[cnt // MSGS_PER_TIMESTAMP])
+            self.get_output_stream('pub_out').send(Message(cnt, timestamp))
+            if (cnt + 1) % MSGS_PER_TIMESTAMP == 0:
+                # The watermark flushes the partial batch.
+                self.get_output_stream('pub_out').send(
+                    WatermarkMessage(timestamp))
+        self.send_end_of_stream()
+
+
+class SubscriberOp(Op):
+    """Checks the order of the messages and watermarks. Any failed check
+    prevents the operator from ending, so the graph does not drain."""
+
+    def __init__(self, name):
+        super(SubscriberOp, self).__init__(name)
+        self._cnt = 0
+
+    @staticmethod
+    def setup_streams(input_streams):
+        input_streams.add_callback(SubscriberOp.on_msg)
+        input_streams.add_completion_callback(SubscriberOp.on_watermark)
+        return []
+
+    def on_msg(self, msg):
+        assert msg.data == self._cnt, \
+            'received %d, expected %d' % (msg.data, self._cnt)
+        self._cnt += 1
+
+    def on_watermark(self, msg):
+        if is_top_timestamp(msg.timestamp):
+            assert self._cnt == MAX_MSG_COUNT, \
+                'received %d messages, expected %d' % (self._cnt,
+                                                       MAX_MSG_COUNT)
+            print('%s received all %d messages in order' %
+                  (self.name, self._cnt))
+            return
+        coordinate = msg.timestamp.coordinates[0]
+        assert self._cnt == (coordinate + 1) * MSGS_PER_TIMESTAMP, \
+            'watermark %s overtook messages of its timestamp' % msg.timestamp
+        print('%s received watermark %s' % (self.name, msg.timestamp))
+
+
+def run_graph():
+    graph = erdos.graph.get_current_graph()
+    pub = graph.add(PublisherOp, name='publisher')
+    sub = graph.add(SubscriberOp, name='subscriber')
+    graph.connect([pub], [sub])
+    execution_handle = graph.execute_async(FLAGS.framework)
+    finished = execution_handle.stop(drain_timeout=FLAGS.timeout)
+    sys.exit(0 if finished else 1)
+
+
+def main(argv):
+    proc = Process(target=run_graph)
+    proc.start()
+    # Leave the child time to start the framework and to stop the graph.
+    proc.join(FLAGS.timeout + 30)
+    if proc.is_alive():
+        proc.terminate()
+        proc.join()
+        sys.exit('The test did not finish')
+    if proc.exitcode != 0:
+        sys.exit('The subscriber did not receive all the messages in order')
+
+
+if __name__ == '__main__':
+    app.run(main)
@@ -0,0 +1,125 @@
+from __future__ import print_function
+
+import os
+import sys
+import time
+from absl import app
+from absl import flags
+
+sys.path.append(
+    os.path.dirname(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from erdos.data_stream import DataStream
+from erdos.data_streams import DataStreams
+from erdos.graph import Graph
+from erdos.op import Op
+from erdos.operators import NoopOp
+
+FLAGS = flags.FLAGS
+flags.DEFINE_integer('num_chains', 20, 'Number of chains of operators.')
+flags.DEFINE_integer('chain_length', 49,
+                     'Number of NoopOps forwarding the streams of a chain.')
+
+
+class SourceOp(Op):
+    @staticmethod
+    def setup_streams(input_streams, stream_name):
+        return [DataStream(name=stream_name)]
+
+
+class SinkOp(Op):
+    @staticmethod
+    def setup_streams(input_streams):
+        input_streams.add_callback(SinkOp.on_msg)
+        return []
+
+    def on_msg(self, msg):
+        pass
+
+
+def build_graph():
+    """Builds chains of NoopOps forwarding a source's stream to a sink.
+
+    The streams of the NoopOps depend on their input streams, so the
+    streams only converge once they are propagated along the chains.
+    """
+    graph = Graph(name='benchmark')
+    sink = graph.add(SinkOp, name='sink')
+    for chain in range(FLAGS.num_chains):
+        previous_op = graph.add(
+            SourceOp,
+            name='source_{}'.format(chain),
+            setup_args={'stream_name': 'stream_{}'.format(chain)})
+        for index in range(FLAGS.chain_length):
+            op = graph.add(NoopOp, name='noop_{}_{}'.format(chain, index))
+            graph.connect([previous_op], [op])
+            previous_op = op
+        graph.connect([previous_op], [sink])
+    return graph
+
+
+def build_refined_op_graph_rounds(graph):
+    """Reference implementation, which sets up every operator in each round
+    until the output streams converge."""
+
+    def different_output_streams(output_stream1, output_stream2):
+        if len(output_stream1) != len(output_stream2):
+            return True
+        os_set1 = set([output_stream.uid for output_stream in output_stream1])
+        os_set2 = set([output_stream.uid for output_stream in output_stream2])
+        return len(os_set1.intersection(os_set2)) != len(os_set1)
+
+    not_converged = True
+    while not_converged:
+        not_converged = False
+        for op_id, op_handle in graph.op_handles.items():
+            output_streams = op_handle.op_cls.setup_streams(
+                DataStreams(op_handle.input_streams), **op_handle.setup_args)
+            for stream in output_streams:
+                stream.uid = op_id
+            if different_output_streams(op_handle.output_streams,
+                                        output_streams):
+                not_converged = True
+            op_handle.output_streams = output_streams
+        for op_id, op_handle in graph.op_handles.items():
+            op_handle.input_streams = []
+        for op_id, op_handle in graph.op_handles.items():
+            for dependant_id in op_handle.dependant_ops:
+                graph.op_handles[dependant_id].input_streams += [
+                    out_stream._copy_stream()
+                    for out_stream in op_handle.output_streams
+                ]
+    for op_id, op_handle in graph.op_handles.items():
+        op_handle.op_cls.setup_streams(
+            DataStreams(op_handle.input_streams), **op_handle.setup_args)
+    graph._build_output_stream_sinks_graph()
+
+
+def get_streams(graph):
+    """Returns the streams and callbacks of each operator."""
+    return dict((op_id, ([stream.uid for stream in op_handle.output_streams], [
+        (stream.uid, sorted(cb.__name__ for cb in stream.callbacks))
+        for stream in op_handle.input_streams
+    ])) for (op_id, op_handle) in graph.op_handles.items())
+
+
+def run_benchmark(name, build_func):
+    graph = build_graph()
+    start_time = time.time()
+    build_func(graph)
+    duration = time.time() - start_time
+    print('{}: {} operators refined in {:.3f} s'.format(
+        name, len(graph.op_handles), duration))
+    return get_streams(graph)
+
+
+def main(argv):
+    worklist_streams = run_benchmark(
+        'worklist', lambda graph: graph._build_refined_op_graph())
+    rounds_streams = run_benchmark('rounds', build_refined_op_graph_rounds)
+    assert worklist_streams == rounds_streams, 'Refined graphs differ'
+
+
+if __name__ == '__main__':
+    app.run(main)
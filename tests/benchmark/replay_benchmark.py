@@ -0,0 +1,68 @@
+from __future__ import print_function
+
+import os
+import sys
+import tempfile
+from absl import app
+from absl import flags
+
+import numpy as np
+
+sys.path.append(
+    os.path.dirname(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from erdos.data_stream import DataStream
+from erdos.message import Message
+from erdos.operators import ReplayOp
+from erdos.record_log import COMPRESSION_NONE
+from erdos.record_log import COMPRESSION_ZLIB
+from erdos.record_log import LogWriter
+from erdos.timestamp import Timestamp
+
+FLAGS = flags.FLAGS
+flags.DEFINE_integer('num_timestamps', 1000, 'Number of recorded timestamps.')
+flags.DEFINE_integer('frame_size', 640 * 480 * 3,
+                     'Size in bytes of the recorded frames.')
+
+
+class NullDataStream(DataStream):
+    def send(self, msg):
+        pass
+
+
+def write_log(filename, compression):
+    writer = LogWriter(filename, [(np.ndarray, 'camera'), (dict, 'pose')],
+                       compression=compression)
+    frame = np.zeros(FLAGS.frame_size, dtype=np.uint8)
+    for t in range(FLAGS.num_timestamps):
+        timestamp = Timestamp(coordinates=[t])
+        writer.write(Message(frame, timestamp, 'camera'))
+        writer.write(Message({'x': t, 'y': t}, timestamp, 'pose'))
+    writer.close()
+
+
+def run_benchmark(name, compression, use_mmap):
+    (fd, filename) = tempfile.mkstemp(suffix='.erdos')
+    os.close(fd)
+    try:
+        write_log(filename, compression)
+        op = ReplayOp('replay', filename, use_mmap=use_mmap)
+        op._add_output_streams(
+            [NullDataStream(name='camera'),
+             NullDataStream(name='pose')])
+        op.execute()
+        print('{}: {:.0f} messages/s'.format(
+            name, op.num_replayed / op.replay_duration))
+    finally:
+        os.remove(filename)
+
+
+def main(argv):
+    run_benchmark('mmap', COMPRESSION_NONE, True)
+    run_benchmark('read', COMPRESSION_NONE, False)
+    run_benchmark('zlib', COMPRESSION_ZLIB, True)
+
+
+if __name__ == '__main__':
+    app.run(main)
@@ -0,0 +1,83 @@
+from __future__ import print_function
+
+import os
+import sys
+from absl import app
+from absl import flags
+
+sys.path.append(
+    os.path.dirname(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from erdos.data_stream import DataStream
+from erdos.graph import Graph
+from erdos.message import Message
+from erdos.message import WatermarkMessage
+from erdos.op import Op
+from erdos.operators import NoopOp
+from erdos.timestamp import Timestamp
+
+FLAGS = flags.FLAGS
+flags.DEFINE_string('framework', 'local',
+                    'Execution framework to use: local | ray.')
+flags.DEFINE_integer('num_msgs', 10000, 'Number of messages to send.')
+flags.DEFINE_integer('chain_length', 5,
+                     'Number of NoopOps between the source and the sink.')
+flags.DEFINE_float('timeout', 600,
+                   'Seconds after which the benchmark is stopped.')
+
+
+class SourceOp(Op):
+    def __init__(self, name, num_msgs):
+        super(SourceOp, self).__init__(name)
+        self._num_msgs = num_msgs
+
+    @staticmethod
+    def setup_streams(input_streams):
+        return [DataStream(data_type=int, name='integers')]
+
+    def execute(self):
+        output_stream = self.get_output_stream('integers')
+        for index in range(self._num_msgs):
+            timestamp = Timestamp(coordinates=[index])
+            output_stream.send(Message(index, timestamp))
+            output_stream.send(WatermarkMessage(timestamp))
+        self.send_end_of_stream()
+
+
+class SinkOp(Op):
+    @staticmethod
+    def setup_streams(input_streams):
+        input_streams.add_callback(SinkOp.on_msg)
+        return []
+
+    def on_msg(self, msg):
+        pass
+
+
+def main(argv):
+    graph = Graph(name='benchmark')
+    previous_op = graph.add(SourceOp,
+                            name='source',
+                            init_args={'num_msgs': FLAGS.num_msgs})
+    for index in range(FLAGS.chain_length):
+        op = graph.add(NoopOp, name='noop_{}'.format(index))
+        graph.connect([previous_op], [op])
+        previous_op = op
+    sink = graph.add(SinkOp, name='sink')
+    graph.connect([previous_op], [sink])
+
+    execution_handle = graph.execute_async(FLAGS.framework)
+    # Stop the execution once it drained, which frees the Ray actors.
+    if not execution_handle.stop(drain_timeout=FLAGS.timeout):
+        print('Stopped after {} s before the graph drained'.format(
+            FLAGS.timeout))
+        return
+    duration = execution_handle.duration
+    print('{} messages through {} operators in {:.3f} s: {:.0f} msgs/s'.format(
+        FLAGS.num_msgs, FLAGS.chain_length + 2, duration,
+        FLAGS.num_msgs / duration))
+
+
+if __name__ == '__main__':
+    app.run(main)
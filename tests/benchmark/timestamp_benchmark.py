@@ -0,0 +1,57 @@
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+from absl import app
+from absl import flags
+
+sys.path.append(
+    os.path.dirname(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+FLAGS = flags.FLAGS
+flags.DEFINE_integer('num_iterations', 1000000,
+                     'Number of times each operation is executed.')
+
+SETUP = """
+from erdos.timestamp import Timestamp
+try:
+    from erdos.timestamp import SingleTimestamp
+except ImportError:
+    SingleTimestamp = None
+t1 = Timestamp(coordinates=[{0}])
+t2 = Timestamp(coordinates=[{1}])
+if SingleTimestamp and len(t1.coordinates) == 1 and {2}:
+    t1 = SingleTimestamp(t1.coordinates[0])
+    t2 = SingleTimestamp(t2.coordinates[0])
+timestamps = {{t1: 1}}
+"""
+
+OPERATIONS = [
+    ('construct', 'Timestamp(coordinates=[1, 2])'),
+    ('lt', 't1 < t2'),
+    ('le', 't1 <= t2'),
+    ('eq', 't1 == t2'),
+    ('hash', 'hash(t1)'),
+    ('dict lookup', 'timestamps.get(t2)'),
+]
+
+
+def run_benchmark(name, coordinates1, coordinates2, single):
+    setup = SETUP.format(coordinates1, coordinates2, single)
+    for (op_name, statement) in OPERATIONS:
+        duration = timeit.timeit(
+            statement, setup=setup, number=FLAGS.num_iterations)
+        print('{} {}: {:.1f} ns/op'.format(
+            name, op_name, duration * 1e9 / FLAGS.num_iterations))
+
+
+def main(argv):
+    run_benchmark('3 coordinates', '1, 2, 3', '1, 2, 4', False)
+    run_benchmark('1 coordinate', '1', '2', False)
+    run_benchmark('SingleTimestamp', '1', '2', True)
+
+
+if __name__ == '__main__':
+    app.run(main)
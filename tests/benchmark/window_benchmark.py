@@ -0,0 +1,113 @@
+from __future__ import print_function
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from absl import app
+from absl import flags
+
+ROOT_PATH = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FLAGS = flags.FLAGS
+flags.DEFINE_integer('num_messages', 200000,
+                     'Number of messages sent to each window operator.')
+flags.DEFINE_integer('watermark_interval', 100,
+                     'Number of messages between two watermarks.')
+flags.DEFINE_string('baseline_rev', '',
+                    'Git revision (e.g., a commit before a window operator '
+                    'change) which is also benchmarked, for comparison')
+flags.DEFINE_string('erdos_path', ROOT_PATH,
+                    'Path of the ERDOS source tree to benchmark')
+
+
+def run_benchmark(name, assigner, trigger):
+    # Imported once the flags are parsed, from the tree given by erdos_path.
+    from erdos.data_stream import DataStream
+    from erdos.message import Message
+    from erdos.message import WatermarkMessage
+    from erdos.operators import SumWindowProcessor
+    from erdos.operators import WindowOp
+    from erdos.timestamp import Timestamp
+
+    class NullDataStream(DataStream):
+        def send(self, msg):
+            pass
+
+    op = WindowOp('window_op', 'window_stream', assigner, trigger,
+                  SumWindowProcessor())
+    op._add_output_streams([NullDataStream(name='window_stream')])
+    msgs = [
+        Message(1, Timestamp(coordinates=[t]))
+        for t in range(FLAGS.num_messages)
+    ]
+    watermarks = [
+        WatermarkMessage(msg.timestamp)
+        for msg in msgs[FLAGS.watermark_interval - 1::FLAGS.
+                        watermark_interval]
+    ]
+    start_time = time.time()
+    for (index, msg) in enumerate(msgs):
+        op.on_msg(msg)
+        if (index + 1) % FLAGS.watermark_interval == 0:
+            op.on_watermark(watermarks[index // FLAGS.watermark_interval])
+    duration = time.time() - start_time
+    print('{}: {:.0f} messages/s'.format(name,
+                                         FLAGS.num_messages / duration))
+
+
+def run_baseline():
+    """Benchmarks the ERDOS tree of the baseline revision in a separate
+    process, as the process can only import one `erdos` package."""
+    baseline_path = tempfile.mkdtemp()
+    try:
+        archive = subprocess.Popen(
+            ['git', 'archive', FLAGS.baseline_rev, 'erdos'],
+            cwd=ROOT_PATH,
+            stdout=subprocess.PIPE)
+        subprocess.check_call(['tar', '-x', '-C', baseline_path],
+                              stdin=archive.stdout)
+        archive.stdout.close()
+        if archive.wait() != 0:
+            raise ValueError('Cannot export revision {}'.format(
+                FLAGS.baseline_rev))
+        print('Baseline {}:'.format(FLAGS.baseline_rev))
+        sys.stdout.flush()
+        subprocess.check_call([
+            sys.executable,
+            os.path.abspath(__file__),
+            '--num_messages={}'.format(FLAGS.num_messages),
+            '--watermark_interval={}'.format(FLAGS.watermark_interval),
+            '--erdos_path={}'.format(baseline_path)
+        ])
+        print('Current:')
+    finally:
+        shutil.rmtree(baseline_path)
+
+
+def main(argv):
+    if FLAGS.baseline_rev:
+        run_baseline()
+    sys.path.insert(0, FLAGS.erdos_path)
+    from erdos.operators import CountWindowAssigner
+    from erdos.operators import CountWindowTrigger
+    from erdos.operators import SlidingWindowAssigner
+    from erdos.operators import TimeWindowTrigger
+    from erdos.operators import TumblingWindowAssigner
+
+    run_benchmark('tumbling', TumblingWindowAssigner(1000, event_time=True),
+                  TimeWindowTrigger())
+    run_benchmark('sliding', SlidingWindowAssigner(1000, 250,
+                                                   event_time=True),
+                  TimeWindowTrigger())
+    run_benchmark('tumbling count trigger',
+                  TumblingWindowAssigner(1000, event_time=True),
+                  CountWindowTrigger(100))
+    run_benchmark('count', CountWindowAssigner(100), CountWindowTrigger(100))
+
+
+if __name__ == '__main__':
+    app.run(main)
@@ -0,0 +1,29 @@
+import pytest
+from absl import flags
+
+FLAGS = flags.FLAGS
+
+# Reports the values compared by the assertions of the shared helpers.
+pytest.register_assert_rewrite('tests.utils')
+
+
+@pytest.fixture(autouse=True)
+def parse_flags():
+    """Parses the flags with their default values, as graphs read them."""
+    if not FLAGS.is_parsed():
+        FLAGS(['pytest'])
+
+
+@pytest.fixture
+def set_flags():
+    """Sets flags for the duration of a test, e.g., set_flags(flag=value)."""
+    previous_values = {}
+
+    def set_flag_values(**kwargs):
+        for (name, value) in kwargs.items():
+            previous_values.setdefault(name, getattr(FLAGS, name))
+            setattr(FLAGS, name, value)
+
+    yield set_flag_values
+    for (name, value) in previous_values.items():
+        setattr(FLAGS, name, value)
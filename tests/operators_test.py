@@ -19,6 +19,8 @@ flags.DEFINE_bool('map_many_test', False, 'True to execute the test')
 flags.DEFINE_bool('unzip_test', False, 'True to execute the test')
 flags.DEFINE_bool('counting_window_test', False, 'True to execute the test')
 flags.DEFINE_bool('tumbling_window_test', False, 'True to execute the test')
+flags.DEFINE_bool('event_time_window_test', False,
+                  'True to execute the test')
 
 
 class DataGeneratorOp(Op):
@@ -44,6 +46,10 @@ class DataGeneratorOp(Op):
         list_msg = Message([self._cnt, self._cnt + 1],
                            Timestamp(coordinates=[self._cnt]))
         self.get_output_stream('list_data_stream').send(list_msg)
+        if FLAGS.event_time_window_test:
+            watermark = WatermarkMessage(Timestamp(coordinates=[self._cnt]))
+            for output_stream in self.output_streams.values():
+                output_stream.send(watermark)
         self._cnt += 1
 
     def execute(self):
@@ -154,6 +160,22 @@ def main(argv):
         graph.connect([data_gen_op], [window_op])
         graph.connect([window_op], [log_op])
 
+    if FLAGS.event_time_window_test:
+        # Every message has a distinct timestamp in ms, so the windows contain
+        # 3 messages each.
+        window_op = graph.add(
+            WindowOp,
+            name='event_time_window_op',
+            init_args={'output_stream_name': 'window_stream',
+                       'assigner': TumblingWindowAssigner(3, event_time=True),
+                       'trigger': TimeWindowTrigger(),
+                       'processor': SumWindowProcessor()},
+            setup_args={'output_stream_name': 'window_stream',
+                        'filter_stream_lambda': lambda stream: stream.name == 'data_stream'})
+        log_op = graph.add(LogOp, name='window_log_op')
+        graph.connect([data_gen_op], [window_op])
+        graph.connect([window_op], [log_op])
+
     graph.execute(FLAGS.framework)
 
 
@@ -1,7 +1,7 @@
 #!/bin/bash
 
 # General test
-python -m pytest -v tests/test_graph_uses.py
+python -m pytest -v tests/test_graph_uses.py tests/test_message_codec.py tests/test_timestamp.py tests/test_watermark_frontier.py tests/test_window_op.py tests/test_timer_wheel.py tests/test_stream_queue.py tests/test_buffered_data_stream.py tests/test_record_log.py tests/test_replay_op.py tests/test_async_writer.py tests/test_event_trace.py tests/test_metrics.py tests/test_latency_trace.py tests/test_profiler.py tests/test_serialization_stats.py tests/test_execution_handle.py tests/test_fusion.py tests/test_inline_subgraphs.py tests/test_ray_object_store.py tests/test_local_backpressure.py
 
 # Test ROS
 python tests/communication_pattern_test.py --framework=ros --case=1-1
@@ -38,3 +38,25 @@ python tests/nested_graph_test.py --framework=ray
 if [ $? -ne 0 ] ; then exit 1 ; fi
 python tests/subgraph_test.py --framework=ray
 if [ $? -ne 0 ] ; then exit 1 ; fi
+python -m tests.batched_stream_test --framework=ray
+if [ $? -ne 0 ] ; then exit 1 ; fi
+
+# Test local
+python tests/communication_pattern_test.py --framework=local --case=1-1
+if [ $? -ne 0 ] ; then exit 1 ; fi
+python tests/communication_pattern_test.py --framework=local --case=1-2
+if [ $? -ne 0 ] ; then exit 1 ; fi
+python tests/communication_pattern_test.py --framework=local --case=2-1
+if [ $? -ne 0 ] ; then exit 1 ; fi
+python tests/control_loop_subgraph_test.py --framework=local
+if [ $? -ne 0 ] ; then exit 1 ; fi
+python tests/control_loop_test.py --framework=local
+if [ $? -ne 0 ] ; then exit 1 ; fi
+python tests/deadline_test.py --framework=local
+if [ $? -ne 0 ] ; then exit 1 ; fi
+python tests/nested_graph_test.py --framework=local
+if [ $? -ne 0 ] ; then exit 1 ; fi
+python tests/nested_graph_test.py --framework=local --inline_subgraphs
+if [ $? -ne 0 ] ; then exit 1 ; fi
+python tests/subgraph_test.py --framework=local
+if [ $? -ne 0 ] ; then exit 1 ; fi
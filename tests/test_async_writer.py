@@ -0,0 +1,122 @@
+from __future__ import print_function
+
+import os
+import threading
+import time
+
+import pytest
+
+from erdos.async_writer import AsyncWriter
+from erdos.graph import Graph
+from erdos.message import Message
+from erdos.operators import FileWriterOp
+from erdos.record_log import AsyncLogWriter
+from erdos.record_log import LogReader
+from erdos.timestamp import Timestamp
+from tests.utils import SourceOp
+from tests.utils import get_op
+from tests.utils import run_graph
+
+
+class SlowWriter(AsyncWriter):
+    def __init__(self, **kwargs):
+        self.batches = []
+        self.num_syncs = 0
+        self.closed = False
+        self.unblock = threading.Event()
+        super(SlowWriter, self).__init__(**kwargs)
+
+    def _write_batch(self, items):
+        self.unblock.wait()
+        if 'error' in items:
+            raise ValueError('Cannot write error')
+        self.batches.append(items)
+
+    def _sync(self):
+        self.num_syncs += 1
+
+    def _close(self):
+        self.closed = True
+
+
+def test_writes_are_coalesced_and_bounded():
+    writer = SlowWriter(max_queue_size=3)
+    writer.write(0)
+    # Wait for the thread to take the first item.
+    time.sleep(0.05)
+    for i in range(1, 4):
+        writer.write(i)
+    assert writer.get_metrics()['depth'] == 3
+    blocked_write_done = threading.Event()
+
+    def blocked_write():
+        writer.write(4)
+        blocked_write_done.set()
+
+    thread = threading.Thread(target=blocked_write)
+    thread.start()
+    time.sleep(0.05)
+    assert not blocked_write_done.is_set()
+    writer.unblock.set()
+    assert blocked_write_done.wait(1)
+    thread.join()
+    writer.flush()
+    assert [i for batch in writer.batches for i in batch] == list(range(5))
+    assert writer.batches[1] == [1, 2, 3]
+    metrics = writer.get_metrics()
+    assert metrics['num_written'] == 5
+    assert metrics['max_depth'] == 3
+    assert metrics['depth'] == 0
+    writer.close()
+    writer.close()
+    assert writer.closed
+    with pytest.raises(Exception):
+        writer.write(5)
+
+
+def test_fsync_interval():
+    writer = SlowWriter(fsync_interval=0.01)
+    writer.unblock.set()
+    time.sleep(0.1)
+    assert writer.get_metrics()['num_syncs'] >= 5
+    writer.close()
+
+
+def test_errors_are_raised_on_flush():
+    writer = SlowWriter()
+    writer.unblock.set()
+    writer.write('error')
+    with pytest.raises(ValueError):
+        writer.flush()
+    writer.write('ok')
+    writer.close()
+    assert writer.batches == [['ok']]
+
+
+def test_file_writer_op(tmpdir):
+    filename = str(tmpdir.join('out.txt'))
+    graph = Graph(name='test')
+    source = graph.add(SourceOp, name='source', init_args={'num_msgs': 1000})
+    file_writer = graph.add(FileWriterOp,
+                            name='file_writer',
+                            init_args={'file_name': filename})
+    graph.connect([source], [file_writer])
+    # The file is only opened by the operator's executor.
+    assert not os.path.exists(filename)
+    run_graph(graph)
+    # The file is closed when the source's stream ends.
+    with open(filename) as f:
+        assert f.read() == ''.join('{}\n'.format(i) for i in range(1000))
+    op = get_op(graph, 'test/file_writer')
+    assert op.get_writer_metrics()['num_written'] == 1000
+
+
+def test_async_log_writer(tmpdir):
+    filename = str(tmpdir.join('log.erdos'))
+    writer = AsyncLogWriter(filename, [(int, 'stream')], fsync_interval=0.01)
+    for i in range(100):
+        writer.write(Message(i, Timestamp(coordinates=[i]), 'stream'))
+    writer.close()
+    reader = LogReader(filename)
+    assert [msg.data for msg in reader.read()] == list(range(100))
+    reader.close()
@@ -0,0 +1,177 @@
+from __future__ import print_function
+
+import threading
+import time
+
+import pytest
+
+from erdos.buffered_data_stream import BUFFER_EVICT
+from erdos.buffered_data_stream import BUFFER_REJECT
+from erdos.buffered_data_stream import BufferedDataStream
+from erdos.buffered_data_stream import RingBuffer
+from erdos.graph import Graph
+from erdos.message import Message
+from erdos.op import Op
+from erdos.timestamp import TOP_TIMESTAMP
+from erdos.timestamp import Timestamp
+from tests.utils import SourceOp
+from tests.utils import get_op
+from tests.utils import run_graph
+
+
+def msg(data):
+    return Message(data, Timestamp(coordinates=[data]))
+
+
+def create_input_stream(buffer_size=3, buffer_policy=BUFFER_REJECT):
+    stream = BufferedDataStream(name='stream', buffer_size=buffer_size,
+                                buffer_policy=buffer_policy)
+    stream.uid = 'op'
+    input_stream = stream._copy_stream()
+    input_stream.setup()
+    return input_stream
+
+
+def test_ring_buffer_wraps_around():
+    buf = RingBuffer(3)
+    for i in range(10):
+        assert buf.put(i)
+        assert buf.get(block=False) == i
+    assert len(buf) == 0
+
+
+def test_reject_when_full():
+    stream = create_input_stream(3, BUFFER_REJECT)
+    assert [stream.put(msg(i)) for i in range(5)] == [True, True, True,
+                                                      False, False]
+    assert [m.data for m in stream.next_many(10)] == [0, 1, 2]
+    assert stream._buffer.num_dropped == 2
+
+
+def test_evict_when_full():
+    stream = create_input_stream(3, BUFFER_EVICT)
+    assert all(stream.put(msg(i)) for i in range(5))
+    assert stream.size() == 3
+    assert [m.data for m in stream.next_many(2)] == [2, 3]
+    assert stream.next().data == 4
+    assert stream._buffer.num_dropped == 2
+
+
+def test_non_blocking_next():
+    stream = create_input_stream()
+    assert stream.next(block=False) is None
+    assert stream.next_many(3, block=False) == []
+    start_time = time.time()
+    assert stream.next(timeout=0.05) is None
+    assert time.time() - start_time >= 0.05
+
+
+def test_blocking_next():
+    stream = create_input_stream()
+    received = []
+    thread = threading.Thread(
+        target=lambda: received.append(stream.next().data))
+    thread.start()
+    time.sleep(0.05)
+    assert received == []
+    stream.put(msg(1))
+    thread.join(1)
+    assert received == [1]
+
+
+def test_close_wakes_up_readers():
+    stream = create_input_stream()
+    stream.put(msg(1))
+    received = []
+
+    def pull():
+        while stream.has_next():
+            m = stream.next()
+            if m is not None:
+                received.append(m.data)
+
+    thread = threading.Thread(target=pull)
+    thread.start()
+    time.sleep(0.05)
+    stream.close()
+    thread.join(1)
+    assert not thread.is_alive()
+    assert received == [1]
+
+
+def test_copy_stream_registers_buffer_callback():
+    stream = BufferedDataStream(name='stream', buffer_size=7,
+                                buffer_policy=BUFFER_EVICT)
+    stream.uid = 'op'
+    copy = stream._copy_stream()
+    assert isinstance(copy, BufferedDataStream)
+    assert (copy.buffer_size, copy.buffer_policy) == (7, BUFFER_EVICT)
+    assert Op._buffer_msg in copy.callbacks
+    with pytest.raises(ValueError):
+        BufferedDataStream(buffer_policy='drop_everything')
+
+
+def test_op_buffers_messages():
+    op = Op('op')
+    stream = create_input_stream()
+    op._add_input_streams([stream])
+    m = msg(1)
+    m.stream_uid = stream.uid
+    op._buffer_msg(m)
+    assert op.input_streams[0].next(block=False) is m
+
+
+def test_size_before_setup():
+    stream = BufferedDataStream(name='stream')
+    assert stream.size() == 0
+
+
+def test_end_of_stream_closes_buffered_stream():
+    op = Op('op')
+    stream = create_input_stream()
+    op._add_input_streams([stream])
+    op._close_buffered_stream(stream.uid, Timestamp(coordinates=[1]))
+    assert not stream._buffer.closed
+    stream.put(msg(1))
+    op._close_buffered_stream(stream.uid, TOP_TIMESTAMP)
+    assert stream.has_next()
+    assert stream.next().data == 1
+    assert not stream.has_next()
+
+
+class BufferedSourceOp(SourceOp):
+    @staticmethod
+    def setup_streams(input_streams):
+        return [BufferedDataStream(data_type=int, name='integers')]
+
+
+class PullOp(Op):
+    def __init__(self, name):
+        super(PullOp, self).__init__(name)
+        self.data = []
+        self.done = threading.Event()
+
+    @staticmethod
+    def setup_streams(input_streams):
+        return []
+
+    def execute(self):
+        stream = self.input_streams[0]
+        while stream.has_next():
+            m = stream.next()
+            if m is not None:
+                self.data.append(m.data)
+        self.done.set()
+
+
+def test_pull_loop_ends_at_end_of_stream():
+    graph = Graph(name='test')
+    source = graph.add(BufferedSourceOp,
+                       name='source',
+                       init_args={'num_msgs': 10})
+    pull = graph.add(PullOp, name='pull')
+    graph.connect([source], [pull])
+    run_graph(graph)
+    pull_op = get_op(graph, 'test/pull')
+    assert pull_op.done.wait(5)
+    assert pull_op.data == list(range(10))
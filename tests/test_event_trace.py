@@ -0,0 +1,103 @@
+from __future__ import print_function
+
+import csv
+
+import pytest
+
+from erdos.event_trace import EVENT_CUSTOM
+from erdos.event_trace import EVENT_RECEIVE
+from erdos.event_trace import EVENT_SEND
+from erdos.event_trace import EVENT_WATERMARK_SEND
+from erdos.event_trace import TOP_TIMESTAMP_FLAG
+from erdos.event_trace import TraceWriter
+from erdos.event_trace import read_trace
+from erdos.event_trace import trace_to_csv
+from erdos.event_trace import trace_to_dataframe
+from erdos.logging_op import LoggingOp
+from erdos.timestamp import TOP_TIMESTAMP
+from erdos.timestamp import Timestamp
+
+
+def test_round_trip(tmpdir):
+    filename = str(tmpdir.join('op.trace'))
+    writer = TraceWriter(filename, capacity=8, flush_interval=0.001)
+    events = [(EVENT_SEND, 'camera', [1]), (EVENT_RECEIVE, 'lidar', [2, 3]),
+              (EVENT_WATERMARK_SEND, 'camera', [4, 5, 6])]
+    for _ in range(10):
+        for (kind, stream_name, coordinates) in events:
+            writer.record('op', kind, stream_name,
+                          Timestamp(coordinates=coordinates))
+        writer.flush()
+    writer.close()
+    writer.close()
+    (names, records, _) = read_trace(filename)
+    assert names == ['op', 'camera', 'lidar']
+    assert len(records) == 30
+    assert list(records['kind'][:3]) == [EVENT_SEND, EVENT_RECEIVE,
+                                         EVENT_WATERMARK_SEND]
+    assert [names[i] for i in records['stream_id'][:3]] == [
+        'camera', 'lidar', 'camera'
+    ]
+    assert list(records['num_coordinates'][:3]) == [1, 2, 2]
+    # Coordinates beyond the second are truncated.
+    assert records['coordinates'][2].tolist() == [4, 5]
+    assert (records['time_ns'][1:] >= records['time_ns'][:-1]).all()
+
+
+def test_full_buffer_drops_events(tmpdir):
+    filename = str(tmpdir.join('op.trace'))
+    writer = TraceWriter(filename, capacity=4, flush_interval=None)
+    # Prevent the writer's thread from flushing.
+    with writer._flush_lock:
+        for i in range(10):
+            writer.record('op', EVENT_SEND, 'camera',
+                          Timestamp(coordinates=[i]))
+    writer.close()
+    assert writer.num_dropped == 6
+    (_, records, _) = read_trace(filename)
+    assert records['coordinates'][:, 0].tolist() == [0, 1, 2, 3]
+
+
+def test_top_timestamp(tmpdir):
+    filename = str(tmpdir.join('op.trace'))
+    writer = TraceWriter(filename)
+    writer.record('op', EVENT_WATERMARK_SEND, 'camera', TOP_TIMESTAMP)
+    writer.record('op', EVENT_WATERMARK_SEND, 'camera',
+                  Timestamp(coordinates=[1]))
+    writer.close()
+    (_, records, _) = read_trace(filename)
+    assert records['flags'].tolist() == [TOP_TIMESTAMP_FLAG, 0]
+    assert records['num_coordinates'].tolist() == [0, 1]
+    csv_filename = str(tmpdir.join('op.csv'))
+    trace_to_csv(filename, csv_filename)
+    with open(csv_filename) as f:
+        assert [row[2] for row in csv.reader(f)] == ['[inf]', '[1]']
+
+
+def test_logging_op_trace_to_csv(tmpdir):
+    with tmpdir.as_cwd():
+        op = LoggingOp('camera_op')
+        op.trace_event(EVENT_SEND, 'camera', Timestamp(coordinates=[7]))
+        op.log_event(0, Timestamp(coordinates=[8]), 'processed')
+        op.close()
+        trace_to_csv('camera_op.trace', 'camera_op.csv')
+        with open('camera_op.csv') as f:
+            rows = list(csv.reader(f))
+    assert [(row[0], row[2], row[3]) for row in rows] == [
+        ('camera_op', '[7]', 'send camera'),
+        ('camera_op', '[8]', 'custom processed'),
+    ]
+    assert float(rows[0][1]) <= float(rows[1][1])
+
+
+def test_trace_to_dataframe(tmpdir):
+    pytest.importorskip('pandas')
+    filename = str(tmpdir.join('op.trace'))
+    writer = TraceWriter(filename)
+    writer.record('op', EVENT_CUSTOM, 'event', Timestamp(coordinates=[1]))
+    writer.close()
+    df = trace_to_dataframe(filename)
+    assert df['op'].tolist() == ['op']
+    assert df['kind'].tolist() == ['custom']
+    assert df['coordinate_0'].tolist() == [1]
+    assert df['coordinate_1'].tolist() == [-1]
@@ -0,0 +1,53 @@
+from __future__ import print_function
+
+from erdos.graph import Graph
+from erdos.operators import NoopOp
+from erdos.timestamp import TOP_TIMESTAMP
+from tests.utils import SinkOp
+from tests.utils import SourceOp
+from tests.utils import get_op
+
+
+def build_graph(num_msgs, end_of_stream=True):
+    graph = Graph(name='test')
+    source = graph.add(SourceOp,
+                       name='source',
+                       init_args={
+                           'num_msgs': num_msgs,
+                           'end_of_stream': end_of_stream
+                       })
+    noop = graph.add(NoopOp, name='noop')
+    sink = graph.add(SinkOp, name='sink')
+    graph.connect([source], [noop])
+    graph.connect([noop], [sink])
+    return graph
+
+
+def test_wait_drains_the_graph():
+    graph = build_graph(100)
+    execution_handle = graph.execute_async('local')
+    assert execution_handle.wait(timeout=10)
+    assert execution_handle.is_finished()
+    sink = get_op(graph, 'test/sink')
+    assert sink.data == list(range(100))
+    # The end-of-stream watermark flows after all the other messages.
+    assert sink.watermarks[-1] == TOP_TIMESTAMP
+    assert len(sink.watermarks) == 101
+    assert sink.num_closes == 1
+    assert (execution_handle.end_time ==
+            sink._end_time) and execution_handle.duration >= 0
+    assert execution_handle.stop()
+
+
+def test_stop_before_end_of_stream():
+    graph = build_graph(10, end_of_stream=False)
+    execution_handle = graph.execute_async('local')
+    assert not execution_handle.wait(timeout=0.2)
+    assert not execution_handle.is_finished()
+    assert execution_handle.end_time is None
+    assert not execution_handle.stop(drain_timeout=0.1)
+    sink = get_op(graph, 'test/sink')
+    assert sink.data == list(range(10))
+    # Stopping closes the operators, although their streams did not end.
+    assert sink.num_closes == 1
+    get_op(graph, 'test/source').stopped.set()
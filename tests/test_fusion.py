@@ -0,0 +1,77 @@
+from __future__ import print_function
+
+from erdos.fusion import FusedOp
+from erdos.graph import Graph
+from erdos.operators import MapOp
+from erdos.operators import NoopOp
+from erdos.operators import WhereOp
+from erdos.timestamp import TOP_TIMESTAMP
+from erdos.timestamp import Timestamp
+from tests.utils import SinkOp
+from tests.utils import SourceOp
+from tests.utils import get_op
+from tests.utils import run_graph
+
+
+def build_graph():
+    graph = Graph(name='test')
+    source = graph.add(SourceOp,
+                       name='source',
+                       init_args={
+                           'num_msgs': 20,
+                           'msgs_per_timestamp': 2
+                       })
+    square = graph.add(MapOp,
+                       name='square',
+                       init_args={
+                           'output_stream_name': 'squares',
+                           'map_lambda': lambda msg: msg.data * msg.data
+                       },
+                       setup_args={'output_stream_name': 'squares'})
+    even = graph.add(WhereOp,
+                     name='even',
+                     init_args={
+                         'output_stream_name': 'even_squares',
+                         'where_lambda': lambda msg: msg.data % 2 == 0
+                     },
+                     setup_args={'output_stream_name': 'even_squares'})
+    noop = graph.add(NoopOp, name='noop')
+    # The squares are also received by another operator, so the operator
+    # which computes them cannot be fused with the operators that follow.
+    noop_sink = graph.add(SinkOp, name='noop_sink')
+    sink = graph.add(SinkOp, name='sink')
+    graph.connect([source], [square])
+    graph.connect([square], [even, noop_sink])
+    graph.connect([even], [noop])
+    graph.connect([noop], [sink])
+    return graph
+
+
+def get_received(graph, op_id):
+    return get_op(graph, op_id).received
+
+
+def test_fused_graph_is_equivalent(set_flags):
+    set_flags(fuse_operators=False)
+    graph = build_graph()
+    run_graph(graph)
+    set_flags(fuse_operators=True)
+    fused_graph = build_graph()
+    run_graph(fused_graph)
+    assert 'test/even+noop' in fused_graph.op_handles
+    assert 'test/even' not in fused_graph.op_handles
+    assert 'test/square' in fused_graph.op_handles
+    fused_op = get_op(fused_graph, 'test/even+noop')
+    assert isinstance(fused_op, FusedOp)
+    assert [op.name for op in fused_op.ops] == ['even', 'noop']
+
+    received = get_received(graph, 'test/sink')
+    assert received == get_received(fused_graph, 'test/sink')
+    assert [event[2] for event in received
+            if event[0] == 'even_squares'] == [i * i for i in range(0, 20, 2)]
+    assert received[:3] == [('even_squares', Timestamp(coordinates=[0]), 0),
+                            ('watermark', Timestamp(coordinates=[0])),
+                            ('even_squares', Timestamp(coordinates=[1]), 4)]
+    assert received[-1] == ('watermark', TOP_TIMESTAMP)
+    assert (get_received(graph, 'test/noop_sink') ==
+            get_received(fused_graph, 'test/noop_sink'))
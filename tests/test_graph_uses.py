@@ -2,7 +2,9 @@ from __future__ import print_function
 
 import pytest
 
+from erdos.data_stream import DataStream
 from erdos.graph import Graph
+from erdos.op import Op
 from erdos.operators import NoopOp
 
 
@@ -44,3 +46,41 @@ def test_invalid_op_connections():
     with pytest.raises(Exception):
         # Should raise an exception in Child.construct
         parent.execute()
+
+
+def test_refined_op_graph_propagates_streams():
+    class SourceOp(Op):
+        @staticmethod
+        def setup_streams(input_streams):
+            return [DataStream(name='numbers')]
+
+    class SinkOp(Op):
+        @staticmethod
+        def setup_streams(input_streams):
+            input_streams.add_callback(SinkOp.on_msg)
+            return []
+
+        def on_msg(self, msg):
+            pass
+
+    graph = Graph(name='g')
+    # Add the operators in reverse order, so that the sink is set up before
+    # the streams reach it.
+    sink = graph.add(SinkOp, name='sink')
+    noop2 = graph.add(NoopOp, name='noop2')
+    noop1 = graph.add(NoopOp, name='noop1')
+    source = graph.add(SourceOp, name='source')
+    graph.connect([source], [noop1])
+    graph.connect([noop1], [noop2])
+    graph.connect([noop1, noop2], [sink])
+    graph._build_refined_op_graph()
+
+    assert [s.uid for s in graph.op_handles[noop2].output_streams] == [
+        'g/noop2/numbers'
+    ]
+    sink_streams = graph.op_handles[sink].input_streams
+    assert sorted(s.uid for s in sink_streams) == [
+        'g/noop1/numbers', 'g/noop2/numbers'
+    ]
+    for stream in sink_streams:
+        assert [cb.__name__ for cb in stream.callbacks] == ['on_msg']
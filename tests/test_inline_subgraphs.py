@@ -0,0 +1,82 @@
+from __future__ import print_function
+
+from erdos.graph import Graph
+from erdos.operators import MapOp
+from erdos.timestamp import TOP_TIMESTAMP
+from tests.utils import SinkOp
+from tests.utils import SourceOp
+from tests.utils import get_op
+from tests.utils import run_graph
+
+
+class SourceGraph(Graph):
+    def construct(self, input_ops):
+        return [self.add(SourceOp, name='source')]
+
+
+class SquareGraph(Graph):
+    def construct(self, input_ops):
+        square_op = self.add(MapOp,
+                             name='square',
+                             init_args={
+                                 'output_stream_name': 'squares',
+                                 'map_lambda': lambda msg: msg.data**2
+                             },
+                             setup_args={'output_stream_name': 'squares'})
+        self.connect(input_ops, [square_op])
+        return [square_op]
+
+
+class NestedSquareGraph(Graph):
+    def construct(self, input_ops):
+        square_graph = self.add(SquareGraph, name='square_graph')
+        self.connect(input_ops, [square_graph])
+        return [square_graph]
+
+
+def build_graph():
+    graph = Graph(name='test')
+    source_graph = graph.add(SourceGraph, name='source_graph')
+    nested_graph = graph.add(NestedSquareGraph, name='nested_graph')
+    sink = graph.add(SinkOp, name='sink')
+    graph.connect([source_graph], [nested_graph])
+    graph.connect([nested_graph], [sink])
+    return graph
+
+
+def test_flatten_removes_boundary_ops(set_flags):
+    set_flags(inline_subgraphs=True)
+    graph = build_graph()
+    graph._flatten_subgraphs()
+    assert sorted(graph.op_handles) == [
+        'source_graph/source', 'square_graph/square', 'test/input_op',
+        'test/output_op', 'test/sink'
+    ]
+    assert graph.op_handles['source_graph/source'].dependant_ops == [
+        'square_graph/square'
+    ]
+    assert graph.op_handles['square_graph/square'].dependant_ops == [
+        'test/sink'
+    ]
+
+
+def test_replace_dependant_does_not_duplicate():
+    graph = Graph(name='test')
+    graph.op_handles[graph.input_op].dependant_ops = ['a', 'b', 'c']
+    graph._replace_dependant('b', ['c', 'd', 'd'])
+    assert graph.op_handles[graph.input_op].dependant_ops == ['a', 'd', 'c']
+
+
+def test_inlined_graph_is_equivalent(set_flags):
+    set_flags(inline_subgraphs=False)
+    graph = build_graph()
+    run_graph(graph)
+    set_flags(inline_subgraphs=True)
+    inlined_graph = build_graph()
+    run_graph(inlined_graph)
+    assert 'test/input_op' not in inlined_graph.op_handles
+    received = get_op(graph, 'test/sink').received
+    assert received == get_op(inlined_graph, 'test/sink').received
+    assert [event[2] for event in received
+            if event[0] == 'squares'] == [0, 1, 4, 9, 16]
+    assert received[-1] == ('watermark', TOP_TIMESTAMP)
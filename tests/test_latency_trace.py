@@ -0,0 +1,136 @@
+from __future__ import print_function
+
+import pickle
+
+import pytest
+
+from erdos.graph import Graph
+from erdos.latency_trace import Hop
+from erdos.latency_trace import LatencyTracer
+from erdos.latency_trace import get_critical_paths
+from erdos.latency_trace import get_latency_report
+from erdos.message import Message
+from erdos.operators import MapOp
+from erdos.timestamp import Timestamp
+from tests.utils import SinkOp
+from tests.utils import SourceOp
+from tests.utils import run_graph
+
+
+def make_hop(hop_id, parent_id, op_name, coordinates, times):
+    hop = Hop(parent_id, times[0])
+    hop.hop_id = hop_id
+    hop.sender_op_name = parent_id.split('/')[0] if parent_id else 'source'
+    hop.op_name = op_name
+    hop.stream_name = '{}_in'.format(op_name)
+    hop.coordinates = coordinates
+    (hop.enqueue_time, hop.dequeue_time, hop.callback_start_time,
+     hop.callback_end_time) = times[1:]
+    return hop
+
+
+def receive(tracer, msg, stream_name):
+    msg.stream_name = stream_name
+    hop = tracer.on_enqueue(msg)
+    tracer.on_dequeue(hop)
+    tracer.on_callback_start(msg, hop)
+    return hop
+
+
+def test_tracers_link_hops():
+    source = LatencyTracer('camera')
+    detector = LatencyTracer('detector')
+    control = LatencyTracer('control')
+    timestamp = Timestamp(coordinates=[1])
+
+    camera_msg = Message('frame', timestamp)
+    camera_msg.trace = source.on_send(timestamp)
+    assert camera_msg.trace.parent_id is None
+    detector_hop = receive(detector, camera_msg, 'camera')
+    obstacles_msg = Message('obstacles', timestamp)
+    obstacles_msg.trace = detector.on_send(timestamp)
+    detector.on_callback_end(detector_hop)
+    # Hops are pickled when sent to Ray actors.
+    obstacles_msg.trace = pickle.loads(pickle.dumps(obstacles_msg.trace))
+    control_hop = receive(control, obstacles_msg, 'obstacles')
+    control.on_callback_end(control_hop)
+
+    assert control_hop.parent_id == detector_hop.hop_id
+    assert control_hop.sender_op_name == 'detector'
+    assert control_hop.coordinates == (1, )
+    hops = detector.get_hops() + control.get_hops()
+    path = get_critical_paths(hops)[(1, )]
+    assert [hop.op_name for hop in path] == ['detector', 'control']
+    report = get_latency_report(hops)
+    assert report['num_paths'] == 1
+    assert report['end_to_end_ms']['max'] == pytest.approx(
+        (control_hop.callback_end_time - camera_msg.trace.send_time) * 1000)
+
+
+def test_report_follows_critical_path():
+    hops = [
+        # The lidar path completes after the camera path at the fusion op.
+        make_hop('camera/0', None, 'camera', (1, ), [0.0, 0.0, 0.0, 0.0,
+                                                      0.1]),
+        make_hop('lidar/0', None, 'lidar', (1, ), [0.0, 0.0, 0.2, 0.2, 0.5]),
+        make_hop('fusion/0', 'camera/0', 'fusion', (1, ),
+                 [0.1, 0.1, 0.1, 0.1, 0.1]),
+        make_hop('fusion/1', 'lidar/0', 'fusion', (1, ),
+                 [0.4, 0.5, 0.5, 0.5, 0.6]),
+        make_hop('control/0', 'fusion/1', 'control', (1, ),
+                 [0.6, 0.6, 0.7, 0.7, 0.8]),
+        make_hop('control/1', None, 'control', (2, ),
+                 [1.0, 1.0, 1.0, 1.0, 1.2]),
+        make_hop('control/2', None, 'control', (3, ),
+                 [2.0, 2.0, 2.0, 2.0, 2.3]),
+    ]
+    paths = get_critical_paths(hops, sink_op_names=['control'])
+    assert [hop.hop_id for hop in paths[(1, )]] == [
+        'lidar/0', 'fusion/1', 'control/0'
+    ]
+    report = get_latency_report(hops, sink_op_names=['control'])
+    assert report['num_paths'] == 3
+    assert report['end_to_end_ms']['max'] == pytest.approx(800)
+    assert report['end_to_end_ms']['p50'] == pytest.approx(300)
+    lidar = report['operators']['lidar']
+    assert lidar['queue_ms']['max'] == pytest.approx(200)
+    # The lidar operator sent the message on the path after 200 ms.
+    assert lidar['processing_ms']['max'] == pytest.approx(200)
+    assert report['operators']['fusion']['transit_ms']['max'] == (
+        pytest.approx(100))
+    assert report['operators']['control']['num_paths'] == 3
+    assert report['critical_path'] == [['source', 'control', 'control_in']]
+    assert report['critical_path_fraction'] == pytest.approx(2.0 / 3)
+
+
+def test_empty_report():
+    assert get_latency_report([]) == {'num_paths': 0, 'operators': {}}
+
+
+def test_graph_report_accepts_operator_names(set_flags):
+    set_flags(trace_latency=True)
+    graph = Graph(name='g')
+    source = graph.add(SourceOp, name='source')
+    square = graph.add(MapOp,
+                       name='square',
+                       init_args={
+                           'output_stream_name': 'squares',
+                           'map_lambda': lambda msg: msg.data**2
+                       },
+                       setup_args={'output_stream_name': 'squares'})
+    sink = graph.add(SinkOp, name='sink')
+    graph.connect([source], [square])
+    graph.connect([square], [sink])
+    run_graph(graph)
+    report = graph.get_latency_report(sink_op_names=['sink'])
+    assert report['num_paths'] == 5
+    # Operators are identified by their ids, as in the metrics.
+    assert sorted(report['operators']) == ['g/sink', 'g/square']
+    assert report['critical_path'] == [
+        ['g/source', 'g/square', 'integers'],
+        ['g/square', 'g/sink', 'squares'],
+    ]
+    assert graph.get_latency_report(
+        sink_op_names=['g/sink'])['num_paths'] == 5
+    report = graph.get_latency_report(sink_op_names=['square'])
+    assert sorted(report['operators']) == ['g/square']
@@ -0,0 +1,129 @@
+from __future__ import print_function
+
+import time
+
+import pytest
+from absl import flags
+
+from erdos.data_stream import DataStream
+from erdos.graph import Graph
+from erdos.message import Message
+from erdos.op import Op
+from tests.utils import SourceOp
+from tests.utils import get_op
+
+FLAGS = flags.FLAGS
+
+
+class FanOutOp(Op):
+    """Sends num_copies messages for every message it receives."""
+
+    def __init__(self, name, num_copies):
+        super(FanOutOp, self).__init__(name)
+        self._num_copies = num_copies
+
+    @staticmethod
+    def setup_streams(input_streams, output_stream_name):
+        input_streams.add_callback(FanOutOp.on_msg)
+        return [DataStream(data_type=int, name=output_stream_name)]
+
+    def on_msg(self, msg):
+        for _ in range(self._num_copies):
+            for output_stream in self.output_streams.values():
+                output_stream.send(Message(msg.data, msg.timestamp))
+
+
+class CountOp(Op):
+    def __init__(self, name):
+        super(CountOp, self).__init__(name)
+        self.num_msgs = 0
+
+    @staticmethod
+    def setup_streams(input_streams):
+        input_streams.add_callback(CountOp.on_msg)
+        return []
+
+    def on_msg(self, msg):
+        self.num_msgs += 1
+
+
+class LoopOp(Op):
+    """Sends every message it receives back to itself num_hops times."""
+
+    def __init__(self, name, num_hops):
+        super(LoopOp, self).__init__(name)
+        self._num_hops = num_hops
+        self.num_msgs = 0
+
+    @staticmethod
+    def setup_streams(input_streams):
+        input_streams.add_callback(LoopOp.on_msg)
+        return [DataStream(data_type=int, name='loop')]
+
+    def on_msg(self, msg):
+        self.num_msgs += 1
+        hops = msg.data + 1 if msg.stream_name == 'loop' else 0
+        if hops < self._num_hops:
+            self.get_output_stream('loop').send(Message(hops, msg.timestamp))
+
+
+def wait_for(condition, timeout):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.mark.parametrize('queue_size', [5, 1000])
+def test_fan_in_does_not_deadlock(set_flags, queue_size):
+    set_flags(local_queue_size=queue_size)
+    num_msgs = 20
+    num_copies = queue_size * 2
+    graph = Graph(name='test')
+    source = graph.add(SourceOp, name='source',
+                       init_args={'num_msgs': num_msgs})
+    sink = graph.add(CountOp, name='sink')
+    for index in range(FLAGS.local_num_workers + 1):
+        name = 'fan_out_{}'.format(index)
+        fan_out = graph.add(FanOutOp,
+                            name=name,
+                            init_args={'num_copies': num_copies},
+                            setup_args={'output_stream_name': name})
+        graph.connect([source], [fan_out])
+        graph.connect([fan_out], [sink])
+    execution_handle = graph.execute_async('local')
+    try:
+        # All the workers run the fan-out operators' callbacks, which send
+        # more messages than the sink's queue holds.
+        assert execution_handle.wait(timeout=30)
+        assert get_op(graph, 'test/sink').num_msgs == (
+            (FLAGS.local_num_workers + 1) * num_msgs * num_copies)
+        # The messages added beyond the bound by the workers are counted.
+        sink_queues = graph.op_handles[
+            'test/sink'].executor_handle.get_queue_metrics()
+        for metrics in sink_queues.values():
+            assert (metrics['num_over_bound'] > 0) == (
+                metrics['max_depth'] > queue_size)
+    finally:
+        execution_handle.stop()
+
+
+def test_self_loop_does_not_deadlock(set_flags):
+    set_flags(local_queue_size=2)
+    num_msgs = 10
+    num_hops = 20
+    graph = Graph(name='test')
+    source = graph.add(SourceOp, name='source',
+                       init_args={'num_msgs': num_msgs})
+    loop = graph.add(LoopOp, name='loop', init_args={'num_hops': num_hops})
+    graph.connect([source], [loop])
+    graph.connect([loop], [loop])
+    execution_handle = graph.execute_async('local')
+    try:
+        loop_op = get_op(graph, 'test/loop')
+        assert wait_for(
+            lambda: loop_op.num_msgs == num_msgs * (num_hops + 1), 30)
+    finally:
+        execution_handle.stop()
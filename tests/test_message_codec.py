@@ -0,0 +1,89 @@
+from __future__ import print_function
+
+import numpy as np
+import pytest
+
+from erdos import message_codec
+from erdos.message import Message
+from erdos.message import WatermarkMessage
+from erdos.message_codec import BinaryMessageCodec
+from erdos.message_codec import PickleMessageCodec
+from erdos.timestamp import TOP_TIMESTAMP
+from erdos.timestamp import Timestamp
+
+
+@pytest.mark.parametrize('codec', [BinaryMessageCodec(), PickleMessageCodec()])
+@pytest.mark.parametrize('data', [
+    None, 42, 'data 1', b'raw bytes', {'key': [1, 2]},
+    np.arange(24, dtype=np.float32).reshape(2, 3, 4),
+    np.zeros((0, 3), dtype=np.uint8),
+    np.float64(3.5)
+])
+def test_round_trip(codec, data):
+    msg = Message(data, Timestamp(coordinates=[3, 1]), 'camera')
+    decoded = codec.decode(codec.encode(msg, 'graph/op/camera'))
+    assert type(decoded) is Message
+    assert decoded.timestamp == msg.timestamp
+    assert decoded.stream_name == 'camera'
+    assert decoded.stream_uid == 'graph/op/camera'
+    if isinstance(data, np.ndarray):
+        assert decoded.data.dtype == data.dtype
+        np.testing.assert_array_equal(decoded.data, data)
+    else:
+        assert decoded.data == data
+
+
+def test_watermark_round_trip():
+    codec = BinaryMessageCodec()
+    msg = WatermarkMessage(Timestamp(coordinates=[7]), 'lidar')
+    decoded = codec.decode(codec.encode(msg, 'graph/op/lidar'))
+    assert isinstance(decoded, WatermarkMessage)
+    assert decoded.timestamp == Timestamp(coordinates=[7])
+    assert decoded.stream_name == 'lidar'
+
+
+def test_end_of_stream_round_trip():
+    codec = BinaryMessageCodec()
+    msg = WatermarkMessage(TOP_TIMESTAMP, 'lidar')
+    decoded = codec.decode(codec.encode(msg, 'graph/op/lidar'))
+    assert isinstance(decoded, WatermarkMessage)
+    assert decoded.timestamp == TOP_TIMESTAMP
+
+
+def test_array_is_not_pickled():
+    codec = BinaryMessageCodec()
+    frame = np.random.randint(0, 255, (1080, 1920, 3), dtype=np.uint8)
+    data = codec.encode(Message(frame, Timestamp(coordinates=[0]), 'camera'),
+                        'graph/op/camera')
+    # The frame is stored as a raw buffer after a small header.
+    assert len(data) - frame.nbytes < 100
+    decoded = codec.decode(data)
+    assert not decoded.data.flags.writeable
+    np.testing.assert_array_equal(decoded.data, frame)
+
+
+def test_non_contiguous_array():
+    codec = BinaryMessageCodec()
+    array = np.arange(20).reshape(4, 5)[:, ::2]
+    decoded = codec.decode(
+        codec.encode(Message(array, Timestamp(coordinates=[0])), 'uid'))
+    np.testing.assert_array_equal(decoded.data, array)
+
+
+def test_array_is_encoded_without_memoryviews(monkeypatch):
+    # Python 2 cannot join memoryviews, so the array is copied to bytes.
+    monkeypatch.setattr(message_codec, '_JOIN_MEMORYVIEWS', False)
+    codec = BinaryMessageCodec()
+    array = np.arange(12, dtype=np.int16).reshape(3, 4)
+    decoded = codec.decode(
+        codec.encode(Message(array, Timestamp(coordinates=[0]), 'camera'),
+                     'graph/op/camera'))
+    np.testing.assert_array_equal(decoded.data, array)
+
+
+@pytest.mark.parametrize('codec', [BinaryMessageCodec(), PickleMessageCodec()])
+def test_encode_does_not_modify_message(codec):
+    msg = Message(1, Timestamp(coordinates=[0]), 'camera')
+    msg.stream_uid = 'graph/sender/camera'
+    codec.encode(msg, 'graph/op/camera')
+    assert msg.stream_uid == 'graph/sender/camera'
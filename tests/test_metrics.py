@@ -0,0 +1,118 @@
+from __future__ import print_function
+
+import json
+import pickle
+import random
+
+import numpy as np
+
+from erdos.data_stream import DataStream
+from erdos.event_trace import EVENT_RECEIVE
+from erdos.event_trace import EVENT_SEND
+from erdos.local.local_operator import LocalOperator
+from erdos.message import Message
+from erdos.metrics import Histogram
+from erdos.metrics import MetricsRegistry
+from erdos.metrics import _get_bucket
+from erdos.metrics import _get_bucket_value
+from erdos.metrics import dump_metrics
+from erdos.op import Op
+from erdos.op_handle import OpHandle
+from erdos.timestamp import Timestamp
+
+
+class SinkOp(Op):
+    def __init__(self, name):
+        super(SinkOp, self).__init__(name)
+        self.msgs = []
+
+    def on_msg(self, msg):
+        self.msgs.append(msg.data)
+
+
+def test_buckets():
+    for value in list(range(1000)) + [2**20 + 5, 2**40 + 7, 2**63]:
+        bucket = _get_bucket(value)
+        assert _get_bucket_value(bucket) <= value
+        assert value < _get_bucket_value(bucket + 1)
+    assert _get_bucket(2**64 - 1) < len(Histogram()._buckets)
+
+
+def test_histogram_percentiles():
+    rand = random.Random(42)
+    values = [rand.randint(1, 10**9) for _ in range(10000)]
+    histogram = Histogram()
+    for value in values:
+        histogram.record(value)
+    values.sort()
+    for percentile in (50, 90, 99):
+        expected = values[int(percentile / 100.0 * len(values)) - 1]
+        actual = histogram.get_percentile(percentile)
+        assert abs(actual - expected) <= 0.05 * expected
+    snapshot = histogram.snapshot()
+    assert snapshot['count'] == 10000
+    assert snapshot['min'] == values[0]
+    assert snapshot['max'] == values[-1]
+    assert Histogram().snapshot()['p99'] is None
+
+
+def test_registry(tmpdir):
+    registry = MetricsRegistry('op')
+    registry.counter('msgs').inc(3)
+    registry.gauge('depth').set(7)
+    registry.gauge('constant', lambda: 42)
+    for _ in range(5):
+        registry.on_event(EVENT_SEND, 'camera')
+        registry.on_send_data('camera', np.zeros(10, dtype=np.uint8))
+    for _ in range(20):
+        registry.on_send_data('obstacles', [1, 2, 3])
+    callback = registry.wrap_callback(lambda x: x + 1, 'op/camera')
+    assert callback(1) == 2
+
+    snapshot = registry.snapshot()
+    assert snapshot['msgs']['count'] == 3
+    assert snapshot['depth'] == 7
+    assert snapshot['constant'] == 42
+    assert snapshot['stream.camera.send']['count'] == 5
+    assert snapshot['stream.camera.send_bytes']['count'] == 50
+    assert snapshot['stream.obstacles.send_bytes']['count'] == 20 * len(
+        pickle.dumps([1, 2, 3], pickle.HIGHEST_PROTOCOL))
+    assert snapshot['callback.<lambda>.op/camera.latency_ns']['count'] == 1
+    assert snapshot['callback.latency_ns']['count'] == 1
+
+    filename = str(tmpdir.join('metrics.json'))
+    dump_metrics({'op': snapshot}, filename)
+    with open(filename) as f:
+        assert json.load(f)['op']['depth'] == 7
+
+
+def test_local_operator_metrics():
+    input_stream = DataStream(name='camera', uid='source/camera',
+                              callbacks=[SinkOp.on_msg])
+    op_handle = OpHandle('sink', SinkOp, {}, {}, 'default',
+                         framework='local')
+    op_handle.input_streams = [input_stream]
+    op_handle.enable_metrics = True
+    local_op = LocalOperator(op_handle, None)
+    local_op.setup_streams({})
+    for i in range(3):
+        msg = Message(i, Timestamp(coordinates=[i]))
+        msg.stream_name = 'camera'
+        msg.stream_uid = 'source/camera'
+        local_op.on_msg(msg)
+
+    assert local_op._op.msgs == [0, 1, 2]
+    metrics = local_op.get_metrics()
+    assert metrics['stream.camera.receive']['count'] == 3
+    assert metrics['callback.on_msg.source/camera.latency_ns']['count'] == 3
+    assert metrics['queue.source/camera']['depth'] == 0
+
+
+def test_metrics_disabled():
+    op_handle = OpHandle('sink', SinkOp, {}, {}, 'default',
+                         framework='local')
+    local_op = LocalOperator(op_handle, None)
+    local_op.setup_streams({})
+    local_op._op.trace_event(EVENT_RECEIVE, 'camera',
+                             Timestamp(coordinates=[0]))
+    assert local_op.get_metrics() is None
@@ -0,0 +1,99 @@
+from __future__ import print_function
+
+from erdos.data_stream import DataStream
+from erdos.graph import Graph
+from erdos.op import Op
+from erdos.profiler import get_profile
+from erdos.profiler import write_profile_report
+
+
+class SourceOp(Op):
+    @staticmethod
+    def setup_streams(input_streams):
+        return [DataStream(name='numbers'), DataStream(name='squares')]
+
+
+class SinkOp(Op):
+    @staticmethod
+    def setup_streams(input_streams):
+        input_streams.add_callback(SinkOp.on_msg)
+        return []
+
+    def on_msg(self, msg):
+        pass
+
+
+METRICS = {
+    'g/source': {
+        'stream.numbers.send': {
+            'count': 100,
+            'rate': 10.0
+        },
+        'stream.numbers.send_bytes': {
+            'count': 800,
+            'rate': 80.0
+        },
+    },
+    'g/sink': {
+        'callback.latency_ns': {
+            'count': 100,
+            'mean': 2e6,
+            'p99': 5e6
+        },
+    },
+}
+
+LATENCY_REPORT = {
+    'num_paths': 10,
+    'end_to_end_ms': {
+        'mean': 3.0,
+        'p50': 3.0,
+        'p99': 6.0,
+        'max': 7.0
+    },
+    'critical_path': [('g/source', 'g/sink', 'numbers')],
+}
+
+EDGES = [('g/source', 'g/sink', 'numbers'), ('g/source', 'g/sink', 'squares')]
+
+
+def test_edges_have_stream_names():
+    graph = Graph(name='g')
+    source = graph.add(SourceOp, name='source')
+    sink = graph.add(SinkOp, name='sink')
+    graph.connect([source], [sink])
+    graph._build_refined_op_graph()
+    assert sorted(graph._get_edges()) == EDGES
+
+
+def test_profile():
+    (ops, edges) = get_profile(['g/source', 'g/sink'], EDGES, METRICS,
+                               LATENCY_REPORT)
+    assert ops[0]['mean_callback_ms'] is None
+    assert ops[1]['mean_callback_ms'] == 2.0
+    assert ops[1]['p99_callback_ms'] == 5.0
+    assert all(op['critical'] for op in ops)
+    assert edges[0]['msgs_per_sec'] == 10.0
+    assert edges[0]['bytes_per_sec'] == 80.0
+    assert edges[0]['critical']
+    assert edges[1]['msgs_per_sec'] == 0.0
+    assert not edges[1]['critical']
+
+
+def test_write_profile_report(tmpdir):
+    nodes = ['g/source', 'g/sink']
+    dot_filename = str(tmpdir.join('profile.gv'))
+    write_profile_report(dot_filename, nodes, EDGES, METRICS, LATENCY_REPORT)
+    with open(dot_filename) as f:
+        dot = f.read()
+    assert dot.startswith('digraph G {')
+    assert ('"g/source" -> "g/sink" [ label = "numbers\\n10.0 msg/s\\n'
+            '80.0 B/s" color="#d62728" penwidth=2 ];') in dot
+
+    html_filename = str(tmpdir.join('profile.html'))
+    write_profile_report(html_filename, nodes, EDGES, METRICS,
+                         LATENCY_REPORT)
+    with open(html_filename) as f:
+        html = f.read()
+    assert 'p99 6.000 ms' in html
+    assert '<td>g/sink</td><td>100</td><td>2.000 ms</td>' in html
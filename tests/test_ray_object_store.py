@@ -0,0 +1,97 @@
+from __future__ import print_function
+
+import numpy as np
+import pytest
+import ray
+
+from erdos.message import Message
+from erdos.ray import ray_object_store
+from erdos.ray.ray_object_store import ObjectStoreData
+from erdos.ray.ray_object_store import get_batch_message_data
+from erdos.ray.ray_object_store import get_message_data
+from erdos.ray.ray_object_store import put_message_data
+from erdos.timestamp import Timestamp
+
+THRESHOLD = 1024
+
+
+@pytest.fixture(scope='module', autouse=True)
+def ray_cluster():
+    ray.init(num_cpus=1, include_dashboard=False)
+    yield
+    ray.shutdown()
+
+
+def make_msg(data, index=0):
+    return Message(data, Timestamp(coordinates=[index]))
+
+
+def test_small_data_is_not_moved():
+    small_array = np.zeros(THRESHOLD // 8 - 1)
+    for data in [small_array, 'not an array', [0] * THRESHOLD]:
+        msg = make_msg(data)
+        assert put_message_data(msg, THRESHOLD) is msg
+    large_msg = make_msg(np.zeros(THRESHOLD))
+    assert put_message_data(large_msg, None) is large_msg
+
+
+def test_large_data_is_moved_without_changing_the_message():
+    array = np.arange(THRESHOLD // 8, dtype=np.float64)
+    assert array.nbytes == THRESHOLD
+    msg = make_msg(array)
+    store_msg = put_message_data(msg, THRESHOLD)
+    assert store_msg is not msg
+    assert isinstance(store_msg.data, ObjectStoreData)
+    assert store_msg.timestamp == msg.timestamp
+    # The sender's message still holds its array, which remains writable.
+    assert msg.data is array
+    array[0] = -1
+
+    received_msg = get_message_data(store_msg)
+    assert received_msg.data[0] == 0
+    assert np.array_equal(received_msg.data[1:], array[1:])
+    # The array is read from the object store without copying it.
+    assert not received_msg.data.flags.writeable
+    with pytest.raises(ValueError):
+        received_msg.data[0] = 1
+
+
+def test_get_message_data_ignores_inline_data():
+    msg = make_msg(np.zeros(4))
+    assert get_message_data(msg) is msg
+    assert msg.data.flags.writeable
+
+
+def test_batch_is_resolved_with_one_request(monkeypatch):
+    msgs = [
+        put_message_data(make_msg(np.full(THRESHOLD, index), index),
+                         THRESHOLD) for index in range(3)
+    ]
+    msgs.insert(1, make_msg('inline', 3))
+    requests = []
+    ray_get = ray.get
+
+    def get(object_ids):
+        requests.append(object_ids)
+        return ray_get(object_ids)
+
+    monkeypatch.setattr(ray_object_store.ray, 'get', get)
+    resolved_msgs = get_batch_message_data(msgs)
+    monkeypatch.undo()
+
+    assert len(requests) == 1 and len(requests[0]) == 3
+    assert [msg.timestamp.coordinates[0]
+            for msg in resolved_msgs] == [0, 3, 1, 2]
+    assert resolved_msgs[1].data == 'inline'
+    for msg in resolved_msgs[:1] + resolved_msgs[2:]:
+        assert np.all(msg.data == msg.timestamp.coordinates[0])
+        assert not msg.data.flags.writeable
+
+
+def test_batch_without_moved_data_does_not_use_the_object_store(monkeypatch):
+    def get(object_ids):
+        raise AssertionError('Unexpected object store request')
+
+    monkeypatch.setattr(ray_object_store.ray, 'get', get)
+    msgs = [make_msg(index, index) for index in range(3)]
+    assert [msg.data for msg in get_batch_message_data(msgs)] == [0, 1, 2]
@@ -0,0 +1,169 @@
+from __future__ import print_function
+
+import numpy as np
+import pytest
+
+from erdos.graph import Graph
+from erdos.message import Message
+from erdos.operators import RecordOp
+from erdos.record_log import COMPRESSION_NONE
+from erdos.record_log import COMPRESSION_ZLIB
+from erdos.record_log import LogReader
+from erdos.record_log import LogWriter
+from erdos.record_log import read_log_streams
+from erdos.timestamp import Timestamp
+from tests.utils import SourceOp
+
+STREAMS = [(np.ndarray, 'camera'), (dict, 'pose')]
+
+
+def create_msgs(num_timestamps):
+    msgs = []
+    for t in range(num_timestamps):
+        frame = np.full((4, 5, 3), t, dtype=np.uint8)
+        msgs.append(Message(frame, Timestamp(coordinates=[t]), 'camera'))
+        msgs.append(
+            Message({'x': t, 'y': -t}, Timestamp(coordinates=[t]), 'pose'))
+    return msgs
+
+
+def write_log(filename, msgs, close=True, **kwargs):
+    writer = LogWriter(filename, STREAMS, **kwargs)
+    for msg in msgs:
+        writer.write(msg)
+    if close:
+        writer.close()
+    else:
+        writer.flush()
+    return writer
+
+
+def assert_msgs_equal(read_msgs, msgs):
+    assert len(read_msgs) == len(msgs)
+    for (read_msg, msg) in zip(read_msgs, msgs):
+        assert read_msg.stream_name == msg.stream_name
+        assert read_msg.timestamp == msg.timestamp
+        if isinstance(msg.data, np.ndarray):
+            np.testing.assert_array_equal(read_msg.data, msg.data)
+        else:
+            assert read_msg.data == msg.data
+
+
+@pytest.mark.parametrize('compression', [COMPRESSION_NONE, COMPRESSION_ZLIB])
+@pytest.mark.parametrize('use_mmap', [True, False])
+@pytest.mark.parametrize('chunk_size', [1, 200, 1024 * 1024])
+def test_round_trip(tmpdir, compression, use_mmap, chunk_size):
+    filename = str(tmpdir.join('log.erdos'))
+    msgs = create_msgs(10)
+    write_log(filename, msgs, chunk_size=chunk_size, compression=compression)
+    assert read_log_streams(filename) == STREAMS
+    reader = LogReader(filename, use_mmap)
+    assert reader.streams == STREAMS
+    assert_msgs_equal(list(reader.read()), msgs)
+    reader.close()
+
+
+def test_seek_and_select_streams(tmpdir):
+    filename = str(tmpdir.join('log.erdos'))
+    msgs = create_msgs(10)
+    write_log(filename, msgs, chunk_size=200)
+    reader = LogReader(filename)
+    read_msgs = list(
+        reader.read(['camera'], start_timestamp=Timestamp(coordinates=[6])))
+    assert_msgs_equal(read_msgs, [
+        msg for msg in msgs
+        if msg.stream_name == 'camera' and msg.timestamp.coordinates[0] >= 6
+    ])
+    reader.close()
+
+
+def test_mmap_does_not_copy_frames(tmpdir):
+    filename = str(tmpdir.join('log.erdos'))
+    write_log(filename, create_msgs(2))
+    reader = LogReader(filename, use_mmap=True)
+    frame = next(reader.read(['camera'])).data
+    assert not frame.flags.owndata
+    assert not frame.flags.writeable
+    # The mapping is released when the frame is garbage collected.
+    reader.close()
+    assert frame[0, 0, 0] == 0
+
+
+def test_read_unclosed_log(tmpdir):
+    filename = str(tmpdir.join('log.erdos'))
+    msgs = create_msgs(10)
+    writer = write_log(filename, msgs, close=False, chunk_size=300)
+    # Truncate the last chunk, as if the recording process was killed while
+    # writing it.
+    writer.write(msgs[0])
+    writer._file.close()
+    with open(filename, 'ab') as f:
+        f.write(b'\x00\xff\xff\x00\x00')
+    reader = LogReader(filename)
+    assert_msgs_equal(list(reader.read()), msgs)
+    reader.close()
+
+
+def test_invalid_log(tmpdir):
+    filename = str(tmpdir.join('log.erdos'))
+    with open(filename, 'wb') as f:
+        f.write(b'not a log')
+    with pytest.raises(ValueError):
+        LogReader(filename)
+    with pytest.raises(ValueError):
+        LogWriter(filename, STREAMS, compression='lzma')
+
+
+def test_record_times(tmpdir):
+    filename = str(tmpdir.join('log.erdos'))
+    writer = LogWriter(filename, STREAMS)
+    msgs = create_msgs(2)
+    for (i, msg) in enumerate(msgs):
+        writer.write(msg, record_time=100.0 + i)
+    writer.flush()
+    # The times are read from the records of logs that were not closed.
+    reader = LogReader(filename)
+    assert [entry.time for entry in reader.index] == [100.0, 101.0, 102.0,
+                                                      103.0]
+    reader.close()
+    writer.close()
+    reader = LogReader(filename)
+    assert [entry.time for entry in reader.index] == [100.0, 101.0, 102.0,
+                                                      103.0]
+    reader.close()
+
+
+def test_record_op_writes_index_at_end_of_stream(tmpdir):
+    filename = str(tmpdir.join('log.erdos'))
+    graph = Graph(name='test')
+    source = graph.add(SourceOp, name='source', init_args={'num_msgs': 1000})
+    record = graph.add(RecordOp,
+                       name='record',
+                       init_args={'filename': filename},
+                       setup_args={'filter': None})
+    graph.connect([source], [record])
+    execution_handle = graph.execute_async('local')
+    try:
+        assert execution_handle.wait(timeout=10)
+        # The index is written without waiting for the execution to stop.
+        with open(filename, 'rb') as f:
+            assert f.read().endswith(b'ERDOSIDX')
+    finally:
+        execution_handle.stop()
+    reader = LogReader(filename)
+    assert reader.streams == [(int, 'integers')]
+    assert [msg.data for msg in reader.read()] == list(range(1000))
+    reader.close()
+
+
+def test_older_log_version_is_rejected(tmpdir):
+    filename = str(tmpdir.join('log.erdos'))
+    write_log(filename, create_msgs(1))
+    # Version 1 logs have the same file header, but different records.
+    with open(filename, 'r+b') as f:
+        f.seek(len(b'ERDOSLOG'))
+        f.write(b'\x01')
+    with pytest.raises(ValueError):
+        LogReader(filename)
+    with pytest.raises(ValueError):
+        read_log_streams(filename)
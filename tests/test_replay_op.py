@@ -0,0 +1,112 @@
+from __future__ import print_function
+
+import time
+
+import pytest
+
+from erdos.data_stream import DataStream
+from erdos.graph import Graph
+from erdos.message import Message
+from erdos.message import WatermarkMessage
+from erdos.operators import ReplayOp
+from erdos.record_log import LogWriter
+from erdos.timestamp import TOP_TIMESTAMP
+from erdos.timestamp import Timestamp
+from tests.utils import SinkOp
+from tests.utils import get_op
+from tests.utils import run_graph
+
+STREAMS = [(int, 'camera'), (int, 'pose')]
+
+
+class RecordingDataStream(DataStream):
+    def __init__(self, name):
+        super(RecordingDataStream, self).__init__(name=name)
+        self.sent = []
+
+    def send(self, msg):
+        self.sent.append((time.time(), msg))
+
+
+def write_log(filename, records):
+    writer = LogWriter(filename, STREAMS)
+    for (record_time, name, coordinate) in records:
+        msg = Message(coordinate, Timestamp(coordinates=[coordinate]), name)
+        writer.write(msg, record_time)
+    writer.close()
+
+
+def replay(filename, stream_names=None, **kwargs):
+    op = ReplayOp('replay', filename, **kwargs)
+    output_streams = ReplayOp.setup_streams(None, filename, stream_names)
+    op._add_output_streams(
+        [RecordingDataStream(stream.name) for stream in output_streams])
+    op.execute()
+    return op
+
+
+def get_output(op, name):
+    return [(isinstance(msg, WatermarkMessage), msg.timestamp.coordinates[0])
+            for (_, msg) in op.get_output_stream(name).sent]
+
+
+def test_watermarks_follow_timestamps(tmpdir):
+    filename = str(tmpdir.join('log.erdos'))
+    write_log(filename, [(0, 'camera', 0), (0, 'pose', 0), (0, 'camera', 1),
+                         (0, 'camera', 2), (0, 'pose', 1), (0, 'pose', 3)])
+    op = replay(filename)
+    assert op.num_replayed == 6
+    # The watermark of 1 is sent once a message with a higher timestamp
+    # follows, so the pose message of 1 recorded later is late.
+    assert get_output(op, 'camera') == [(False, 0), (True, 0), (False, 1),
+                                        (True, 1), (False, 2), (True, 2),
+                                        (True, 3), (True, float('inf'))]
+    assert get_output(op, 'pose') == [(False, 0), (True, 0), (True, 1),
+                                      (False, 1), (True, 2), (False, 3),
+                                      (True, 3), (True, float('inf'))]
+
+
+def test_replay_selected_streams_from_timestamp(tmpdir):
+    filename = str(tmpdir.join('log.erdos'))
+    write_log(filename, [(0, 'camera', t) for t in range(5)] +
+              [(0, 'pose', t) for t in range(5)])
+    op = replay(filename, ['pose'], start_timestamp=Timestamp(coordinates=[3]))
+    assert list(op.output_streams.keys()) == ['pose']
+    assert get_output(op, 'pose') == [(False, 3), (True, 3), (False, 4),
+                                      (True, 4), (True, float('inf'))]
+
+
+@pytest.mark.parametrize('kwargs, expected_duration', [
+    (dict(), 0),
+    (dict(speed=1.0), 0.1),
+    (dict(speed=2.0), 0.05),
+    (dict(frequency=100), 0.04),
+])
+def test_replay_rate(tmpdir, kwargs, expected_duration):
+    filename = str(tmpdir.join('log.erdos'))
+    write_log(filename, [(10 + t * 0.02, 'camera', t) for t in range(6)])
+    op = replay(filename, **kwargs)
+    send_times = [
+        send_time for (send_time, msg) in op.get_output_stream('camera').sent
+        if not isinstance(msg, WatermarkMessage)
+    ]
+    assert len(send_times) == 6
+    duration = send_times[-1] - send_times[0]
+    assert expected_duration <= duration < expected_duration + 0.03
+
+
+def test_replay_ends_the_execution(tmpdir):
+    filename = str(tmpdir.join('log.erdos'))
+    write_log(filename, [(0, 'camera', t) for t in range(5)])
+    graph = Graph(name='test')
+    replay_op = graph.add(ReplayOp,
+                          name='replay',
+                          init_args={'filename': filename},
+                          setup_args={'filename': filename})
+    sink = graph.add(SinkOp, name='sink')
+    graph.connect([replay_op], [sink])
+    # The execution finishes once the log is replayed.
+    run_graph(graph)
+    sink = get_op(graph, 'test/sink')
+    assert sink.data == list(range(5))
+    assert sink.watermarks[-1] == TOP_TIMESTAMP
@@ -0,0 +1,50 @@
+from __future__ import print_function
+
+import pytest
+
+from erdos.serialization_stats import SerializationStats
+from erdos.serialization_stats import format_serialization_report
+
+
+def send(stats, stream_name, num_msgs, num_bytes, duration):
+    for _ in range(num_msgs):
+        if stats.should_sample(stream_name):
+            stats.record(stream_name, num_bytes, duration)
+
+
+def test_sampling():
+    stats = SerializationStats('op', sample_interval=4)
+    assert [stats.should_sample('camera') for _ in range(9)] == [
+        True, False, False, False, True, False, False, False, True
+    ]
+    assert stats.should_sample('lidar')
+
+
+def test_report():
+    stats = SerializationStats('op', sample_interval=4)
+    send(stats, 'camera', 10, 1000, 0.002)
+    send(stats, 'control', 10, 10, 0.0)
+    # Streams without sampled messages are not reported.
+    stats.should_sample('lidar')
+    stats._start_time -= 10
+    report = dict((stream['stream'], stream) for stream in stats.get_report())
+    assert sorted(report) == ['camera', 'control']
+    camera = report['camera']
+    assert camera['num_msgs'] == 10
+    assert camera['num_sampled'] == 3
+    assert camera['mean_bytes'] == 1000
+    assert camera['bytes_per_sec'] == pytest.approx(1000, rel=0.01)
+    assert camera['mean_serialization_ms'] == pytest.approx(2)
+    assert camera['serialization_ms_per_sec'] == pytest.approx(2, rel=0.01)
+
+
+def test_format_report():
+    stats = SerializationStats('op', sample_interval=1)
+    send(stats, 'control', 1, 10, 0.0)
+    send(stats, 'camera', 1, 1000, 0.001)
+    send(stats, 'lidar', 1, 100, 0.0)
+    lines = format_serialization_report(stats.get_report(), top=2).split('\n')
+    assert lines[0] == 'Top 2 streams by serialized bytes per second:'
+    assert lines[1].startswith('  op/camera: ')
+    assert 'mean 1000 B, serialization 1.000 ms/msg' in lines[1]
+    assert lines[2].startswith('  op/lidar: ')
@@ -0,0 +1,176 @@
+from __future__ import print_function
+
+import threading
+import time
+
+import pytest
+
+from erdos.data_stream import DataStream
+from erdos.graph import Graph
+from erdos.data_stream import OVERFLOW_BLOCK
+from erdos.data_stream import OVERFLOW_DROP_NEWEST
+from erdos.data_stream import OVERFLOW_DROP_OLDEST
+from erdos.data_stream import OVERFLOW_LATEST_PER_TIMESTAMP
+from erdos.message import Message
+from erdos.message import WatermarkMessage
+from erdos.op import Op
+from erdos.stream_queue import StreamQueue
+from erdos.timestamp import Timestamp
+
+
+def msg(data, coordinate):
+    return Message(data, Timestamp(coordinates=[coordinate]))
+
+
+def watermark(coordinate):
+    return WatermarkMessage(Timestamp(coordinates=[coordinate]))
+
+
+def drain(queue):
+    entries = []
+    while True:
+        entry = queue.get()
+        if entry is None:
+            return entries
+        if isinstance(entry, WatermarkMessage):
+            entries.append(('watermark', entry.timestamp.coordinates[0]))
+        else:
+            entries.append(entry.data)
+
+
+def test_unbounded_queue():
+    queue = StreamQueue('stream')
+    for i in range(100):
+        assert queue.put(msg(i, i))
+    assert drain(queue) == list(range(100))
+
+
+def test_drop_newest():
+    queue = StreamQueue('stream', 2, OVERFLOW_DROP_NEWEST)
+    assert [queue.put(msg(i, i)) for i in range(4)] == [True, True, False,
+                                                        False]
+    assert drain(queue) == [0, 1]
+    assert queue.get_metrics() == {
+        'depth': 0,
+        'max_depth': 2,
+        'num_received': 4,
+        'num_dropped': 2,
+        'num_over_bound': 0
+    }
+
+
+def test_drop_oldest_keeps_watermarks():
+    queue = StreamQueue('stream', 2, OVERFLOW_DROP_OLDEST)
+    queue.put(msg(0, 0))
+    queue.put_watermark(watermark(0))
+    queue.put(msg(1, 1))
+    queue.put(msg(2, 2))
+    queue.put(msg(3, 3))
+    assert drain(queue) == [('watermark', 0), 2, 3]
+    assert queue.get_metrics()['num_dropped'] == 2
+
+
+def test_latest_per_timestamp():
+    queue = StreamQueue('stream', 2, OVERFLOW_LATEST_PER_TIMESTAMP)
+    assert queue.put(msg('a0', 0))
+    assert queue.put(msg('a1', 1))
+    # Replaces the queued message with the same timestamp.
+    assert not queue.put(msg('b0', 0))
+    # The queue is full, so the oldest timestamp is dropped.
+    assert queue.put(msg('a2', 2))
+    assert drain(queue) == ['a1', 'a2']
+    assert queue.get_metrics()['num_dropped'] == 2
+    assert queue.put(msg('c0', 0))
+    assert drain(queue) == ['c0']
+
+
+def test_block():
+    queue = StreamQueue('stream', 1, OVERFLOW_BLOCK)
+    queue.put(msg(0, 0))
+    put_done = threading.Event()
+
+    def put():
+        queue.put(msg(1, 1))
+        put_done.set()
+
+    thread = threading.Thread(target=put)
+    thread.start()
+    time.sleep(0.05)
+    assert not put_done.is_set()
+    # Watermarks are never blocked.
+    queue.put_watermark(watermark(0))
+    assert queue.get().data == 0
+    assert put_done.wait(1)
+    thread.join()
+    assert drain(queue) == [('watermark', 0), 1]
+
+
+def test_data_stream_policy():
+    stream = DataStream(name='stream', max_queue_size=10,
+                        overflow_policy=OVERFLOW_DROP_OLDEST)
+    stream.uid = 'op'
+    copy = stream._copy_stream()
+    assert copy.max_queue_size == 10
+    assert copy.overflow_policy == OVERFLOW_DROP_OLDEST
+    with pytest.raises(ValueError):
+        stream.set_queue_policy(10, 'drop_everything')
+
+
+def test_block_without_blocking_the_caller():
+    queue = StreamQueue('stream', 1, OVERFLOW_BLOCK)
+    assert queue.put(msg(0, 0))
+    # The message is added beyond the bound instead of being dropped.
+    assert queue.put(msg(1, 1), block=False)
+    assert queue.get_metrics()['max_depth'] == 2
+    assert queue.get_metrics()['num_over_bound'] == 1
+    assert drain(queue) == [0, 1]
+
+
+def test_one_pending_task_per_queue():
+    queue = StreamQueue('stream', 2, OVERFLOW_DROP_OLDEST)
+    assert not queue.schedule()
+    queue.put(msg(0, 0))
+    assert queue.schedule()
+    queue.put(msg(1, 1))
+    queue.put_watermark(watermark(1))
+    # A task is already pending.
+    assert not queue.schedule()
+    assert queue.get().data == 0
+    assert queue.reschedule()
+    assert queue.get().data == 1
+    assert queue.reschedule()
+    assert queue.get().timestamp.coordinates == (1, )
+    assert not queue.reschedule()
+    queue.put(msg(2, 2))
+    assert queue.schedule()
+
+
+class SourceOp(Op):
+    @staticmethod
+    def setup_streams(input_streams):
+        return [DataStream(data_type=int, name='integers')]
+
+
+class BoundedSinkOp(Op):
+    @staticmethod
+    def setup_streams(input_streams, overflow_policy):
+        input_streams.set_queue_policy(5, overflow_policy)
+        return []
+
+
+@pytest.mark.parametrize('overflow_policy, warns',
+                         [(OVERFLOW_BLOCK, True),
+                          (OVERFLOW_DROP_OLDEST, False)])
+def test_ray_warns_about_unbounded_block_queues(caplog, overflow_policy,
+                                                warns):
+    graph = Graph(name='test')
+    source = graph.add(SourceOp, name='source')
+    sink = graph.add(BoundedSinkOp,
+                     name='sink',
+                     setup_args={'overflow_policy': overflow_policy})
+    graph.connect([source], [sink])
+    graph._build_refined_op_graph()
+    graph.framework = 'ray'
+    graph._warn_ignored_queue_bounds()
+    assert ('stream integers of operator test/sink is unbounded'
+            in caplog.text) == warns
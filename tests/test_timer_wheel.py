@@ -0,0 +1,142 @@
+from __future__ import print_function
+
+import threading
+import time
+
+import pytest
+
+from erdos.op import Op
+from erdos.timer_wheel import TimerWheel
+from erdos.utils import deadline
+
+
+def schedule_at_tick(wheel, tick, fired, name):
+    # Schedule in the middle of the previous tick to avoid rounding issues.
+    return wheel.schedule((tick - 0.5) * wheel.tick, fired.append, name)
+
+
+@pytest.mark.parametrize('tick', [3, 255, 256, 300, 65535, 65536, 70000])
+def test_timers_fire_at_their_tick(tick):
+    # The wheel is advanced manually, without starting its thread.
+    wheel = TimerWheel(tick=1.0)
+    fired = []
+    handle = schedule_at_tick(wheel, tick, fired, 'timer')
+    expired = wheel._advance(tick - 1)
+    assert expired == []
+    expired = wheel._advance(tick)
+    assert expired == [handle]
+    assert wheel.get_drift_stats()['num_timers'] == 0
+
+
+def test_timers_fire_in_order():
+    wheel = TimerWheel(tick=1.0)
+    fired = []
+    ticks = [1, 100, 256, 257, 511, 512, 1000, 66000, 66001]
+    handles = {}
+    for tick in reversed(ticks):
+        handles[tick] = schedule_at_tick(wheel, tick, fired, tick)
+    expired = []
+    for tick in range(1, max(ticks) + 1):
+        for handle in wheel._advance(tick):
+            expired.append((tick, handle))
+    assert expired == [(tick, handles[tick]) for tick in ticks]
+
+
+def test_cancel():
+    wheel = TimerWheel(tick=1.0)
+    fired = []
+    handle1 = schedule_at_tick(wheel, 10, fired, 1)
+    handle2 = schedule_at_tick(wheel, 1000, fired, 2)
+    assert handle1.cancel()
+    assert handle2.cancel()
+    assert not handle2.cancel()
+    assert wheel._advance(2000) == []
+    assert wheel.get_drift_stats()['num_timers'] == 0
+
+
+def test_callbacks_run_on_wheel_thread():
+    wheel = TimerWheel()
+    wheel.start()
+    try:
+        fired = threading.Event()
+        cancelled = []
+        wheel.schedule(0.01, fired.set)
+        handle = wheel.schedule(0.02, cancelled.append, 1)
+        handle.cancel()
+        assert fired.wait(1)
+        time.sleep(0.05)
+        assert cancelled == []
+    finally:
+        wheel.stop()
+
+
+def test_periodic_timer_and_drift_stats():
+    wheel = TimerWheel()
+    wheel.start()
+    try:
+        ticks = []
+        handle = wheel.schedule_periodic(0.01, ticks.append, 1)
+        time.sleep(0.205)
+        handle.cancel()
+        num_ticks = len(ticks)
+        # Periods are measured from the due times, so the timer does not
+        # drift.
+        assert 17 <= num_ticks <= 21
+        time.sleep(0.03)
+        assert len(ticks) == num_ticks
+        stats = handle.get_drift_stats()
+        assert stats['num_runs'] == num_ticks
+        assert 0 <= stats['mean_drift'] <= stats['max_drift']
+        assert wheel.get_drift_stats()['num_fired'] == num_ticks
+    finally:
+        wheel.stop()
+
+
+def test_periodic_timer_skips_missed_periods():
+    wheel = TimerWheel()
+    wheel.start()
+    try:
+        ticks = []
+
+        def slow_callback():
+            ticks.append(time.time())
+            if len(ticks) == 1:
+                time.sleep(0.055)
+
+        handle = wheel.schedule_periodic(0.01, slow_callback)
+        time.sleep(0.1)
+        handle.cancel()
+        assert handle.get_drift_stats()['num_missed'] >= 4
+        # Missed periods are not run in a burst: the timer runs at 10ms, at
+        # the end of the stall, and then every 10ms from 70ms on.
+        assert len(ticks) <= 7
+    finally:
+        wheel.stop()
+
+
+class DeadlineOp(Op):
+    def __init__(self, name):
+        super(DeadlineOp, self).__init__(name)
+        self.running = False
+        self.misses = []
+
+    @deadline(10, 'on_deadline_miss')
+    def on_msg(self, duration):
+        self.running = True
+        time.sleep(duration)
+        self.running = False
+
+    def on_deadline_miss(self):
+        self.misses.append((threading.current_thread().name, self.running))
+
+
+def test_deadline_miss_runs_during_late_callback():
+    op = DeadlineOp('op')
+    op.on_msg(0)
+    op.on_msg(0.1)
+    assert len(op.misses) == 1
+    (thread_name, running) = op.misses[0]
+    # The handler runs when the deadline expires, and not on the wheel's
+    # thread.
+    assert running
+    assert thread_name != 'erdos-timer-wheel'
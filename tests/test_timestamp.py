@@ -0,0 +1,73 @@
+from __future__ import print_function
+
+import copy
+import pickle
+
+import pytest
+
+from erdos.timestamp import SingleTimestamp
+from erdos.timestamp import TOP_TIMESTAMP
+from erdos.timestamp import Timestamp
+from erdos.timestamp import is_top_timestamp
+
+
+def test_constructor():
+    timestamp = Timestamp(coordinates=[1, 2])
+    assert timestamp.coordinates == (1, 2)
+    assert Timestamp(timestamp).coordinates == (1, 2)
+    assert str(timestamp) == '[1, 2]'
+
+
+def test_comparisons():
+    t1 = Timestamp(coordinates=[1, 2])
+    t2 = Timestamp(coordinates=[1, 3])
+    assert t1 < t2 and t1 <= t2 and t2 > t1 and t2 >= t1
+    assert t1 != t2 and not t1 == t2
+    assert t1 == Timestamp(coordinates=(1, 2))
+    assert t1 <= Timestamp(coordinates=[1, 2])
+    assert not t1 < Timestamp(coordinates=[1, 2])
+    assert t1 != Timestamp(coordinates=[1])
+    with pytest.raises(Exception):
+        t1 < Timestamp(coordinates=[1])
+
+
+def test_single_timestamp():
+    s1 = SingleTimestamp(1)
+    s2 = SingleTimestamp(2)
+    assert s1 < s2 and s1 <= s2 and s2 > s1 and s2 >= s1 and s1 != s2
+    # Single coordinate timestamps interoperate with regular timestamps.
+    t1 = Timestamp(coordinates=[1])
+    assert s1 == t1 and t1 == s1
+    assert hash(s1) == hash(t1)
+    assert s1 < Timestamp(coordinates=[2])
+    assert Timestamp(coordinates=[0]) < s1
+    assert {t1: 'value'}[s1] == 'value'
+
+
+def test_immutable():
+    timestamp = Timestamp(coordinates=[1])
+    with pytest.raises(AttributeError):
+        timestamp.coordinates = (2, )
+    with pytest.raises(AttributeError):
+        timestamp.other = 1
+
+
+@pytest.mark.parametrize('timestamp',
+                         [Timestamp(coordinates=[4, 2]), SingleTimestamp(3)])
+def test_copy_and_pickle(timestamp):
+    for other in [copy.copy(timestamp), copy.deepcopy(timestamp),
+                  pickle.loads(pickle.dumps(timestamp))]:
+        assert type(other) is type(timestamp)
+        assert other == timestamp
+        assert hash(other) == hash(timestamp)
+
+
+def test_top_timestamp():
+    assert is_top_timestamp(TOP_TIMESTAMP)
+    assert not is_top_timestamp(Timestamp(coordinates=[1]))
+    # The end-of-stream timestamp is higher than timestamps of any size.
+    for timestamp in [SingleTimestamp(2**62), Timestamp(coordinates=[1, 2])]:
+        assert timestamp < TOP_TIMESTAMP and TOP_TIMESTAMP > timestamp
+        assert timestamp <= TOP_TIMESTAMP and TOP_TIMESTAMP >= timestamp
+        assert timestamp != TOP_TIMESTAMP
+    assert TOP_TIMESTAMP == pickle.loads(pickle.dumps(TOP_TIMESTAMP))
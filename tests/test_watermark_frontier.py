@@ -0,0 +1,72 @@
+from __future__ import print_function
+
+import random
+
+import pytest
+
+from erdos.timestamp import TOP_TIMESTAMP
+from erdos.timestamp import Timestamp
+from erdos.watermark_frontier import WatermarkFrontier
+
+
+def ts(coordinate):
+    return Timestamp(coordinates=[coordinate])
+
+
+def test_waits_for_all_streams():
+    frontier = WatermarkFrontier(['a', 'b'])
+    assert frontier.update('a', ts(1)) is None
+    assert frontier.update('a', ts(2)) is None
+    assert frontier.update('b', ts(1)) == ts(1)
+    assert frontier.low_watermark == ts(1)
+
+
+def test_advances_to_low_watermark():
+    frontier = WatermarkFrontier(['a', 'b'])
+    frontier.update('a', ts(5))
+    assert frontier.update('b', ts(3)) == ts(3)
+    # The low watermark advances even though the updated stream is not the
+    # slowest one afterwards.
+    assert frontier.update('b', ts(7)) == ts(5)
+    assert frontier.update('b', ts(8)) is None
+    assert frontier.update('a', ts(9)) == ts(8)
+
+
+def test_rejects_non_increasing_watermarks():
+    frontier = WatermarkFrontier(['a'])
+    frontier.update('a', ts(2))
+    with pytest.raises(Exception):
+        frontier.update('a', ts(2))
+    assert frontier.get_high_watermark('a') == ts(2)
+
+
+def test_end_of_stream():
+    frontier = WatermarkFrontier(['a', 'b'])
+    frontier.update('a', ts(2))
+    assert frontier.update('b', TOP_TIMESTAMP) == ts(2)
+    assert frontier.update('a', TOP_TIMESTAMP) == TOP_TIMESTAMP
+    # Operators that forward the end-of-stream watermark send it twice.
+    assert frontier.update('a', TOP_TIMESTAMP) is None
+
+
+def test_matches_linear_scan():
+    random.seed(0)
+    streams = ['stream_{}'.format(i) for i in range(12)]
+    frontier = WatermarkFrontier(streams)
+    high_watermarks = dict((stream, 0) for stream in streams)
+    low_watermark = None
+    for _ in range(5000):
+        # Lag one stream to exercise heap compaction.
+        stream = random.choice(streams[1:] if random.random() < 0.9 else
+                               streams)
+        high_watermarks[stream] += random.randint(1, 3)
+        advanced = frontier.update(stream, ts(high_watermarks[stream]))
+        expected = None
+        if all(frontier.get_high_watermark(s) for s in streams):
+            expected = min(high_watermarks.values())
+        if expected is not None and expected != low_watermark:
+            assert advanced == ts(expected)
+            low_watermark = expected
+        else:
+            assert advanced is None
+    assert len(frontier._heap) <= 2 * len(streams) + 17
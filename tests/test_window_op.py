@@ -0,0 +1,260 @@
+from __future__ import print_function
+
+import numpy as np
+import pytest
+
+from erdos import operators
+from erdos.data_stream import DataStream
+from erdos.message import Message
+from erdos.message import WatermarkMessage
+from erdos.operators import CountAggregator
+from erdos.operators import CountWindowTrigger
+from erdos.operators import MaxAggregator
+from erdos.operators import MeanAggregator
+from erdos.operators import MinAggregator
+from erdos.operators import NumpyAggregator
+from erdos.operators import SlidingWindowAssigner
+from erdos.operators import SumAggregator
+from erdos.operators import SumWindowProcessor
+from erdos.operators import TimeWindowTrigger
+from erdos.operators import TumblingWindowAssigner
+from erdos.operators import WindowOp
+from erdos.timestamp import Timestamp
+
+
+class RecordingDataStream(DataStream):
+    def __init__(self, name):
+        super(RecordingDataStream, self).__init__(name=name)
+        self.sent = []
+
+    def send(self, msg):
+        self.sent.append(msg)
+
+
+def msg(data, coordinate):
+    return Message(data, Timestamp(coordinates=[coordinate]))
+
+
+def watermark(coordinate):
+    return WatermarkMessage(Timestamp(coordinates=[coordinate]))
+
+
+def create_window_op(assigner, trigger=None, aggregator=None):
+    processor = None if aggregator else SumWindowProcessor()
+    op = WindowOp('window_op', 'window_stream', assigner, trigger
+                  or TimeWindowTrigger(), processor, aggregator)
+    output_stream = RecordingDataStream('window_stream')
+    op._add_output_streams([output_stream])
+    return (op, output_stream)
+
+
+def get_output(output_stream):
+    return [(isinstance(m, WatermarkMessage), m.data,
+             m.timestamp.coordinates[0]) for m in output_stream.sent]
+
+
+def assert_watermark_order(output_stream):
+    """Checks that no message follows a watermark of a greater or equal
+    timestamp."""
+    watermark = None
+    for m in output_stream.sent:
+        if isinstance(m, WatermarkMessage):
+            watermark = m.timestamp
+        else:
+            assert watermark is None or m.timestamp > watermark
+
+
+def window_bounds(windows):
+    return [(w._start_time, w.end_time) for w in windows]
+
+
+def test_tumbling_assigner_uses_event_time():
+    assigner = TumblingWindowAssigner(10, 2, event_time=True)
+    assert window_bounds(assigner.assign_windows(msg(0, 2))) == [(2, 12)]
+    assert window_bounds(assigner.assign_windows(msg(0, 11))) == [(2, 12)]
+    assert window_bounds(assigner.assign_windows(msg(0, 1))) == [(-8, 2)]
+
+
+def test_sliding_assigner_uses_event_time():
+    assigner = SlidingWindowAssigner(10, 5, event_time=True)
+    assert window_bounds(assigner.assign_windows(msg(0, 12))) == [(5, 15),
+                                                                  (10, 20)]
+    assert window_bounds(assigner.assign_windows(msg(0, 10))) == [(5, 15),
+                                                                  (10, 20)]
+    assert window_bounds(assigner.assign_windows(msg(0, 9))) == [(0, 10),
+                                                                 (5, 15)]
+
+
+def test_watermarks_close_event_time_windows():
+    (op, output_stream) = create_window_op(
+        TumblingWindowAssigner(10, event_time=True))
+    for t in [1, 4, 9, 12]:
+        op.on_msg(msg(t, t))
+    op.on_watermark(watermark(8))
+    assert get_output(output_stream) == [(True, None, 8)]
+    # Results carry the last timestamp of their window, and precede the
+    # watermark that closed it.
+    op.on_watermark(watermark(9))
+    assert get_output(output_stream)[1:] == [(False, 14, 9), (True, None, 9)]
+    op.on_watermark(watermark(25))
+    assert get_output(output_stream)[3:] == [(False, 12, 19),
+                                             (True, None, 25)]
+    assert op._window_state_map == {}
+    assert_watermark_order(output_stream)
+
+
+def test_sliding_event_time_windows():
+    (op, output_stream) = create_window_op(
+        SlidingWindowAssigner(10, 5, event_time=True))
+    for t in [3, 7, 11]:
+        op.on_msg(msg(t, t))
+    op.on_watermark(watermark(100))
+    # Windows [-5, 5), [0, 10), [5, 15) and [10, 20) in order.
+    assert [data for (_, data, _) in get_output(output_stream)] == [
+        3, 10, 18, 11, None
+    ]
+    assert [t for (_, _, t) in get_output(output_stream)] == [
+        4, 9, 14, 19, 100
+    ]
+
+
+def test_processing_time_windows_ignore_watermarks():
+    (op, output_stream) = create_window_op(TumblingWindowAssigner(100000))
+    op.on_msg(msg(1, 1))
+    op.on_watermark(watermark(1000000))
+    assert get_output(output_stream) == [(True, None, 1000000)]
+
+
+def test_message_trigger_before_watermark():
+    (op, output_stream) = create_window_op(
+        TumblingWindowAssigner(10, event_time=True), CountWindowTrigger(2))
+    op.on_msg(msg(1, 1))
+    op.on_msg(msg(2, 2))
+    op.on_watermark(watermark(10))
+    assert get_output(output_stream) == [(False, 3, 9), (True, None, 10)]
+
+
+def test_requires_processor_or_aggregator():
+    with pytest.raises(Exception):
+        WindowOp('window_op', 'window_stream', TumblingWindowAssigner(10),
+                 TimeWindowTrigger())
+    with pytest.raises(Exception):
+        WindowOp('window_op', 'window_stream', TumblingWindowAssigner(10),
+                 TimeWindowTrigger(), SumWindowProcessor(), SumAggregator())
+
+
+@pytest.mark.parametrize('aggregator,expected', [
+    (SumAggregator(), [3, 10, 18, 11]),
+    (CountAggregator(), [1, 2, 2, 1]),
+    (MinAggregator(), [3, 3, 7, 11]),
+    (MaxAggregator(), [3, 7, 11, 11]),
+    (MeanAggregator(), [3.0, 5.0, 9.0, 11.0]),
+])
+def test_sliding_windows_share_panes(aggregator, expected):
+    (op, output_stream) = create_window_op(
+        SlidingWindowAssigner(10, 5, event_time=True),
+        aggregator=aggregator)
+    for t in [3, 7, 11]:
+        op.on_msg(msg(t, t))
+    # Messages are aggregated per pane of 5ms rather than per window.
+    assert sorted(op._pane_state_map.keys()) == [0, 5, 10]
+    assert op._window_state_map == {}
+    op.on_watermark(watermark(14))
+    assert [data for (_, data, _) in get_output(output_stream)][:-1] == \
+        expected[:3]
+    # Panes are removed once all their windows are processed.
+    assert sorted(op._pane_state_map.keys()) == [10]
+    op.on_watermark(watermark(19))
+    assert [data for (_, data, _) in get_output(output_stream)][-2] == \
+        expected[3]
+    assert op._pane_state_map == {}
+    assert_watermark_order(output_stream)
+
+
+def test_sliding_windows_with_non_divisible_slide():
+    (op, output_stream) = create_window_op(
+        SlidingWindowAssigner(6, 4, event_time=True),
+        aggregator=SumAggregator())
+    for t in range(20):
+        op.on_msg(msg(t, t))
+    op.on_watermark(watermark(100))
+    sums = [data for (is_watermark, data, _) in get_output(output_stream)
+            if not is_watermark]
+    # Windows [-4, 2), [0, 6), [4, 10), ..., [16, 22).
+    assert sums == [sum(range(max(start, 0), min(start + 6, 20)))
+                    for start in range(-4, 20, 4)]
+
+
+def test_numpy_aggregator():
+    (op, output_stream) = create_window_op(
+        TumblingWindowAssigner(10, event_time=True),
+        aggregator=NumpyAggregator(np.maximum))
+    arrays = [np.array([1, 5, 3]), np.array([4, 2, 6])]
+    for (t, data) in enumerate(arrays):
+        op.on_msg(msg(data, t))
+    op.on_watermark(watermark(9))
+    result = output_stream.sent[0].data
+    assert result.tolist() == [4, 5, 6]
+    # The input arrays are not modified.
+    assert arrays[0].tolist() == [1, 5, 3]
+
+
+def test_aggregator_with_message_trigger():
+    (op, output_stream) = create_window_op(
+        TumblingWindowAssigner(10, event_time=True), CountWindowTrigger(2),
+        SumAggregator())
+    for t in [1, 2, 3]:
+        op.on_msg(msg(t, t))
+    op.on_watermark(watermark(10))
+    assert get_output(output_stream) == [(False, 3, 9), (False, 3, 9),
+                                         (True, None, 10)]
+
+
+def test_count_trigger_state_is_per_window():
+    (op, output_stream) = create_window_op(
+        SlidingWindowAssigner(10, 5, event_time=True), CountWindowTrigger(2))
+    # Windows [0, 10) and [5, 15) get their 2nd message at times 6 and 11.
+    for t in [1, 6, 11]:
+        op.on_msg(msg(t, t))
+    assert get_output(output_stream) == [(False, 7, 9), (False, 17, 14)]
+
+
+def test_assigners_reuse_windows():
+    assigner = TumblingWindowAssigner(10, event_time=True)
+    windows = assigner.assign_windows(msg(0, 1))
+    assert assigner.assign_windows(msg(0, 9)) is windows
+    assert window_bounds(assigner.assign_windows(msg(0, 10))) == [(10, 20)]
+    assigner = SlidingWindowAssigner(10, 5, event_time=True)
+    windows = assigner.assign_windows(msg(0, 5))
+    assert assigner.assign_windows(msg(0, 9)) is windows
+    assert window_bounds(assigner.assign_windows(msg(0, 10))) == [(5, 15),
+                                                                  (10, 20)]
+
+
+def test_late_window_result_follows_forwarded_watermark():
+    (op, output_stream) = create_window_op(
+        TumblingWindowAssigner(10, event_time=True), CountWindowTrigger(2))
+    op.on_msg(msg(1, 1))
+    op.on_watermark(watermark(5))
+    # The window is processed after the watermark 5 was forwarded.
+    op.on_msg(msg(6, 6))
+    assert get_output(output_stream) == [(True, None, 5), (False, 7, 9)]
+    assert_watermark_order(output_stream)
+
+
+@pytest.mark.parametrize('assigner', [
+    TumblingWindowAssigner(10, 3),
+    SlidingWindowAssigner(10, 4, 3),
+])
+def test_processing_time_panes_belong_to_their_windows(monkeypatch, assigner):
+    for now in [100, 101, 102, 105, 109, 113, 114]:
+        monkeypatch.setattr(operators, 'get_timestamp_ms', lambda: now)
+        # The message timestamp is not the processing time.
+        windows = assigner.assign_windows(msg(0, 1))
+        pane = assigner.assign_pane(msg(0, 1))
+        assert pane.start_time <= now < pane.end_time
+        assert window_bounds(assigner.get_pane_windows(pane)) == \
+            window_bounds(windows)
+        for window in windows:
+            assert window.start_time <= now < window.end_time
+            assert (window.start_time - 3) % assigner.pane_size == 0
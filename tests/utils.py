@@ -0,0 +1,98 @@
+import threading
+
+from erdos.data_stream import DataStream
+from erdos.message import Message
+from erdos.message import WatermarkMessage
+from erdos.op import Op
+from erdos.timestamp import Timestamp
+
+
+class SourceOp(Op):
+    """Sends the integers in [0, num_msgs) on the integers stream.
+
+    Each timestamp has msgs_per_timestamp messages, which are followed by
+    its watermark. If end_of_stream is False, the operator does not send the
+    end-of-stream watermark, and waits for the stopped event instead.
+    """
+
+    def __init__(self, name, num_msgs=5, msgs_per_timestamp=1,
+                 end_of_stream=True):
+        super(SourceOp, self).__init__(name)
+        self._num_msgs = num_msgs
+        self._msgs_per_timestamp = msgs_per_timestamp
+        self._end_of_stream = end_of_stream
+        self.stopped = threading.Event()
+
+    @staticmethod
+    def setup_streams(input_streams):
+        return [DataStream(data_type=int, name='integers')]
+
+    def execute(self):
+        output_stream = self.get_output_stream('integers')
+        for index in range(self._num_msgs):
+            timestamp = Timestamp(
+                coordinates=[index // self._msgs_per_timestamp])
+            output_stream.send(Message(index, timestamp))
+            if (index + 1) % self._msgs_per_timestamp == 0:
+                output_stream.send(WatermarkMessage(timestamp))
+        if self._end_of_stream:
+            self.send_end_of_stream()
+        else:
+            self.stopped.wait()
+
+
+class SinkOp(Op):
+    """Records the messages and the watermarks it receives.
+
+    Attributes:
+        received (list): (stream name, timestamp, data) tuples for messages,
+            and ('watermark', timestamp) tuples for watermarks.
+        num_closes (int): Number of times the operator was closed.
+    """
+
+    def __init__(self, name):
+        super(SinkOp, self).__init__(name)
+        self.received = []
+        self.num_closes = 0
+
+    @staticmethod
+    def setup_streams(input_streams):
+        input_streams.add_callback(SinkOp.on_msg)
+        input_streams.add_completion_callback(SinkOp.on_watermark)
+        return []
+
+    @property
+    def data(self):
+        return [event[2] for event in self.received if len(event) == 3]
+
+    @property
+    def watermarks(self):
+        return [event[1] for event in self.received if len(event) == 2]
+
+    def on_msg(self, msg):
+        self.received.append((msg.stream_name, msg.timestamp, msg.data))
+
+    def on_watermark(self, msg):
+        self.received.append(('watermark', msg.timestamp))
+
+    def close(self):
+        self.num_closes += 1
+
+
+def get_op(graph, op_id):
+    """Returns the operator of a graph executed on the local backend."""
+    return graph.op_handles[op_id].executor_handle._op
+
+
+def run_graph(graph, timeout=10):
+    """Executes a graph on the local backend until all its streams ended.
+
+    Returns:
+        (ExecutionHandle): The handle of the stopped execution.
+    """
+    execution_handle = graph.execute_async('local')
+    try:
+        assert execution_handle.wait(timeout=timeout)
+    finally:
+        execution_handle.stop()
+    return execution_handle